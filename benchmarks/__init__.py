@@ -0,0 +1,9 @@
+"""
+Benchmarks of the cooldown checks, run with `python -m benchmarks --output results.json`
+
+Every bucket type is checked through the predicates of :meth:`Cooldown.cooldown` and reset with
+:meth:`Cooldown.reset_cooldown`, using fake contexts, on SQlite (file and in-memory database), the in-memory backend
+and on local MySQL/PostgreSQL/Redis servers when they answer (see `DC_BENCH_MYSQL` / `DC_BENCH_POSTGRES` /
+`DC_BENCH_REDIS`). The throughput, p50/p99 latency and number of statements per operation are printed and can be
+saved as JSON, to be compared with a later run using `--compare results.json`.
+"""
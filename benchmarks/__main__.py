@@ -0,0 +1,67 @@
+from benchmarks.runner import run_all
+
+import argparse
+import asyncio
+import json
+
+from typing import Any, Dict, Tuple
+
+
+def _key(result: Dict[str, Any]) -> Tuple[str, str, str]:
+    return result["backend"], result["bucket"], result["scenario"]
+
+
+def _print(report: Dict[str, Any], baseline: Dict[str, Any] = None) -> None:
+    previous = {} if baseline is None else {_key(result): result for result in baseline["results"]}
+
+    header = f"{'backend':<14}{'bucket':<10}{'scenario':<15}{'ops/sec':>11}{'p50 us':>10}{'p99 us':>10}{'stmts':>7}"
+    if baseline is not None:
+        header += f"{'vs ' + baseline['version']:>14}"
+    print(header)
+
+    for result in report["results"]:
+        line = f"{result['backend']:<14}{result['bucket']:<10}{result['scenario']:<15}" \
+               f"{result['ops_per_sec']:>11}{result['p50_us']:>10}{result['p99_us']:>10}" \
+               f"{result['statements_per_op']:>7}"
+
+        old = previous.get(_key(result))
+        if old is not None and old["ops_per_sec"]:
+            line += f"{(result['ops_per_sec'] / old['ops_per_sec'] - 1) * 100:>+13.1f}%"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmarks the cooldown checks and resets of every bucket type"
+    )
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="sqlite-file, sqlite-memory, memory, mysql, postgresql or redis (default: all available)")
+    parser.add_argument("--iterations", type=int, default=2000, help="timed operations per scenario")
+    parser.add_argument("--users", type=int, default=100, help="distinct users the operations are spread over")
+    parser.add_argument("--blocking", action="store_true", help="use the blocking drivers instead of asyncio ones")
+    parser.add_argument("--inline", action="store_true", help="run the blocking drivers on the event loop")
+    parser.add_argument("--cache-size", type=int, default=0, help="size of the in-process cooldown cache")
+    parser.add_argument("--write-behind", action="store_true", help="batch the updates in write-behind mode")
+    parser.add_argument("--output", help="file to save the results to, as JSON")
+    parser.add_argument("--compare", help="results saved by a previous run, to compare with")
+    args = parser.parse_args()
+
+    options = {"use_native": not args.blocking, "threaded": not args.inline, "cache_size": args.cache_size}
+    if args.write_behind:
+        options["write_behind"] = True
+
+    report = asyncio.run(run_all(args.backends, args.iterations, args.users, **options))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    _print(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
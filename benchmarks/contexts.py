@@ -0,0 +1,91 @@
+import discord
+
+from typing import Any, List, Optional
+
+__all__ = [
+    "FakeGuild",
+    "FakeRole",
+    "FakeCategory",
+    "FakeTextChannel",
+    "FakeMember",
+    "FakeContext",
+    "make_contexts"
+]
+
+
+class FakeGuild:
+    def __init__(self, id: int):
+        self.id = id
+        self.roles: List["FakeRole"] = []
+
+    def get_role(self, role_id: int) -> Optional["FakeRole"]:
+        for role in self.roles:
+            if role.id == role_id:
+                return role
+        return None
+
+
+class FakeRole:
+    def __init__(self, id: int, guild: FakeGuild):
+        self.id = id
+        self.guild = guild
+
+
+class FakeCategory:
+    def __init__(self, id: int, guild: FakeGuild):
+        self.id = id
+        self.guild = guild
+
+
+class FakeTextChannel(discord.TextChannel):
+    # the channel checks use isinstance(channel, discord.TextChannel), these shadow its slots and properties
+    id = 0
+    guild = None
+    category = None
+
+    def __init__(self, id: int, guild: FakeGuild, category: Optional[FakeCategory]):
+        self.id = id
+        self.guild = guild
+        self.category = category
+
+
+class FakeMember:
+    def __init__(self, id: int, roles: List[FakeRole]):
+        self.id = id
+        self.roles = roles
+
+
+class FakeCommand:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class FakeContext:
+    def __init__(self, command_name: str, author: FakeMember, guild: FakeGuild, channel: FakeTextChannel):
+        self.command = FakeCommand(command_name)
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+
+
+def make_contexts(command_name: str, users: int, role_id: int, guilds: int = 4) -> List[Any]:
+    """
+    Builds one context per user, spread over `guilds` guilds which all have the role `role_id`
+
+    :param command_name: name of the command being checked
+    :param users: number of distinct users
+    :param role_id: ID of the role every user has
+    :param guilds: number of guilds
+    """
+
+    contexts = []
+    for i in range(users):
+        guild = FakeGuild(1000 + i % guilds)
+        role = FakeRole(role_id, guild)
+        guild.roles.append(role)
+
+        category = FakeCategory(2000 + i % guilds, guild)
+        channel = FakeTextChannel(3000 + i % guilds, guild, category)
+        contexts.append(FakeContext(command_name, FakeMember(10 ** 6 + i, [role]), guild, channel))
+
+    return contexts
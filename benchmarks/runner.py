@@ -0,0 +1,214 @@
+from benchmarks.contexts import make_contexts
+
+import discord_cooldown
+import asyncio
+import os
+import platform
+import socket
+import tempfile
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from discord.ext import commands
+from discord.ext.commands import BucketType
+from discord_cooldown import Cooldown, SQlite, MySQL, PostgreSQL, Memory, Redis
+
+__all__ = [
+    "BUCKET_TYPES",
+    "backends",
+    "run_backend",
+    "run_all"
+]
+
+BUCKET_TYPES = (BucketType.user, BucketType.guild, BucketType.channel, BucketType.category, BucketType.role)
+ROLE_ID = 42
+# the tables and keys of the servers are named after this prefix
+BENCH_PREFIX = "dc_bench"
+
+# servers are benchmarked when they answer on these urls, which can be changed through the environment
+_SERVER_URLS = {
+    "mysql": os.environ.get("DC_BENCH_MYSQL", "mysql://root@127.0.0.1:3306/discord_cooldown_bench"),
+    "postgresql": os.environ.get("DC_BENCH_POSTGRES", "postgresql://postgres@127.0.0.1:5432/discord_cooldown_bench"),
+    "redis": os.environ.get("DC_BENCH_REDIS", "redis://127.0.0.1:6379/15"),
+}
+
+_DEFAULT_PORTS = {"mysql": 3306, "postgresql": 5432, "redis": 6379}
+
+
+def _server_config(name: str) -> Optional[Any]:
+    url = urlparse(_SERVER_URLS[name])
+    port = url.port or _DEFAULT_PORTS[name]
+    try:
+        socket.create_connection((url.hostname, port), timeout=0.5).close()
+    except OSError:
+        return None
+
+    if name == "redis":
+        return Redis(
+            host=url.hostname, port=port, db=int(url.path.lstrip("/") or 0), passwd=url.password,
+            key_prefix=BENCH_PREFIX
+        )
+
+    config = (MySQL if name == "mysql" else PostgreSQL)(
+        host=url.hostname, port=port, db_name=url.path.lstrip("/"), user=url.username or "", passwd=url.password or ""
+    )
+    # the tables of the run never share a name with those of a bot using the same database
+    config.table_prefix = BENCH_PREFIX
+    return config
+
+
+def backends(directory: str) -> Dict[str, Callable[[], Any]]:
+    """
+    Returns a factory of config per available backend
+
+    :param directory: where the SQlite files are created
+    """
+
+    available = {
+        "sqlite-file": lambda: SQlite(os.path.join(directory, "bench.db")),
+        "sqlite-memory": lambda: SQlite(":memory:"),
+        "memory": lambda: Memory(),
+    }
+    for name in ("mysql", "postgresql", "redis"):
+        if _server_config(name) is not None:
+            available[name] = lambda name=name: _server_config(name)
+
+    return available
+
+
+class _StatementCounter:
+    # counts the statements sent through the database of a Cooldown
+    def __init__(self, db: Any):
+        self.count = 0
+        for name in ("execute", "run", "run_many"):
+            method = getattr(db, name, None)
+            if method is not None:
+                setattr(db, name, self._wrap(method))
+
+    def _wrap(self, method: Callable) -> Callable:
+        async def counted(*args, **kwargs):
+            self.count += 1
+            return await method(*args, **kwargs)
+
+        return counted
+
+
+def _percentile(latencies: List[int], percent: float) -> float:
+    index = min(len(latencies) - 1, int(round(percent / 100 * (len(latencies) - 1))))
+    return latencies[index] / 1000  # microseconds
+
+
+def _summary(name: str, latencies: List[int], elapsed: float, statements: int) -> Dict[str, Any]:
+    latencies.sort()
+    return {
+        "scenario": name, "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_us": round(_percentile(latencies, 50), 1), "p99_us": round(_percentile(latencies, 99), 1),
+        "statements_per_op": round(statements / len(latencies), 3),
+    }
+
+
+async def _timed(operation: Callable[[Any], Any], contexts: List[Any], iterations: int) -> Tuple[List[int], float]:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        context = contexts[i % len(contexts)]
+
+        start = time.perf_counter_ns()
+        try:
+            await operation(context)
+        except commands.CommandOnCooldown:
+            pass
+        latencies.append(time.perf_counter_ns() - start)
+
+    return latencies, time.perf_counter() - started
+
+
+async def _run_type(
+    cd: Cooldown, counter: Optional[_StatementCounter], type: BucketType, iterations: int, users: int
+) -> List[Dict[str, Any]]:
+    async def measure(name: str, operation: Callable[[Any], Any], contexts: List[Any]) -> Dict[str, Any]:
+        before = 0 if counter is None else counter.count
+        latencies, elapsed = await _timed(operation, contexts, iterations)
+        return _summary(name, latencies, elapsed, 0 if counter is None else counter.count - before)
+
+    # every use is allowed: the check writes
+    allow = cd.cooldown(10 ** 9, 60, type=type, role_id=ROLE_ID)(lambda ctx: None).__commands_checks__[0]
+    allowed = await measure("check-allowed", allow, make_contexts(f"allow_{type.name}", users, ROLE_ID))
+
+    # every use after the first one is denied: the check only reads (or answers from the cache)
+    deny = cd.cooldown(1, 3600, type=type, role_id=ROLE_ID)(lambda ctx: None).__commands_checks__[0]
+    deny_contexts = make_contexts(f"deny_{type.name}", users, ROLE_ID)
+    for context in deny_contexts:
+        await deny(context)
+    denied = await measure("check-denied", deny, deny_contexts)
+
+    # the cooldowns of the allowed checks are reset one use at a time
+    reset = await measure("reset", cd.reset_cooldown, make_contexts(f"allow_{type.name}", users, ROLE_ID))
+
+    return [dict(result, bucket=type.name) for result in (allowed, denied, reset)]
+
+
+async def run_backend(
+    name: str, config: Any, iterations: int = 2000, users: int = 100, **options: Any
+) -> List[Dict[str, Any]]:
+    """
+    Benchmarks the checks and resets of every bucket type on one backend
+
+    :param name: name of the backend, stored in the results
+    :param config: the database config
+    :param iterations: number of timed operations per scenario
+    :param users: number of distinct users the operations are spread over
+    :param options: passed to :class:`Cooldown`, e.g. `use_native=False` or `cache_size=10000`
+    """
+
+    cd = Cooldown(config, **options)
+    # only the tables created by this run are dropped at the end
+    created = []
+    if isinstance(config, (MySQL, PostgreSQL)):
+        await cd.db.connect()
+        if not await cd.db.table_columns(cd.cd.table):
+            created.append(cd.cd.table)
+    await cd.setup()
+    counter = None if isinstance(config, (Memory, Redis)) else _StatementCounter(cd.db)
+
+    results = []
+    try:
+        for type in BUCKET_TYPES:
+            for result in await _run_type(cd, counter, type, iterations, users):
+                results.append(dict(result, backend=name))
+    finally:
+        for table in created:
+            await cd.db.run(f"DROP TABLE IF EXISTS {table}")
+        if isinstance(config, Redis):
+            await cd.cd.clear()
+        await cd.close()
+
+    return results
+
+
+async def run_all(
+    selected: List[str] = None, iterations: int = 2000, users: int = 100, **options: Any
+) -> Dict[str, Any]:
+    """
+    Benchmarks every available (or every `selected`) backend
+
+    :return: the results, with the versions they were measured with
+    """
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, config in backends(directory).items():
+            if selected and name not in selected:
+                continue
+
+            results.extend(await run_backend(name, config(), iterations, users, **options))
+            # let the drivers close their threads and files
+            await asyncio.sleep(0)
+
+    return {
+        "version": discord_cooldown.__version__, "python": platform.python_version(),
+        "platform": platform.platform(), "timestamp": time.time(),
+        "iterations": iterations, "users": users, "options": options, "results": results,
+    }
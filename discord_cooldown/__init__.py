@@ -15,5 +15,16 @@ __license__ = "MIT"
 __copyright__ = "Copyright (c) 2023 skrphenix"
 __version__ = "0.1.5"
 
-from .modules import SQlite, MySQL, PostgreSQL
-from .cooldown import Cooldown
+from .modules import SQlite, MySQL, PostgreSQL, Memory, Redis
+from .ext.buckets import Bucket
+from .ext.strategies import Strategy
+from .limiter import Limiter
+
+
+def __getattr__(name: str):
+    # the discord layer is imported on first use, so that the limiter works without discord
+    if name == "Cooldown":
+        from .cooldown import Cooldown
+        return Cooldown
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
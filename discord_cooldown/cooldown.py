@@ -1,13 +1,12 @@
-from discord_cooldown import ext
-from discord_cooldown.modules import *
-from discord_cooldown.ext import Database, get_datetime
+from discord_cooldown.limiter import Limiter
+from discord_cooldown.ext import Strategy
 
 import discord
+import time
 
-from typing import Union, Any, Dict, Mapping, overload, TypeVar
+from typing import Union, Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, overload, TypeVar
 from discord.ext.commands import cooldowns, BucketType
 from discord.ext import commands
-from datetime import timedelta
 
 __all__ = [
     "Context",
@@ -17,268 +16,158 @@ __all__ = [
 Context = TypeVar("Context", bound=Any)
 
 
-class Cooldown:
-    def __init__(self, db_config: Union[SQlite, MySQL, PostgreSQL], timezone: timedelta = None):
+class Cooldown(Limiter):
+    def __init__(self, *args: Any, **kwargs: Any):
         """
-        Config for cooldown system
-
-        :param db_config: provide the database config which you want to use
-        :param timezone: the timedelta to use for cooldown, by default it uses UTC time
+        Config for cooldown system, the discord layer of :class:`Limiter` which takes the same arguments
         """
 
-        db = Database(db_config)
-        if not db.is_connected:
-            db.connect()
-
-        self.cd = ext.Cooldowns(db)
-        self.cd.create_tables()
-        self.timezone = timezone
-
+        super().__init__(*args, **kwargs)
         self._cooldowns: Dict[str, Dict[str, Any]] = {}
 
-    async def _user_predicate(
-        self, context: Context,
-        rate: int, per: Union[int, float], type: BucketType, reset_per_day: bool
-    ) -> bool:
-        command_name = context.command.name
-        await self.cd.users.add_column(command_name)
-
-        try:
-            user = context.author
-        except:
-            user = context.user
-
-        cd = await self.cd.users.get_cooldown(user, command_name)
-        if reset_per_day:
-            expires_at = get_datetime(per, self.timezone) + timedelta(days=1)
-            expires_at = expires_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    @staticmethod
+    def _scope_getter(type: BucketType, role_id: Optional[int]) -> Callable[[Context, Any], Optional[Tuple[int, int]]]:
+        # returns the (scope_id, guild_id) of a use, or None if the cooldown doesn't apply to it
+        if type == BucketType.guild:
+            def scope(context: Context, user: Any) -> Optional[Tuple[int, int]]:
+                guild = context.guild
+                return None if guild is None else (guild.id, guild.id)
+        elif type == BucketType.channel:
+            def scope(context: Context, user: Any) -> Optional[Tuple[int, int]]:
+                channel = context.channel
+                if not isinstance(channel, discord.TextChannel):
+                    return None
+                return channel.id, channel.guild.id
+        elif type == BucketType.category:
+            def scope(context: Context, user: Any) -> Optional[Tuple[int, int]]:
+                category = context.channel.category
+                if category is None:
+                    return None
+                return category.id, category.guild.id
+        elif type == BucketType.role:
+            def scope(context: Context, user: Any) -> Optional[Tuple[int, int]]:
+                role = context.guild.get_role(role_id)
+                if role is None or role not in user.roles:
+                    return None
+                return role.id, role.guild.id
         else:
-            expires_at = get_datetime(per, self.timezone)
-
-        if cd is None:
-            options = ext.Options(rate, +1, type, expires_at=expires_at)
-            await self.cd.users.update_cooldown(user, command_name, options)
-            return True
+            def scope(context: Context, user: Any) -> Optional[Tuple[int, int]]:
+                return 0, 0
+
+        return scope
+
+    def _compile(
+        self, rate: int, per: Union[int, float], type: BucketType, role_id: Optional[int], reset_per_day: bool,
+        strategy: Strategy = Strategy.fixed_window
+    ) -> Callable[[Context], Awaitable[bool]]:
+        # everything which doesn't depend on the use is looked up once, here
+        info = {"rate": rate, "per": per, "type": type, "role_id": role_id, "strategy": strategy}
+        registered = self._cooldowns
+        scope = self._scope_getter(type, role_id)
+        hit = self.cd.hit
+        now_ = self._now
+        expires_at_ = self._expires_at
+        cooldown = cooldowns.Cooldown(rate, per)
 
-        options = cd
-        if get_datetime(timezone=self.timezone) > options.expires_at:
-            await self.cd.users.update_cooldown(
-                user, command_name, ext.Options(rate, +1, type, expires_at=expires_at))
-
-            return True
-        else:
-            if options.count < rate:
-                options.count += 1
-                await self.cd.users.update_cooldown(user, command_name, options)
-                return True
-
-            left_time = options.expires_at - get_datetime(timezone=self.timezone)
-            raise commands.CommandOnCooldown(
-                cooldown=cooldowns.Cooldown(rate, per),
-                retry_after=round(left_time.total_seconds()),
-                type=type
-            )
-
-    async def _guild_predicate(
-        self, context: Context,
-        rate: int, per: Union[int, float], type: BucketType, reset_per_day: bool
-    ) -> bool:
-        command_name = context.command.name
-        await self.cd.guilds.add_column(command_name)
-
-        try:
-            user = context.author
-        except:
-            user = context.user
-
-        guild = context.guild
-        if guild is None:
-            return True
-
-        cd = await self.cd.guilds.get_cooldown(user, guild, command_name)
-        if reset_per_day:
-            expires_at = get_datetime(per, self.timezone) + timedelta(days=1)
-            expires_at = expires_at.replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            expires_at = get_datetime(per, self.timezone)
+        async def predicate(context: Context) -> bool:
+            if not self._ready:
+                await self.setup()
 
-        if cd is None:
-            options = ext.Options(rate, +1, type, expires_at=expires_at)
-            await self.cd.guilds.update_cooldown(user, guild, command_name, options)
-            return True
+            command_name = context.command.name
+            if command_name not in registered:
+                registered[command_name] = info
 
-        options = cd
-        if get_datetime(timezone=self.timezone) > options.expires_at:
-            await self.cd.guilds.update_cooldown(
-                user, guild, command_name, ext.Options(
-                    rate, +1, type, expires_at=expires_at
-                ))
+            try:
+                user = context.author
+            except AttributeError:
+                user = context.user
 
-            return True
-        else:
-            if options.count < rate:
-                options.count += 1
-                await self.cd.guilds.update_cooldown(user, guild, command_name, options)
+            ids = scope(context, user)
+            if ids is None:
                 return True
 
-            left_time = options.expires_at - get_datetime(timezone=self.timezone)
-            raise commands.CommandOnCooldown(
-                cooldown=cooldowns.Cooldown(rate, per),
-                retry_after=round(left_time.total_seconds()),
-                type=type
+            # the clock is read once per use
+            now = now_()
+            allowed, retry_after = await hit(
+                type, user.id, ids[0], command_name, rate, expires_at_(now, per, reset_per_day, strategy), ids[1],
+                now=now, strategy=strategy
             )
-
-    async def _channel_predicate(
-        self, context: Context,
-        rate: int, per: Union[int, float], type: BucketType, reset_per_day: bool
-    ) -> bool:
-        command_name = context.command.name
-        await self.cd.channels.add_column(command_name)
-
-        try:
-            user = context.author
-        except:
-            user = context.user
-
-        channel = context.channel
-        if not isinstance(channel, discord.TextChannel):
-            return True
-
-        cd = await self.cd.channels.get_cooldown(user, channel, command_name)
-        if reset_per_day:
-            expires_at = get_datetime(per, self.timezone) + timedelta(days=1)
-            expires_at = expires_at.replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            expires_at = get_datetime(per, self.timezone)
-
-        if cd is None:
-            options = ext.Options(rate, +1, type, expires_at=expires_at)
-            await self.cd.channels.update_cooldown(user, channel, command_name, options)
-            return True
-
-        options = cd
-        if get_datetime(timezone=self.timezone) > options.expires_at:
-            await self.cd.channels.update_cooldown(
-                user, channel, command_name, ext.Options(
-                    rate, +1, type, expires_at=expires_at
-                ))
-
-            return True
-        else:
-            if options.count < rate:
-                options.count += 1
-                await self.cd.channels.update_cooldown(user, channel, command_name, options)
+            if allowed:
                 return True
 
-            left_time = options.expires_at - get_datetime(timezone=self.timezone)
-            raise commands.CommandOnCooldown(
-                cooldown=cooldowns.Cooldown(rate, per),
-                retry_after=round(left_time.total_seconds()),
-                type=type
-            )
-
-    async def _category_predicate(
-        self, context: Context,
-        rate: int, per: Union[int, float], type: BucketType, reset_per_day: bool
-    ) -> bool:
-        command_name = context.command.name
-        await self.cd.categories.add_column(command_name)
-
-        try:
-            user = context.author
-        except:
-            user = context.user
+            raise commands.CommandOnCooldown(cooldown=cooldown, retry_after=retry_after, type=type)
 
-        category = context.channel.category
-        if category is None:
-            return True
+        return self._observed(predicate, type)
 
-        cd = await self.cd.categories.get_cooldown(user, category, command_name)
-        if reset_per_day:
-            expires_at = get_datetime(per, self.timezone) + timedelta(days=1)
-            expires_at = expires_at.replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            expires_at = get_datetime(per, self.timezone)
+    def _compile_limits(
+        self, limits: List[Tuple[int, Union[int, float], BucketType]], role_id: Optional[int], strategy: Strategy
+    ) -> Callable[[Context], Awaitable[bool]]:
+        # the check of several limits, counted together by one transaction. The first limit is the one registered
+        # and raised, with the longest retry_after of those denying the use
+        rate, per, type = limits[0]
+        info = {"rate": rate, "per": per, "type": type, "role_id": role_id, "strategy": strategy, "limits": limits}
+        registered = self._cooldowns
+        scopes = [(rate_, per_, type_, self._scope_getter(type_, role_id)) for rate_, per_, type_ in limits]
+        hit_many = self.cd.hit_many
+        now_ = self._now
+        expires_at_ = self._expires_at
+        cooldown = cooldowns.Cooldown(rate, per)
 
-        if cd is None:
-            options = ext.Options(rate, +1, type, expires_at=expires_at)
-            await self.cd.categories.update_cooldown(user, category, command_name, options)
-            return True
-
-        options = cd
-        if get_datetime(timezone=self.timezone) > options.expires_at:
-            await self.cd.categories.update_cooldown(
-                user, category, command_name, ext.Options(
-                    rate, +1, type, expires_at=expires_at
-                ))
-
-            return True
-        else:
-            if options.count < rate:
-                options.count += 1
-                await self.cd.categories.update_cooldown(user, category, command_name, options)
+        async def predicate(context: Context) -> bool:
+            if not self._ready:
+                await self.setup()
+
+            command_name = context.command.name
+            if command_name not in registered:
+                registered[command_name] = info
+
+            try:
+                user = context.author
+            except AttributeError:
+                user = context.user
+
+            # the clock is read once per use
+            now = now_()
+            applied = []
+            for rate_, per_, type_, scope in scopes:
+                ids = scope(context, user)
+                if ids is not None:
+                    applied.append((
+                        type_, user.id, ids[0], command_name, rate_, expires_at_(now, per_, False, strategy), ids[1]
+                    ))
+
+            allowed, retry_after = await hit_many(applied, now=now, strategy=strategy)
+            if allowed:
                 return True
 
-            left_time = options.expires_at - get_datetime(timezone=self.timezone)
-            raise commands.CommandOnCooldown(
-                cooldown=cooldowns.Cooldown(rate, per),
-                retry_after=round(left_time.total_seconds()),
-                type=type
-            )
+            raise commands.CommandOnCooldown(cooldown=cooldown, retry_after=retry_after, type=type)
 
-    async def _role_predicate(
-        self, context: Context,
-        role_id: int,
-        rate: int, per: Union[int, float], type: BucketType, reset_per_day: bool
-    ) -> bool:
-        command_name = context.command.name
-        await self.cd.roles.add_column(command_name)
+        return self._observed(predicate, type)
 
-        try:
-            user = context.author
-        except:
-            user = context.user
+    def _observed(
+        self, predicate: Callable[[Context], Awaitable[bool]], type: BucketType
+    ) -> Callable[[Context], Awaitable[bool]]:
+        observer = self.observer
+        if observer is None:
+            return predicate
 
-        role = context.guild.get_role(role_id)
-        if role is None or role not in user.roles:
-            return True
+        async def observed(context: Context) -> bool:
+            start, started = time.time_ns(), time.perf_counter_ns()
+            try:
+                result = await predicate(context)
+            except commands.CommandOnCooldown:
+                observer.on_check(context.command.name, type, False, start, time.perf_counter_ns() - started)
+                raise
 
-        cd = await self.cd.roles.get_cooldown(user, role, command_name)
-        if reset_per_day:
-            expires_at = get_datetime(per, self.timezone) + timedelta(days=1)
-            expires_at = expires_at.replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            expires_at = get_datetime(per, self.timezone)
-
-        if cd is None:
-            options = ext.Options(rate, +1, type, expires_at=expires_at)
-            await self.cd.roles.update_cooldown(user, role, command_name, options)
-            return True
-
-        options = cd
-        if get_datetime(timezone=self.timezone) > options.expires_at:
-            await self.cd.roles.update_cooldown(
-                user, role, command_name, ext.Options(
-                    rate, +1, type, expires_at=expires_at
-                ))
+            observer.on_check(context.command.name, type, True, start, time.perf_counter_ns() - started)
+            return result
 
-            return True
-        else:
-            if options.count < rate:
-                options.count += 1
-                await self.cd.roles.update_cooldown(user, role, command_name, options)
-                return True
-
-            left_time = options.expires_at - get_datetime(timezone=self.timezone)
-            raise commands.CommandOnCooldown(
-                cooldown=cooldowns.Cooldown(rate, per),
-                retry_after=round(left_time.total_seconds()),
-                type=type
-            )
+        return observed
 
     @overload
     def cooldown(self, rate: int, per: Union[float, int], *,
-                 role_id: int = None, type: BucketType = BucketType.user) -> commands.check:
+                 role_id: int = None, type: BucketType = BucketType.user,
+                 strategy: Union[Strategy, str] = Strategy.fixed_window) -> commands.check:
         ...
 
     @overload
@@ -286,9 +175,16 @@ class Cooldown:
                  type: BucketType = BucketType.user) -> commands.check:
         ...
 
+    @overload
+    def cooldown(self, *, limits: Sequence[Tuple[int, Union[float, int], BucketType]], role_id: int = None,
+                 strategy: Union[Strategy, str] = Strategy.fixed_window) -> commands.check:
+        ...
+
     def cooldown(
         self, rate: int = None, per: Union[float, int] = None, *, role_id: int = None,
-        type: BucketType = BucketType.user, reset_per_day: bool = False
+        type: BucketType = BucketType.user, reset_per_day: bool = False,
+        strategy: Union[Strategy, str] = Strategy.fixed_window,
+        limits: Sequence[Tuple[int, Union[float, int], BucketType]] = None
     ):
         """
         A decorator that adds a cooldown to a command
@@ -302,17 +198,26 @@ class Cooldown:
         If a cooldown is triggered, then :exc:`commands.CommandOnCooldown` is triggered in
         :func:`.on_command_error` and the local error handler.
 
-        A command can only have a single cooldown.
+        Several cooldowns of a command are given as `limits`, e.g. 3 uses per user and 50 per guild every minute
+        with ``limits=[(3, 60, BucketType.user), (50, 60, BucketType.guild)]``. A use is only counted if every one
+        of them allows it, and `retry_after` is the longest of those denying it.
 
         :param rate: The number of times a command can be used before triggering a cooldown.
         :param per: The amount of seconds to wait for a cooldown when it's been triggered.
         :param role_id: Enter the role ID
         :param type: The type of cooldown to have.
         :param reset_per_day: If True is given, then the cooldown will be reset at `0:00` UTC(or provided timezone).
+        :param strategy: the algorithm which limits the uses, see :class:`Strategy`. `reset_per_day` only works
+            with the fixed window.
+        :param limits: (rate, per, type) of every cooldown, instead of `rate`, `per` and `type`. One per type, and
+            `reset_per_day` can't be used with them.
 
         :return: commands.check
         """
 
+        if limits is not None:
+            return commands.check(self._limits(limits, rate, per, role_id, reset_per_day, strategy))
+
         if not reset_per_day:
             if rate is None and per is None:
                 raise ValueError("Excepted values for both rate and per, got None instead")
@@ -321,32 +226,40 @@ class Cooldown:
             if rate is None:
                 raise ValueError("Excepted integer, got None instead for `rate`")
 
+        type = BucketType(type.value)  # a :class:`Bucket` is accepted as well
         if type == BucketType.role and role_id is None:
             raise ValueError("Excepted role_id for type:`commands.BucketType.role` got None instead")
+        strategy = self._strategy(strategy, rate, per, reset_per_day)
 
-        async def predicate(context: Context) -> bool:
-            self._cooldowns[context.command.name] = {
-                "rate": rate, "per": per, "type": type, "role_id": role_id
-            }
-
-            kwargs = {
-                "context": context, "rate": rate, "per": per, "type": type, "reset_per_day": reset_per_day
-            }
-
-            if type == BucketType.role:
-                kwargs["role_id"] = role_id
-                return await self._role_predicate(**kwargs)
-            elif type == BucketType.guild:
-                return await self._guild_predicate(**kwargs)
-            elif type == BucketType.channel:
-                return await self._channel_predicate(**kwargs)
-            elif type == BucketType.category:
-                return await self._category_predicate(**kwargs)
-            else:
-                return await self._user_predicate(**kwargs)
+        # the check is built once, per decorated command
+        predicate = self._compile(rate, per, type, role_id, reset_per_day, strategy)
 
         return commands.check(predicate)
 
+    def _limits(
+        self, limits: Sequence[Tuple[int, Union[float, int], BucketType]], rate: Optional[int],
+        per: Union[float, int, None], role_id: Optional[int], reset_per_day: bool, strategy: Union[Strategy, str]
+    ) -> Callable[[Context], Awaitable[bool]]:
+        # checks the arguments of a cooldown with `limits` and builds its check
+        if rate is not None or per is not None or reset_per_day:
+            raise ValueError("Excepted either limits or rate, per and reset_per_day, got both instead")
+        if not limits:
+            raise ValueError("Excepted at least one limit, got none instead")
+
+        limits = [(rate_, per_, BucketType(type_.value)) for rate_, per_, type_ in limits]
+        types = [type_ for _, _, type_ in limits]
+        if len(set(types)) < len(types):
+            raise ValueError("Excepted one limit per type, got the same type twice")
+        if BucketType.role in types and role_id is None:
+            raise ValueError("Excepted role_id for type:`commands.BucketType.role` got None instead")
+
+        for rate_, per_, _ in limits:
+            if rate_ is None or per_ is None:
+                raise ValueError("Excepted values for both rate and per of every limit, got None instead")
+            strategy = self._strategy(strategy, rate_, per_, False)
+
+        return self._compile_limits(limits, role_id, strategy)
+
     async def reset_cooldown(self, context: Context, force: bool = False) -> None:
         """
         reset a command cooldown
@@ -365,46 +278,14 @@ class Cooldown:
 
         try:
             user = context.author
-        except:
+        except AttributeError:
             user = context.user
 
-        cmd_type = cmd["type"]
-        if cmd_type == BucketType.guild:
-            if context.guild is None:
-                return
-            if force:
-                return await self.cd.guilds.remove_cooldown(user, context.guild, command_name)
-
-            await self.cd.guilds.reset_cooldown(user, context.guild, command_name)
-        elif cmd_type == BucketType.channel:
-            if force:
-                return await self.cd.channels.remove_cooldown(user, context.channel, command_name)
-
-            await self.cd.channels.reset_cooldown(user, context.channel, command_name)
-        elif cmd_type == BucketType.category:
-            if context.channel.category is None:
-                return
-            if force:
-                return await self.cd.categories.remove_cooldown(user, context.channel.category, command_name)
-
-            await self.cd.categories.reset_cooldown(user, context.channel.category, command_name)
-        elif cmd_type == BucketType.role:
-            role_id = cmd.get("role_id", None)
-            if role_id is None:
-                return
-
-            role = context.guild.get_role(role_id)
-            if role is None:
-                return
-            if force:
-                return await self.cd.roles.remove_cooldown(user, role, command_name)
-
-            await self.cd.roles.reset_cooldown(user, role, command_name)
-        else:
-            if force:
-                return await self.cd.users.remove_cooldown(user, command_name)
-
-            await self.cd.users.reset_cooldown(user, command_name)
+        # every limit of a command which has several
+        for type in [type for _, _, type in cmd.get("limits", ())] or [cmd["type"]]:
+            ids = self._scope_getter(type, cmd.get("role_id", None))(context, user)
+            if ids is not None:
+                await self.reset(type, user.id, command_name, scope_id=ids[0], force=force)
 
     @property
     def cooldowns(self) -> Mapping[str, Mapping[str, Any]]:
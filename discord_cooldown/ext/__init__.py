@@ -1,2 +1,17 @@
+from .buckets import Bucket
+from .strategies import Strategy, decide, decide_all
+from .clock import Clock, FakeClock
 from .base import Cooldowns, Options, get_datetime
-from .database import Database
+from .database import Database, AsyncDatabase, PoolTimeout
+from .flight import KeyLocks, SingleFlight
+from .pool import ConnectionPool
+from .cache import CooldownCache
+from .legacy import LegacyTables, migrate_legacy
+from .worker import DatabaseWorker
+from .writebehind import WriteBehind
+from .memory import MemoryStore, MemoryCooldowns
+from .redisdb import RedisDatabase, RedisCooldowns
+from .collector import ExpiryCollector
+from .transfer import export_cooldowns, import_cooldowns
+from .statements import StatementCache
+from .metrics import Observer, Histogram, Metrics, instrument
@@ -0,0 +1,166 @@
+from discord_cooldown.ext.base import Cooldowns, Options
+
+import discord
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from datetime import datetime
+from discord.ext.commands import BucketType
+
+__all__ = [
+    "ACCESSORS"
+]
+
+
+class _Users:
+    __slots__ = ("_cd",)
+
+    def __init__(self, cooldowns: Cooldowns):
+        self._cd = cooldowns
+
+    async def get_cooldown(self, user: discord.Member, command_name: str) -> Optional[Options]:
+        return await self._cd.get(BucketType.user, user.id, 0, command_name)
+
+    async def update_cooldown(self, user: discord.Member, command_name: str, options: Options) -> None:
+        await self._cd.set(BucketType.user, user.id, 0, command_name, options)
+
+    async def remove_cooldown(self, user: discord.Member, command_name: str) -> None:
+        await self._cd.remove(BucketType.user, user.id, 0, command_name)
+
+    async def reset_cooldown(self, user: discord.Member, command_name: str) -> None:
+        await self._cd.reset(BucketType.user, user.id, 0, command_name)
+
+    async def hit(self, user: discord.Member, command_name: str, rate: int, expires_at: datetime) -> Tuple[bool, float]:
+        return await self._cd.hit(BucketType.user, user.id, 0, command_name, rate, expires_at)
+
+
+class _Guilds:
+    __slots__ = ("_cd",)
+
+    def __init__(self, cooldowns: Cooldowns):
+        self._cd = cooldowns
+
+    async def get_cooldown(self, user: discord.Member, guild: discord.Guild, command_name: str) -> Optional[Options]:
+        return await self._cd.get(BucketType.guild, user.id, guild.id, command_name)
+
+    async def update_cooldown(
+        self, user: discord.Member, guild: discord.Guild, command_name: str, options: Options
+    ) -> None:
+        await self._cd.set(BucketType.guild, user.id, guild.id, command_name, options, guild_id=guild.id)
+
+    async def remove_cooldown(self, user: discord.Member, guild: discord.Guild, command_name: str) -> None:
+        await self._cd.remove(BucketType.guild, user.id, guild.id, command_name)
+
+    async def reset_cooldown(self, user: discord.Member, guild: discord.Guild, command_name: str) -> None:
+        await self._cd.reset(BucketType.guild, user.id, guild.id, command_name)
+
+    async def hit(
+        self, user: discord.Member, guild: discord.Guild, command_name: str, rate: int, expires_at: datetime
+    ) -> Tuple[bool, float]:
+        return await self._cd.hit(BucketType.guild, user.id, guild.id, command_name, rate, expires_at, guild.id)
+
+
+class _Channels:
+    __slots__ = ("_cd",)
+
+    def __init__(self, cooldowns: Cooldowns):
+        self._cd = cooldowns
+
+    async def get_cooldown(
+        self, user: discord.Member, channel: discord.TextChannel, command_name: str
+    ) -> Optional[Options]:
+        return await self._cd.get(BucketType.channel, user.id, channel.id, command_name)
+
+    async def update_cooldown(
+        self, user: discord.Member, channel: discord.TextChannel, command_name: str, options: Options
+    ) -> None:
+        await self._cd.set(
+            BucketType.channel, user.id, channel.id, command_name, options, guild_id=_guild_id(channel)
+        )
+
+    async def remove_cooldown(self, user: discord.Member, channel: discord.TextChannel, command_name: str) -> None:
+        await self._cd.remove(BucketType.channel, user.id, channel.id, command_name)
+
+    async def reset_cooldown(self, user: discord.Member, channel: discord.TextChannel, command_name: str) -> None:
+        await self._cd.reset(BucketType.channel, user.id, channel.id, command_name)
+
+    async def hit(
+        self, user: discord.Member, channel: discord.TextChannel, command_name: str, rate: int, expires_at: datetime
+    ) -> Tuple[bool, float]:
+        return await self._cd.hit(
+            BucketType.channel, user.id, channel.id, command_name, rate, expires_at, _guild_id(channel)
+        )
+
+
+class _Categories:
+    __slots__ = ("_cd",)
+
+    def __init__(self, cooldowns: Cooldowns):
+        self._cd = cooldowns
+
+    async def get_cooldown(
+        self, user: discord.Member, category: discord.CategoryChannel, command_name: str
+    ) -> Optional[Options]:
+        return await self._cd.get(BucketType.category, user.id, category.id, command_name)
+
+    async def update_cooldown(
+        self, user: discord.Member, category: discord.CategoryChannel, command_name: str, options: Options
+    ) -> None:
+        await self._cd.set(
+            BucketType.category, user.id, category.id, command_name, options, guild_id=_guild_id(category)
+        )
+
+    async def remove_cooldown(
+        self, user: discord.Member, category: discord.CategoryChannel, command_name: str
+    ) -> None:
+        await self._cd.remove(BucketType.category, user.id, category.id, command_name)
+
+    async def reset_cooldown(self, user: discord.Member, category: discord.CategoryChannel, command_name: str) -> None:
+        await self._cd.reset(BucketType.category, user.id, category.id, command_name)
+
+    async def hit(
+        self, user: discord.Member, category: discord.CategoryChannel, command_name: str, rate: int, expires_at: datetime
+    ) -> Tuple[bool, float]:
+        return await self._cd.hit(
+            BucketType.category, user.id, category.id, command_name, rate, expires_at, _guild_id(category)
+        )
+
+
+class _Roles:
+    __slots__ = ("_cd",)
+
+    def __init__(self, cooldowns: Cooldowns):
+        self._cd = cooldowns
+
+    async def get_cooldown(
+        self, user: discord.Member, role: discord.Role, command_name: str
+    ) -> Optional[Options]:
+        return await self._cd.get(BucketType.role, user.id, role.id, command_name)
+
+    async def update_cooldown(
+        self, user: discord.Member, role: discord.Role, command_name: str, options: Options
+    ) -> None:
+        await self._cd.set(BucketType.role, user.id, role.id, command_name, options, guild_id=_guild_id(role))
+
+    async def remove_cooldown(self, user: discord.Member, role: discord.Role, command_name: str) -> None:
+        await self._cd.remove(BucketType.role, user.id, role.id, command_name)
+
+    async def reset_cooldown(self, user: discord.Member, role: discord.Role, command_name: str) -> None:
+        await self._cd.reset(BucketType.role, user.id, role.id, command_name)
+
+    async def hit(
+        self, user: discord.Member, role: discord.Role, command_name: str, rate: int, expires_at: datetime
+    ) -> Tuple[bool, float]:
+        return await self._cd.hit(
+            BucketType.role, user.id, role.id, command_name, rate, expires_at, _guild_id(role)
+        )
+
+
+def _guild_id(obj: Any) -> int:
+    guild = getattr(obj, "guild", None)
+    return 0 if guild is None else guild.id
+
+
+# the accessors of :class:`Cooldowns`, by property name
+ACCESSORS: Dict[str, Callable[[Cooldowns], Any]] = {
+    "users": _Users, "guilds": _Guilds, "channels": _Channels, "categories": _Categories, "roles": _Roles,
+}
@@ -1,11 +1,25 @@
-from discord_cooldown.ext.database import Database
-
+from discord_cooldown.ext.buckets import Bucket
+from discord_cooldown.ext.cache import CacheKey, CooldownCache
+from discord_cooldown.ext.clock import Clock
+from discord_cooldown.ext.database import AsyncDatabase
+from discord_cooldown.ext.flight import KeyLocks, SingleFlight
+from discord_cooldown.ext.legacy import LegacyTables
+from discord_cooldown.ext.strategies import Strategy, decide, decide_all
+from discord_cooldown.ext.writebehind import WriteBehind
+from discord_cooldown.modules import SQlite, MySQL, PostgreSQL
+
+import contextlib
+import functools
 import json
-import discord
+import operator
+import re
+import sqlite3
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Iterable, Sequence, Tuple, Union, TYPE_CHECKING
 from datetime import datetime, timedelta
-from discord.ext.commands import BucketType
+
+if TYPE_CHECKING:
+    from discord_cooldown.ext.accessors import _Users, _Guilds, _Channels, _Categories, _Roles
 
 __all__ = [
     "Options",
@@ -14,12 +28,25 @@ __all__ = [
 ]
 
 
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+_DEFAULT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# the `type` of a JSON cell is whatever json.dumps made of the enum: ["user", 1], or an int/name if written by hand
+_BUCKET_TYPES: Dict[Any, Bucket] = {}
+for _type in Bucket:
+    _BUCKET_TYPES.update({_type.value: _type, _type.name: _type, (_type.name, _type.value): _type})
+
+
 class Options:
+    __slots__ = ("rate", "count", "expires_at", "type", "default_format", "previous")
+
     def __init__(
         self,
-        rate: int, count: int, type: BucketType,
+        rate: int, count: int, type: Bucket,
         expires_at: datetime,
-        default_format: str = "%Y-%m-%d %H:%M:%S"
+        default_format: str = _DEFAULT_FORMAT,
+        previous: int = 0
     ):
         """
         cooldown options
@@ -29,6 +56,7 @@ class Options:
         :param type: The type of cooldown to have.
         :param expires_at: The time when a command expires
         :param default_format: The default format of the datetime.datetime
+        :param previous: The number of uses in the previous window, only kept by :attr:`Strategy.sliding_window`
         """
 
         self.rate = rate
@@ -36,25 +64,54 @@ class Options:
         self.expires_at = expires_at
         self.type = type
         self.default_format = default_format
+        self.previous = previous
 
     @classmethod
-    def from_dict(cls, options: Dict[str, Any], default_format: str = "%Y-%m-%d %H:%M:%S") -> "Options":
-        if options["type"] == BucketType.guild:
-            type_ = BucketType.guild
-        elif options["type"] == BucketType.channel:
-            type_ = BucketType.channel
-        elif options["type"] == BucketType.category:
-            type_ = BucketType.category
-        elif options["type"] == BucketType.role:
-            type_ = BucketType.role
+    def from_millis(
+        cls, rate: int, count: int, type: Bucket, expires_at: int, timezone: timedelta = None, previous: int = 0
+    ) -> "Options":
+        """
+        Decodes a stored cooldown
+
+        :param expires_at: the expiry in UTC epoch milliseconds
+        :param timezone: the timedelta used for :attr:`expires_at`, by default UTC
+        """
+
+        if timezone is not None:
+            expires_at_ = _EPOCH + timezone + timedelta(milliseconds=expires_at)
         else:
-            type_ = BucketType.user
+            expires_at_ = _EPOCH + timedelta(milliseconds=expires_at)
+        return cls(rate, count, type, expires_at_, previous=previous)
 
-        return cls(
-            rate=options["rate"], count=options["count"],
-            expires_at=datetime.strptime(options["expires_at"], default_format),
-            type=type_,
-        )
+    def to_millis(self, timezone: timedelta = None) -> int:
+        """
+        Returns :attr:`expires_at` in UTC epoch milliseconds, the stored encoding
+        """
+
+        if timezone is not None:
+            return (self.expires_at - timezone - _EPOCH) // _MILLISECOND
+        return (self.expires_at - _EPOCH) // _MILLISECOND
+
+    @classmethod
+    def from_dict(cls, options: Dict[str, Any], default_format: str = _DEFAULT_FORMAT) -> "Options":
+        """
+        Reads the JSON cells of older versions
+        """
+
+        type_ = options["type"]
+        type_ = _BUCKET_TYPES.get(tuple(type_) if isinstance(type_, list) else type_, Bucket.user)
+
+        if default_format == _DEFAULT_FORMAT:
+            # `str(datetime)` is ISO 8601, much faster to parse than with strptime
+            expires_at = datetime.fromisoformat(options["expires_at"])
+        else:
+            expires_at = datetime.strptime(options["expires_at"], default_format)
+
+        return cls(rate=options["rate"], count=options["count"], expires_at=expires_at, type=type_)
+
+    @classmethod
+    def from_json(cls, cell: str) -> "Options":
+        return cls.from_dict(json.loads(cell))
 
     def toJSON(self) -> Dict[str, Any]:
         data = {
@@ -66,420 +123,837 @@ class Options:
         return data
 
 
-class _Users:
-    def __init__(self, db: Database):
-        self._db = db
-        self._table_prefix = self._db.table_prefix
-        self._fmtr = self._db.fmtr
+_SQLITE_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
 
-        self.view = f"`{self._table_prefix}_user`"
+_MARKER = re.compile(r":(\w+)")
+# the values which are only compared to / computed with BIGINT columns, typed explicitly for PostgreSQL
+_NUMERIC_MARKERS = {"now", "window", "interval", "remaining", "limit"}
 
-    async def add_column(self, command_name: str) -> None:
-        try:
-            self._db.run("ALTER TABLE {} ADD `{}` LONGTEXT DEFAULT NULL".format(self.view, command_name))
-        except:
-            pass
 
-    async def add_user(self, user: discord.Member):
-        data = self._db.execute(
-            "SELECT * FROM {} WHERE user_id = {}".format(self.view, self._fmtr),
-            (user.id,)
-        )
-        if data is None:
-            self._db.run(
-                "INSERT INTO {}(user_id) VALUES({})".format(
-                    self.view, self._fmtr),
-                (user.id,)
-            )
+def _bind(query: str, placeholder: str, typed: bool = False) -> Tuple[str, Callable[[Dict[str, Any]], Tuple[Any, ...]]]:
+    """
+    replaces the `:name` markers of a query by placeholders
 
-    async def get_cooldown(self, user: discord.Member, command_name: str) -> Optional[Options]:
-        data = self._db.execute(
-            "SELECT {} FROM {} WHERE user_id = {}".format(command_name, self.view, self._fmtr),
-            (user.id,)
-        )
-        if data is None:
-            await self.add_user(user)
-            return None
-        if data[0] is None:
-            return None
+    :return: the query and a function which picks its values, in order, out of a dict
+    """
 
-        options = json.loads(data[0])
-        return Options.from_dict(options)
+    names = _MARKER.findall(query)
 
-    async def update_cooldown(self, user: discord.Member, command_name: str, options: Options) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = {v} WHERE user_id = {v}".format(self.view, command_name, v=self._fmtr),
-            (json.dumps(options.toJSON()), user.id)
-        )
+    def placeholder_(match: "re.Match") -> str:
+        if typed and match.group(1) in _NUMERIC_MARKERS:
+            return f"CAST({placeholder} AS BIGINT)"
+        return placeholder
 
-    async def remove_cooldown(self, user: discord.Member, command_name: str) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = NULL WHERE user_id = {}".format(self.view, command_name, self._fmtr),
-            (user.id,)
-        )
+    return _MARKER.sub(placeholder_, query), operator.itemgetter(*names)
 
-    async def reset_cooldown(self, user: discord.Member, command_name: str) -> None:
-        options = await self.get_cooldown(user, command_name)
-        if options is None:
-            return
 
-        if options.count > 1:
-            options.count -= 1
-            await self.update_cooldown(user, command_name, options)
-        else:
-            await self.remove_cooldown(user, command_name)
+def get_datetime(seconds: int | float = None, timezone: timedelta = None) -> datetime:
+    cur_time = datetime.utcnow()
+    if timezone is not None:
+        cur_time = cur_time + timezone
 
+    if seconds is None:
+        return cur_time.replace(microsecond=0)
+
+    return (cur_time + timedelta(seconds=seconds)).replace(microsecond=0)
+
+
+class Cooldowns:
+    def __init__(
+        self, db: AsyncDatabase, timezone: timedelta = None, cache: CooldownCache = None, clock: Clock = None
+    ):
+        """
+        Storage of the cooldowns
+
+        Every cooldown is a row of the `<prefix>_entries` table keyed by (bucket, user_id, scope_id, command), where
+        `scope_id` is the guild/channel/category/role ID (0 for user cooldowns) and `expires_at` is stored in UTC
+        epoch milliseconds. Cooldowns still in the wide tables of older versions are moved over on their first read,
+        see :func:`migrate_legacy` to move all of them at once.
+
+        :param db: the database to use
+        :param timezone: the timedelta used for :attr:`Options.expires_at`, by default UTC
+        :param cache: an optional in-process cache, written through by every update
+        :param clock: the time of the cooldowns in UTC epoch milliseconds, by default the system time, see
+            :class:`Clock`
+        """
 
-class _Guilds:
-    def __init__(self, db: Database):
         self._db = db
         self._table_prefix = self._db.table_prefix
         self._fmtr = self._db.fmtr
+        self.timezone = timedelta() if timezone is None else timezone
+        self.clock = Clock() if clock is None else clock
+
+        self.table = f"{self._table_prefix}_entries"
+        self.legacy = LegacyTables(db)
+        self.cache = cache
+        self.write_behind: Optional[WriteBehind] = None
+        # concurrent reads of a cooldown share one query, its read-modify-write updates take turns
+        self._reads = SingleFlight()
+        self._locks = KeyLocks()
+
+        # accessors taking discord objects, built on first use so that discord is only imported when needed
+        self._accessors: Dict[str, Any] = {}
+
+        v = self._fmtr
+        key = f"bucket = {v} AND user_id = {v} AND scope_id = {v} AND command = {v}"
+        insert = "INSERT INTO {}(bucket, user_id, scope_id, command, guild_id, rate, count, expires_at, previous) " \
+                 "VALUES({})".format(self.table, ", ".join([v] * 9))
+
+        self._select_query = f"SELECT rate, count, expires_at, previous FROM {self.table} WHERE {key}"
+        self._state_query = f"SELECT count, previous, expires_at FROM {self.table} WHERE {key}"
+        # locks the row until the end of the transaction of `hit_many`, SQLite locks the whole file on the first write
+        self._lock_query = self._state_query + ("" if isinstance(db.config, SQlite) else " FOR UPDATE")
+        self._delete_query = f"DELETE FROM {self.table} WHERE {key}"
+        self._reset_query = f"UPDATE {self.table} SET count = {v} WHERE {key}"
+        if isinstance(db.config, MySQL):
+            self._upsert_query = insert + " ON DUPLICATE KEY UPDATE guild_id = VALUES(guild_id), " \
+                                          "rate = VALUES(rate), count = VALUES(count), " \
+                                          "expires_at = VALUES(expires_at), previous = VALUES(previous)"
+            self._insert_missing_query = insert.replace("INSERT INTO", "INSERT IGNORE INTO", 1)
+        else:
+            self._upsert_query = insert + " ON CONFLICT(bucket, user_id, scope_id, command) DO UPDATE SET " \
+                                          "guild_id = excluded.guild_id, rate = excluded.rate, " \
+                                          "count = excluded.count, expires_at = excluded.expires_at, " \
+                                          "previous = excluded.previous"
+            self._insert_missing_query = insert + " ON CONFLICT DO NOTHING"
+
+        # atomic check-and-increment of every strategy used by `hit`, the expiry/reset logic runs in the database
+        self._hit_queries: Dict[Strategy, Tuple[str, Callable[[Dict[str, Any]], Tuple[Any, ...]]]] = {
+            strategy: _bind(query, v, isinstance(db.config, PostgreSQL))
+            for strategy, query in self._hit_templates(db.config).items()
+        }
 
-        self.view = f"`{self._table_prefix}_guild`"
-
-    async def add_column(self, command_name: str) -> None:
-        try:
-            self._db.run("ALTER TABLE {} ADD `{}` LONGTEXT DEFAULT NULL".format(self.view, command_name))
-        except:
-            pass
-
-    async def add_user(self, user: discord.Member, guild: discord.Guild):
-        data = self._db.execute(
-            "SELECT * FROM {} WHERE user_id = {v} AND guild_id = {v}".format(self.view, v=self._fmtr),
-            (user.id, guild.id)
+    def _hit_templates(self, config: Any) -> Dict[Strategy, str]:
+        # the statements with `:name` markers for their values, see `_hit`
+        t = self.table
+        insert = f"INSERT INTO {t}(bucket, user_id, scope_id, command, guild_id, rate, count, expires_at, previous) " \
+                 f"VALUES(:bucket, :user_id, :scope_id, :command, :guild_id, :rate, :count, :expires_at, 0)"
+
+        if isinstance(config, MySQL):
+            # the first assignment still sees the old row, it stores 0 (allowed) or the current expiry/1 (denied)
+            # with LAST_INSERT_ID(expr) which the driver returns as `lastrowid`. A new row leaves it at 0.
+            current = "CASE WHEN expires_at - :window > :now THEN count ELSE 0 END"
+            previous = "CASE WHEN expires_at - :window > :now THEN previous " \
+                       "WHEN expires_at > :now THEN count ELSE 0 END"
+            arrival = "GREATEST(expires_at, :now) + :interval"
+            return {
+                Strategy.fixed_window: insert + (
+                    " ON DUPLICATE KEY UPDATE "
+                    "guild_id = VALUES(guild_id) + 0 * LAST_INSERT_ID(IF(expires_at < :now OR count < VALUES(rate), 0, "
+                    "expires_at)), "
+                    "count = IF(expires_at < :now, 1, IF(count < VALUES(rate), count + 1, count)), "
+                    "expires_at = IF(expires_at < :now, VALUES(expires_at), expires_at), "
+                    "rate = VALUES(rate)"
+                ),
+                Strategy.gcra: insert + (
+                    f" ON DUPLICATE KEY UPDATE "
+                    f"guild_id = VALUES(guild_id) + 0 * "
+                    f"LAST_INSERT_ID(IF({arrival} - :now <= :window, 0, expires_at)), "
+                    f"expires_at = IF({arrival} - :now <= :window, {arrival}, expires_at), "
+                    f"count = 0, previous = 0, rate = VALUES(rate)"
+                ),
+                # the later assignments read the decision back with LAST_INSERT_ID(), `previous` goes first since
+                # it needs the old count
+                Strategy.sliding_window: insert + (
+                    f" ON DUPLICATE KEY UPDATE "
+                    f"guild_id = VALUES(guild_id) + 0 * LAST_INSERT_ID(IF("
+                    f"({previous}) * :remaining + ({current} + 1) * :window <= :limit, 0, 1)), "
+                    f"previous = IF(LAST_INSERT_ID() = 0, {previous}, previous), "
+                    f"count = IF(LAST_INSERT_ID() = 0, {current} + 1, count), "
+                    f"expires_at = IF(LAST_INSERT_ID() = 0, VALUES(expires_at), expires_at), "
+                    f"rate = VALUES(rate)"
+                ),
+            }
+
+        # a denied use doesn't update the row, so nothing is returned
+        current = f"CASE WHEN {t}.expires_at - :window > :now THEN {t}.count ELSE 0 END"
+        previous = f"CASE WHEN {t}.expires_at - :window > :now THEN {t}.previous " \
+                   f"WHEN {t}.expires_at > :now THEN {t}.count ELSE 0 END"
+        arrival = "{}({}.expires_at, :now) + :interval".format(
+            "GREATEST" if isinstance(config, PostgreSQL) else "MAX", t
         )
-        if data is None:
-            self._db.run(
-                "INSERT INTO {}(user_id, guild_id) VALUES({v}, {v})".format(
-                    self.view, v=self._fmtr),
-                (user.id, guild.id)
-            )
+        upsert = insert + " ON CONFLICT(bucket, user_id, scope_id, command) DO UPDATE SET " \
+                          "guild_id = excluded.guild_id, rate = excluded.rate, "
+        queries = {
+            Strategy.fixed_window: upsert + (
+                f"count = CASE WHEN {t}.expires_at < :now THEN 1 ELSE {t}.count + 1 END, "
+                f"expires_at = CASE WHEN {t}.expires_at < :now THEN excluded.expires_at ELSE {t}.expires_at END "
+                f"WHERE {t}.expires_at < :now OR {t}.count < excluded.rate "
+                f"RETURNING expires_at"
+            ),
+            Strategy.gcra: upsert + (
+                f"count = 0, previous = 0, expires_at = {arrival} "
+                f"WHERE {arrival} - :now <= :window "
+                f"RETURNING expires_at"
+            ),
+            Strategy.sliding_window: upsert + (
+                f"count = {current} + 1, previous = {previous}, expires_at = excluded.expires_at "
+                f"WHERE ({previous}) * :remaining + ({current} + 1) * :window <= :limit "
+                f"RETURNING expires_at"
+            ),
+        }
+        if isinstance(config, PostgreSQL):
+            # read the state of a denied use in the same statement
+            key = "bucket = :bucket AND user_id = :user_id AND scope_id = :scope_id AND command = :command"
+            for strategy, query in queries.items():
+                queries[strategy] = f"WITH hit AS ({query}) " \
+                                    f"SELECT 1, 0, 0, expires_at FROM hit UNION ALL " \
+                                    f"SELECT 0, count, previous, expires_at FROM {t} " \
+                                    f"WHERE {key} AND NOT EXISTS (SELECT 1 FROM hit)"
+
+        return queries
+
+    def enable_write_behind(self, flush_interval: float = 1.0, max_pending: int = 1000) -> WriteBehind:
+        """
+        Keeps the updates in memory and writes them in batches, see :class:`WriteBehind`
 
-    async def get_cooldown(self, user: discord.Member, guild: discord.Guild, command_name: str) -> Optional[Options]:
-        data = self._db.execute(
-            "SELECT {} FROM {} WHERE user_id = {v} AND guild_id = {v}".format(command_name, self.view, v=self._fmtr),
-            (user.id, guild.id)
-        )
-        if data is None:
-            await self.add_user(user, guild)
-            return None
-        if data[0] is None:
-            return None
+        The checks are then decided in this process, so the cooldowns must not be shared with other processes.
 
-        options = json.loads(data[0])
-        return Options.from_dict(options)
+        :param flush_interval: seconds between two writes
+        :param max_pending: number of pending cooldowns which triggers a write
+        """
 
-    async def update_cooldown(
-        self, user: discord.Member, guild: discord.Guild, command_name: str, options: Options
-    ) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = {v} WHERE user_id = {v} AND guild_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (json.dumps(options.toJSON()), user.id, guild.id)
+        self.write_behind = WriteBehind(
+            self._db, self._upsert_query, self._delete_query, flush_interval=flush_interval, max_pending=max_pending
         )
+        return self.write_behind
 
-    async def remove_cooldown(self, user: discord.Member, guild: discord.Guild, command_name: str) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = NULL WHERE user_id = {v} AND guild_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (user.id, guild.id)
-        )
+    async def create_tables(self) -> None:
+        """
+        Creates the table which holds the cooldowns of all types: Bucket
 
-    async def reset_cooldown(self, user: discord.Member, guild: discord.Guild, command_name: str) -> None:
-        options = await self.get_cooldown(user, guild, command_name)
-        if options is None:
-            return
+        :return:
+        """
 
-        if options.count > 1:
-            options.count -= 1
-            await self.update_cooldown(user, guild, command_name, options)
+        columns = "bucket SMALLINT NOT NULL, user_id BIGINT NOT NULL, scope_id BIGINT NOT NULL, " \
+                  "command VARCHAR(100) NOT NULL, guild_id BIGINT NOT NULL DEFAULT 0, " \
+                  "rate INTEGER NOT NULL, count INTEGER NOT NULL, expires_at BIGINT NOT NULL, " \
+                  "previous INTEGER NOT NULL DEFAULT 0, " \
+                  "PRIMARY KEY (bucket, user_id, scope_id, command)"
+        index = f"{self.table}_expires_at"
+        # only written when a row is inserted, `user_id` never changes
+        user_index = f"{self.table}_user_id"
+
+        if isinstance(self._db.config, MySQL):
+            await self._db.run(
+                f"CREATE TABLE IF NOT EXISTS {self.table}({columns}, INDEX {index} (expires_at), "
+                f"INDEX {user_index} (user_id))"
+            )
+            # MySQL has no CREATE INDEX IF NOT EXISTS, for tables created before the index
+            exists = await self._db.execute(
+                f"SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                f"AND table_name = {self._fmtr} AND index_name = {self._fmtr} LIMIT 1",
+                (self.table, user_index)
+            )
+            if exists is None:
+                await self._db.run(f"CREATE INDEX {user_index} ON {self.table}(user_id)")
         else:
-            await self.remove_cooldown(user, guild, command_name)
+            suffix = " WITHOUT ROWID" if isinstance(self._db.config, SQlite) else ""
+            await self._db.run(f"CREATE TABLE IF NOT EXISTS {self.table}({columns}){suffix}")
+            await self._db.run(f"CREATE INDEX IF NOT EXISTS {index} ON {self.table}(expires_at)")
+            await self._db.run(f"CREATE INDEX IF NOT EXISTS {user_index} ON {self.table}(user_id)")
 
+        # tables created before the sliding window strategy
+        if "previous" not in await self._db.table_columns(self.table):
+            await self._db.run(f"ALTER TABLE {self.table} ADD COLUMN previous INTEGER NOT NULL DEFAULT 0")
 
-class _Channels:
-    def __init__(self, db: Database):
-        self._db = db
-        self._table_prefix = self._db.table_prefix
-        self._fmtr = self._db.fmtr
+    async def load_schema(self) -> None:
+        """
+        Looks for the wide tables of older versions, whose cooldowns are then moved over on their first read
+        """
+
+        await self.legacy.load_schema()
+
+    def to_millis(self, expires_at: datetime) -> int:
+        return (expires_at - self.timezone - _EPOCH) // _MILLISECOND
 
-        self.view = f"`{self._table_prefix}_channel`"
+    def from_millis(self, millis: int) -> datetime:
+        return _EPOCH + self.timezone + timedelta(milliseconds=millis)
 
-    async def add_column(self, command_name: str) -> None:
-        try:
-            self._db.run("ALTER TABLE {} ADD `{}` LONGTEXT DEFAULT NULL".format(self.view, command_name))
-        except:
-            pass
+    def _millis(self, value: Union[datetime, int]) -> int:
+        # the times are given in epoch milliseconds, or as datetimes in the timezone of the cooldowns
+        return self.to_millis(value) if isinstance(value, datetime) else value
 
-    async def add_user(self, user: discord.Member, channel: discord.TextChannel):
-        data = self._db.execute(
-            "SELECT * FROM {} WHERE user_id = {v} AND channel_id = {v}".format(self.view, v=self._fmtr),
-            (user.id, channel.id)
+    def _row(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str, options: Options, guild_id: int
+    ) -> Tuple[Any, ...]:
+        return (
+            type.value, user_id, scope_id, command_name, guild_id,
+            options.rate, options.count, options.to_millis(self.timezone), options.previous
         )
-        if data is None:
-            self._db.run(
-                "INSERT INTO {}(user_id, channel_id) VALUES({v}, {v})".format(
-                    self.view, v=self._fmtr),
-                (user.id, channel.id)
-            )
 
-    async def get_cooldown(
-        self, user: discord.Member, channel: discord.TextChannel, command_name: str
+    async def get(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> Optional[Options]:
+        return await self._get(type, user_id, scope_id, command_name)
+
+    async def _get(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str, guild_id: int = None
     ) -> Optional[Options]:
-        data = self._db.execute(
-            "SELECT {} FROM {} WHERE user_id = {v} AND channel_id = {v}".format(command_name, self.view, v=self._fmtr),
-            (user.id, channel.id)
+        # `guild_id` is the guild of a cooldown moved over from the legacy tables, known when it's checked
+        key = (type.value, user_id, scope_id, command_name)
+        if self.write_behind is not None:
+            pending, row = self.write_behind.lookup(key)
+            if pending:
+                if row is None:
+                    return None
+                return Options.from_millis(row[5], row[6], type, row[7], self.timezone, row[8])
+
+        if self.cache is not None:
+            options = self.cache.get(key, self.from_millis(self.clock.now()))
+            if options is not None:
+                return options
+
+        return await self._reads.do(
+            key, functools.partial(self._load, type, user_id, scope_id, command_name, guild_id)
         )
-        if data is None:
-            await self.add_user(user, channel)
-            return None
-        if data[0] is None:
-            return None
 
-        options = json.loads(data[0])
-        return Options.from_dict(options)
+    async def _load(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str, guild_id: int = None
+    ) -> Optional[Options]:
+        key = (type.value, user_id, scope_id, command_name)
+        data = await self._db.execute(self._select_query, key)
+        if data is not None:
+            options = Options.from_millis(data[0], data[1], type, data[2], self.timezone, data[3])
+        elif self.legacy.exists:
+            if guild_id is None:
+                # the legacy tables only store the guild of the guild cooldowns
+                guild_id = scope_id if type.value == Bucket.guild else 0
+            options = await self.legacy.take(
+                type, user_id, scope_id, command_name, self._insert_missing_query,
+                lambda options: self._row(type, user_id, scope_id, command_name, options, guild_id)
+            )
+        else:
+            options = None
+
+        # a cooldown removed or reset while it was read isn't cached with its old state
+        if options is not None and self.cache is not None and self._reads.is_current(key):
+            self.cache.put(key, options)
+        return options
 
-    async def update_cooldown(
-        self, user: discord.Member, channel: discord.TextChannel, command_name: str, options: Options
+    async def set(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str, options: Options, guild_id: int = 0
     ) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = {v} WHERE user_id = {v} AND channel_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (json.dumps(options.toJSON()), user.id, channel.id)
-        )
+        key = (type.value, user_id, scope_id, command_name)
+        row = self._row(type, user_id, scope_id, command_name, options, guild_id)
+        if self.write_behind is not None:
+            # never suspends, so that `_hit_local` checks and counts a use without other tasks in between
+            self.write_behind.upsert(key, row)
+        else:
+            await self._db.run(self._upsert_query, row)
 
-    async def remove_cooldown(self, user: discord.Member, channel: discord.TextChannel, command_name: str) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = NULL WHERE user_id = {v} AND channel_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (user.id, channel.id)
-        )
+        self._reads.forget(key)
+        if self.cache is not None:
+            self.cache.put(key, options)
 
-    async def reset_cooldown(self, user: discord.Member, channel: discord.TextChannel, command_name: str) -> None:
-        options = await self.get_cooldown(user, channel, command_name)
-        if options is None:
-            return
+    async def remove(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        key = (type.value, user_id, scope_id, command_name)
+        if self.legacy.exists:
+            # a cooldown which was never read is still in the legacy tables, and would be moved over again
+            await self.legacy.clear(type, user_id, scope_id, command_name)
 
-        if options.count > 1:
-            options.count -= 1
-            await self.update_cooldown(user, channel, command_name, options)
+        if self.write_behind is not None:
+            self.write_behind.delete(key)
         else:
-            await self.remove_cooldown(user, channel, command_name)
+            await self._db.run(self._delete_query, key)
+
+        self._reads.forget(key)
+        if self.cache is not None:
+            self.cache.pop(key)
+
+    async def reset(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        if self.write_behind is not None:
+            # the UPDATE below must not be overwritten by an older pending state
+            await self.write_behind.flush()
+
+        key = (type.value, user_id, scope_id, command_name)
+        async with self._locks(key):
+            if self.cache is not None:
+                # decremented from the stored count, never from a cached state another process has changed since
+                self.cache.pop(key)
+            options = await self.get(type, user_id, scope_id, command_name)
+            if options is None:
+                return
+
+            if options.count > 1:
+                options.count -= 1
+                await self._db.run(self._reset_query, (options.count,) + key)
+                self._reads.forget(key)
+                if self.cache is not None:
+                    self.cache.put(key, options)
+            else:
+                await self.remove(type, user_id, scope_id, command_name)
+
+    async def _remove_where(self, condition: str, values: Tuple[Any, ...]) -> int:
+        if self.write_behind is not None:
+            # the pending states would be written back after the DELETE
+            await self.write_behind.flush()
+
+        deleted = await self._db.run(f"DELETE FROM {self.table} WHERE {condition}", values, fetch="rowcount")
+        self._reads.clear()
+        if self.cache is not None:
+            self.cache.clear()
+        return deleted
+
+    async def remove_command(self, command_name: str, type: Bucket = None) -> int:
+        """
+        Removes the cooldowns of a command for every user, in one statement
 
+        :param command_name: name of the command
+        :param type: if given, only the cooldowns of this type are removed
+        :return: number of cooldowns removed
+        """
 
-class _Categories:
-    def __init__(self, db: Database):
-        self._db = db
-        self._table_prefix = self._db.table_prefix
-        self._fmtr = self._db.fmtr
+        if self.legacy.exists:
+            await self.legacy.remove_command(command_name, type)
 
-        self.view = f"`{self._table_prefix}_category`"
+        if type is None:
+            return await self._remove_where(f"command = {self._fmtr}", (command_name,))
+        return await self._remove_where(
+            f"command = {self._fmtr} AND bucket = {self._fmtr}", (command_name, type.value)
+        )
 
-    async def add_column(self, command_name: str) -> None:
-        try:
-            self._db.run("ALTER TABLE {} ADD `{}` LONGTEXT DEFAULT NULL".format(self.view, command_name))
-        except:
-            pass
+    async def remove_guild(self, guild_id: int) -> int:
+        """
+        Removes the guild, channel, category and role cooldowns of a guild, in one statement
 
-    async def add_user(self, user: discord.Member, category: discord.CategoryChannel):
-        data = self._db.execute(
-            "SELECT * FROM {} WHERE user_id = {v} AND category_id = {v}".format(self.view, v=self._fmtr),
-            (user.id, category.id)
-        )
-        if data is None:
-            self._db.run(
-                "INSERT INTO {}(user_id, category_id) VALUES({v}, {v})".format(
-                    self.view, v=self._fmtr),
-                (user.id, category.id)
-            )
+        The tables of older versions don't store the guild of a channel, category or role cooldown: until it's
+        checked again, one moved over by :func:`migrate_legacy` or by a read outside of a check isn't removed, nor
+        is one still in these tables.
 
-    async def get_cooldown(
-        self, user: discord.Member, category: discord.CategoryChannel, command_name: str
-    ) -> Optional[Options]:
-        data = self._db.execute(
-            "SELECT {} FROM {} WHERE user_id = {v} AND category_id = {v}".format(command_name, self.view, v=self._fmtr),
-            (user.id, category.id)
-        )
-        if data is None:
-            await self.add_user(user, category)
-            return None
-        if data[0] is None:
-            return None
+        :return: number of cooldowns removed
+        """
 
-        options = json.loads(data[0])
-        return Options.from_dict(options)
+        if self.legacy.exists:
+            await self.legacy.remove_guild(guild_id)
 
-    async def update_cooldown(
-        self, user: discord.Member, category: discord.CategoryChannel, command_name: str, options: Options
-    ) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = {v} WHERE user_id = {v} AND category_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (json.dumps(options.toJSON()), user.id, category.id)
-        )
+        return await self._remove_where(f"guild_id = {self._fmtr}", (guild_id,))
 
-    async def remove_cooldown(
-        self, user: discord.Member, category: discord.CategoryChannel, command_name: str
-    ) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = NULL WHERE user_id = {v} AND category_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (user.id, category.id)
-        )
+    async def remove_user(self, user_id: int) -> int:
+        """
+        Removes the cooldowns of a user for every command and type, in one statement using the `user_id` index
 
-    async def reset_cooldown(self, user: discord.Member, category: discord.CategoryChannel, command_name: str) -> None:
-        options = await self.get_cooldown(user, category, command_name)
-        if options is None:
-            return
+        :return: number of cooldowns removed
+        """
 
-        if options.count > 1:
-            options.count -= 1
-            await self.update_cooldown(user, category, command_name, options)
-        else:
-            await self.remove_cooldown(user, category, command_name)
+        if self.legacy.exists:
+            await self.legacy.remove_user(user_id)
 
+        return await self._remove_where(f"user_id = {self._fmtr}", (user_id,))
 
-class _Roles:
-    def __init__(self, db: Database):
-        self._db = db
-        self._table_prefix = self._db.table_prefix
-        self._fmtr = self._db.fmtr
+    async def rows(
+        self, batch_size: int = 1000, after: CacheKey = None
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        """
+        Yields the unexpired cooldowns as stored, in batches of `batch_size`, one query per batch ordered by the
+        primary key, so that neither the process nor the database holds more than a batch at a time
 
-        self.view = f"`{self._table_prefix}_role`"
+        :param batch_size: number of cooldowns per batch
+        :param after: if given, only the cooldowns whose key comes after it, to continue an interrupted read
+        :return: (bucket, user_id, scope_id, command, guild_id, rate, count, expires_at, previous) of every cooldown
+        """
 
-    async def add_column(self, command_name: str) -> None:
-        try:
-            self._db.run("ALTER TABLE {} ADD `{}` LONGTEXT DEFAULT NULL".format(self.view, command_name))
-        except:
-            pass
+        if self.write_behind is not None:
+            await self.write_behind.flush()
 
-    async def add_user(self, user: discord.Member, role: discord.Role):
-        data = self._db.execute(
-            "SELECT * FROM {} WHERE user_id = {v} AND role_id = {v}".format(self.view, v=self._fmtr),
-            (user.id, role.id)
-        )
-        if data is None:
-            self._db.run(
-                "INSERT INTO {}(user_id, role_id) VALUES({v}, {v})".format(
-                    self.view, v=self._fmtr),
-                (user.id, role.id)
+        now = self.clock.now()
+        v, columns = self._fmtr, "bucket, user_id, scope_id, command"
+        select = f"SELECT {columns}, guild_id, rate, count, expires_at, previous FROM {self.table} " \
+                 f"WHERE expires_at >= {v}"
+        order = f" ORDER BY {columns} LIMIT {int(batch_size)}"
+        after_ = f" AND ({columns}) > ({v}, {v}, {v}, {v})"
+
+        last_key = None if after is None else tuple(after)
+        while True:
+            if last_key is None:
+                rows = await self._db.execute(select + order, (now,), fetch="all")
+            else:
+                rows = await self._db.execute(select + after_ + order, (now,) + last_key, fetch="all")
+            if not rows:
+                return
+
+            yield [tuple(row) for row in rows]
+
+            last_key = tuple(rows[-1][:4])
+            if len(rows) < batch_size:
+                return
+
+    async def active(self, batch_size: int = 1000) -> AsyncIterator[List[Tuple[CacheKey, Options]]]:
+        """
+        Yields the unexpired cooldowns in batches of `batch_size`, see :meth:`rows`
+
+        :return: ((bucket, user_id, scope_id, command_name), options) of every cooldown
+        """
+
+        async for rows in self.rows(batch_size):
+            batch = []
+            for bucket, user_id, scope_id, command_name, _, rate, count, expires_at, previous in rows:
+                options = Options.from_millis(rate, count, Bucket(bucket), expires_at, self.timezone, previous)
+                batch.append(((bucket, user_id, scope_id, command_name), options))
+            yield batch
+
+    async def insert_rows(self, rows: List[Tuple[Any, ...]]) -> int:
+        """
+        Adds the cooldowns which are not stored yet, in one transaction: with `COPY` into a temporary table on
+        PostgreSQL with asyncpg, a single `executemany` otherwise (sent as multi-row INSERTs by the MySQL drivers)
+
+        :param rows: (bucket, user_id, scope_id, command, guild_id, rate, count, expires_at, previous), as
+            yielded by :meth:`rows`
+        :return: number of rows given
+        """
+
+        if not rows:
+            return 0
+
+        if isinstance(self._db.config, PostgreSQL) and self._db.is_native:
+            columns = "bucket, user_id, scope_id, command, guild_id, rate, count, expires_at, previous"
+            staging = f"{self.table}_import"
+            await self._db.copy_records(
+                staging, columns.split(", "), rows,
+                before=[f"CREATE TEMPORARY TABLE {staging} (LIKE {self.table} INCLUDING DEFAULTS) ON COMMIT DROP"],
+                after=[
+                    f"INSERT INTO {self.table}({columns}) SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING"
+                ]
             )
+        else:
+            await self._db.run_many(self._insert_missing_query, rows)
 
-    async def get_cooldown(
-        self, user: discord.Member, role: discord.Role, command_name: str
-    ) -> Optional[Options]:
-        data = self._db.execute(
-            "SELECT {} FROM {} WHERE user_id = {v} AND role_id = {v}".format(command_name, self.view, v=self._fmtr),
-            (user.id, role.id)
+        self._reads.clear()
+        if self.cache is not None:
+            self.cache.clear()
+        return len(rows)
+
+    async def user_cooldowns(self, user_id: int) -> List[Tuple[Bucket, int, str, Options]]:
+        """
+        Returns the unexpired cooldowns of a user, the first to expire first
+
+        :return: (type, scope_id, command_name, options) of every cooldown
+        """
+
+        if self.write_behind is not None:
+            await self.write_behind.flush()
+
+        now = self.clock.now()
+        rows = await self._db.execute(
+            f"SELECT bucket, scope_id, command, rate, count, expires_at, previous FROM {self.table} "
+            f"WHERE user_id = {self._fmtr} AND expires_at >= {self._fmtr} ORDER BY expires_at",
+            (user_id, now), fetch="all"
         )
-        if data is None:
-            await self.add_user(user, role)
-            return None
-        if data[0] is None:
+
+        cooldowns = []
+        for bucket, scope_id, command_name, rate, count, expires_at, previous in rows:
+            type = Bucket(bucket)
+            options = Options.from_millis(rate, count, type, expires_at, self.timezone, previous)
+            cooldowns.append((type, scope_id, command_name, options))
+        return cooldowns
+
+    async def hit(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str,
+        rate: int, expires_at: Union[datetime, int], guild_id: int = 0, now: Union[datetime, int] = None,
+        strategy: Strategy = Strategy.fixed_window
+    ) -> Tuple[bool, float]:
+        """
+        Counts one use of a command if its cooldown allows it
+
+        The read, the expiry check and the increment are done by a single `INSERT ... ON CONFLICT DO UPDATE`
+        (`ON DUPLICATE KEY UPDATE` on MySQL), so concurrent uses can't both pass on the same count. With a cache,
+        uses of a command which is known to be on cooldown are denied without querying the database. In write-behind
+        mode the use is checked and counted in memory, and only written by the next flush.
+
+        :param type: the type of cooldown
+        :param user_id: ID of the user
+        :param scope_id: ID of the guild/channel/category/role, 0 for user cooldowns
+        :param command_name: name of the command
+        :param rate: The number of times a command can be used before triggering a cooldown.
+        :param expires_at: The expiry of the cooldown if a new one is started, in epoch milliseconds (or a datetime
+            in the timezone of the cooldowns). `expires_at - now` is the window of the sliding window and GCRA
+            strategies.
+        :param guild_id: ID of the guild the scope belongs to
+        :param now: the current time in epoch milliseconds (or a datetime), read from :attr:`clock` if not given
+        :param strategy: the algorithm which limits the uses, see :class:`Strategy`
+        :return: whether the use is allowed and the seconds left on the cooldown if it's not, to the millisecond
+        """
+
+        key = (type.value, user_id, scope_id, command_name)
+        now_ms = self.clock.now() if now is None else self._millis(now)
+
+        fixed = strategy is Strategy.fixed_window
+        if self.cache is not None and fixed:
+            # only a full fixed window is known to deny every use until it expires
+            options = self.cache.get(key, self.from_millis(now_ms))
+            if options is not None and options.count >= rate:
+                return False, (options.to_millis(self.timezone) - now_ms) / 1000
+
+        if self.legacy.exists:
+            # moves a cooldown still in the legacy tables over first
+            await self._get(type, user_id, scope_id, command_name, guild_id)
+
+        if self.write_behind is not None:
+            retry = await self._hit_local(key, now_ms, rate, self._millis(expires_at), guild_id, strategy)
+        else:
+            retry = await self._hit(key, now_ms, rate, self._millis(expires_at), guild_id, strategy)
+            self._reads.forget(key)
+        if retry is None:
+            if self.cache is not None:
+                self.cache.pop(key)
+            return True, 0
+
+        if self.cache is not None:
+            self.cache.pop(key)
+            if fixed:
+                # caches the stored state, which denies the next uses without a query until it expires
+                await self.get(type, user_id, scope_id, command_name)
+        return False, (retry - now_ms) / 1000
+
+    async def _hit(
+        self, key: Tuple[int, int, int, str], now: int, rate: int, expires_at: int, guild_id: int,
+        strategy: Strategy = Strategy.fixed_window
+    ) -> Optional[int]:
+        # returns None if the use is allowed, else when it can be retried in epoch milliseconds
+        query, values = self._hit_queries[strategy]
+        params = {
+            "bucket": key[0], "user_id": key[1], "scope_id": key[2], "command": key[3],
+            "guild_id": guild_id, "rate": rate, "now": now, "count": 1, "expires_at": expires_at
+        }
+        window = expires_at - now
+        if strategy is Strategy.gcra:
+            interval = max(window // rate, 1)
+            params.update(window=window, interval=interval, count=0, expires_at=now + interval)
+        elif strategy is Strategy.sliding_window:
+            end = now - now % window + window
+            params.update(window=window, remaining=end - now, limit=rate * window, expires_at=end + window)
+        row = values(params)
+
+        if isinstance(self._db.config, MySQL):
+            # 0 if allowed, else the expiry (fixed window, GCRA) or 1 (sliding window)
+            denied = await self._db.run(query, row, fetch="lastrowid")
+            if not denied:
+                return None
+
+            if strategy is Strategy.sliding_window:
+                state = await self._db.execute(self._state_query, key)
+            else:
+                state = (rate, 0, denied)
+            return decide(strategy, state, now, rate, expires_at)[1] or now
+
+        if isinstance(self._db.config, PostgreSQL):
+            data = await self._db.run(query, row, fetch="one")
+            if data is None:
+                # the row was committed by a concurrent use after this statement took its snapshot
+                data = await self._db.run(query, row, fetch="one")
+            if data[0]:
+                return None
+            return decide(strategy, tuple(data[1:]), now, rate, expires_at)[1] or now
+
+        if _SQLITE_RETURNING:
+            if await self._db.run(query, row, fetch="one") is not None:
+                return None
+
+            state = await self._db.execute(self._state_query, key)
+            if state is None:
+                return now
+            return decide(strategy, tuple(state), now, rate, expires_at)[1] or now
+
+        # SQLite < 3.35 has no RETURNING
+        return await self._hit_local(key, now, rate, expires_at, guild_id, strategy)
+
+    async def _hit_local(
+        self, key: Tuple[int, int, int, str], now: int, rate: int, expires_at: int, guild_id: int,
+        strategy: Strategy = Strategy.fixed_window
+    ) -> Optional[int]:
+        # the same check as `_hit`, done in python. The uses of a key take turns, so none is lost in between
+        type = Bucket(key[0])
+        async with self._locks(key):
+            options = await self.get(type, *key[1:])
+
+            state = None
+            if options is not None:
+                state = (options.count, options.previous, options.to_millis(self.timezone))
+            new, retry = decide(strategy, state, now, rate, expires_at)
+            if new is None:
+                return retry
+
+            options = Options.from_millis(rate, new[0], type, new[2], self.timezone, new[1])
+            await self.set(type, *key[1:], options, guild_id)
             return None
 
-        options = json.loads(data[0])
-        return Options.from_dict(options)
+    async def hit_many(
+        self, limits: Sequence[Tuple[Bucket, int, int, str, int, Union[datetime, int], int]],
+        now: Union[datetime, int] = None, strategy: Strategy = Strategy.fixed_window
+    ) -> Tuple[bool, float]:
+        """
+        Counts one use against several cooldowns at once, e.g. of a user and of their guild, only if every one of
+        them allows it
+
+        The cooldowns are read, checked and written in one transaction (`SELECT ... FOR UPDATE` then an upsert,
+        `WATCH`/`MULTI` on Redis), so a use which is denied by one of them isn't counted by the others, and
+        concurrent uses can't both pass on the same counts.
+
+        :param limits: (type, user_id, scope_id, command_name, rate, expires_at, guild_id) of every cooldown, see
+            :meth:`hit`. Two limits can't have the same type, user, scope and command.
+        :param now: the current time in epoch milliseconds (or a datetime), read from :attr:`clock` if not given
+        :param strategy: the algorithm which limits the uses, see :class:`Strategy`
+        :return: whether the use is allowed and the longest seconds left on the cooldowns denying it if it's not
+        """
 
-    async def update_cooldown(
-        self, user: discord.Member, role: discord.Role, command_name: str, options: Options
-    ) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = {v} WHERE user_id = {v} AND role_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (json.dumps(options.toJSON()), user.id, role.id)
-        )
+        now_ms = self.clock.now() if now is None else self._millis(now)
 
-    async def remove_cooldown(self, user: discord.Member, role: discord.Role, command_name: str) -> None:
-        self._db.run(
-            "UPDATE {} SET `{}` = NULL WHERE user_id = {v} AND role_id = {v}".format(
-                self.view, command_name, v=self._fmtr),
-            (user.id, role.id)
+        # in the order of the keys, so that the uses take the locks in the same order
+        entries = sorted(
+            ((type.value, user_id, scope_id, command_name), rate, self._millis(expires_at), guild_id)
+            for type, user_id, scope_id, command_name, rate, expires_at, guild_id in limits
         )
+        if len({entry[0] for entry in entries}) < len(entries):
+            raise ValueError("Excepted a different cooldown for every limit, got the same one twice")
+        if not entries:
+            return True, 0
 
-    async def reset_cooldown(self, user: discord.Member, role: discord.Role, command_name: str) -> None:
-        options = await self.get_cooldown(user, role, command_name)
-        if options is None:
-            return
+        if self.legacy.exists:
+            for key, _, _, guild_id in entries:
+                await self._get(Bucket(key[0]), *key[1:], guild_id=guild_id)
 
-        if options.count > 1:
-            options.count -= 1
-            await self.update_cooldown(user, role, command_name, options)
+        if self.write_behind is not None:
+            retry = await self._hit_many_local(entries, now_ms, strategy)
         else:
-            await self.remove_cooldown(user, role, command_name)
+            retry = await self._hit_many(entries, now_ms, strategy)
+
+        for key, *_ in entries:
+            self._reads.forget(key)
+            if self.cache is not None:
+                self.cache.pop(key)
+        if retry is None:
+            return True, 0
+        return False, (retry - now_ms) / 1000
+
+    async def _hit_many(
+        self, entries: List[Tuple[CacheKey, int, int, int]], now: int, strategy: Strategy
+    ) -> Optional[int]:
+        # returns None if the use is allowed, else when it can be retried in epoch milliseconds. A missing cooldown
+        # is inserted as expired first, so that it's locked as well
+        def update(states: List[Any]) -> Tuple[List[Tuple[Any, ...]], Optional[int]]:
+            new, retry = decide_all(
+                strategy, [tuple(state) for state in states], now,
+                [(rate, expires_at) for _, rate, expires_at, _ in entries]
+            )
+            if new is None:
+                return [], retry
 
+            return [
+                key + (guild_id, rate, count, expires_at, previous)
+                for (key, rate, _, guild_id), (count, previous, expires_at) in zip(entries, new)
+            ], None
 
-def get_datetime(seconds: int | float = None, timezone: timedelta = None) -> datetime:
-    cur_time = datetime.utcnow()
-    if timezone is not None:
-        cur_time = cur_time + timezone
+        return await self._db.read_modify_write(
+            self._insert_missing_query, [key + (guild_id, rate, 0, 0, 0) for key, rate, _, guild_id in entries],
+            self._lock_query, [entry[0] for entry in entries], update, self._upsert_query
+        )
 
-    if seconds is None:
-        return cur_time.replace(microsecond=0)
+    async def _hit_many_local(
+        self, entries: List[Tuple[CacheKey, int, int, int]], now: int, strategy: Strategy
+    ) -> Optional[int]:
+        # the same check as `_hit_many`, done in python while holding the locks of every key
+        async with contextlib.AsyncExitStack() as stack:
+            for key, *_ in entries:
+                await stack.enter_async_context(self._locks(key))
+
+            states = []
+            for key, *_ in entries:
+                options = await self.get(Bucket(key[0]), *key[1:])
+                states.append(
+                    None if options is None else (options.count, options.previous, options.to_millis(self.timezone))
+                )
+            new, retry = decide_all(strategy, states, now, [(rate, expires_at) for _, rate, expires_at, _ in entries])
+            if new is None:
+                return retry
+
+            for (key, rate, _, guild_id), (count, previous, expires_at) in zip(entries, new):
+                type = Bucket(key[0])
+                options = Options.from_millis(rate, count, type, expires_at, self.timezone, previous)
+                await self.set(type, *key[1:], options, guild_id)
+            return None
 
-    return (cur_time + timedelta(seconds=seconds)).replace(microsecond=0)
+    async def insert_missing(
+        self, type: Bucket, cooldowns: Iterable[Tuple[int, int, str, Options]],
+        legacy_keys: List[Tuple[int, ...]] = None
+    ) -> int:
+        """
+        Adds the unexpired cooldowns which are not stored yet, in one transaction
 
+        :param type: the type of the cooldowns
+        :param cooldowns: (user_id, scope_id, command_name, options) of every cooldown
+        :param legacy_keys: the keys of the legacy rows the cooldowns are moved from, deleted in the same transaction
+        :return: number of unexpired cooldowns given
+        """
 
-class Cooldowns:
-    def __init__(self, db: Database):
-        self._db = db
-        self._table_prefix = self._db.table_prefix
-        self._fmtr = self._db.fmtr
+        now = self.from_millis(self.clock.now())
+        rows = [
+            self._row(type, user_id, scope_id, command_name, options, scope_id if type.value == Bucket.guild else 0)
+            for user_id, scope_id, command_name, options in cooldowns if options.expires_at > now
+        ]
+
+        if legacy_keys:
+            await self._db.read_modify_write(
+                self._insert_missing_query, rows, "", [], lambda states: (legacy_keys, None),
+                self.legacy.delete_query(type)
+            )
+        else:
+            await self._db.run_many(self._insert_missing_query, rows)
+        return len(rows)
 
-    def create_tables(self) -> None:
+    async def delete_expired(self, batch_size: int = 1000) -> int:
         """
-        Creates required tables for cooldown of all types: BucketType
+        Deletes up to `batch_size` expired cooldowns in one statement, using the `expires_at` index
 
-        :return:
+        :return: number of cooldowns deleted
         """
 
-        # User type cooldown
-        self._db.run(
-            "CREATE TABLE IF NOT EXISTS {}(user_id BIGINT NOT NULL)".format(
-                f"`{self._table_prefix}_user`")
-        )
+        now = self.clock.now()
+        if isinstance(self._db.config, MySQL):
+            query = f"DELETE FROM {self.table} WHERE expires_at < {self._fmtr} LIMIT {int(batch_size)}"
+        else:
+            columns = "bucket, user_id, scope_id, command"
+            query = f"DELETE FROM {self.table} WHERE ({columns}) IN (" \
+                    f"SELECT {columns} FROM {self.table} WHERE expires_at < {self._fmtr} LIMIT {int(batch_size)})"
 
-        # Guild type cooldown
-        self._db.run(
-            "CREATE TABLE IF NOT EXISTS {}(user_id BIGINT NOT NULL, guild_id BIGINT NOT NULL)".format(
-                f"`{self._table_prefix}_guild`")
-        )
+        return await self._db.run(query, (now,), fetch="rowcount")
 
-        # Channel type cooldown
-        self._db.run(
-            "CREATE TABLE IF NOT EXISTS {}(user_id BIGINT NOT NULL, channel_id BIGINT NOT NULL)".format(
-                f"`{self._table_prefix}_channel`")
-        )
+    async def optimize(self) -> None:
+        """
+        Gives the free space back and refreshes the statistics of the table:
+        `VACUUM` and `ANALYZE` on SQlite, `OPTIMIZE TABLE` on MySQL and `ANALYZE` on PostgreSQL (where autovacuum
+        already reclaims the space)
+        """
 
-        # Category type cooldown
-        self._db.run(
-            "CREATE TABLE IF NOT EXISTS {}(user_id BIGINT NOT NULL, category_id BIGINT NOT NULL)".format(
-                f"`{self._table_prefix}_category`")
-        )
+        if isinstance(self._db.config, MySQL):
+            await self._db.run(f"OPTIMIZE TABLE {self.table}", fetch="all")
+        elif isinstance(self._db.config, PostgreSQL):
+            await self._db.run(f"ANALYZE {self.table}")
+        else:
+            await self._db.run("VACUUM")
+            await self._db.run(f"ANALYZE {self.table}")
 
-        # Role type cooldown
-        self._db.run(
-            "CREATE TABLE IF NOT EXISTS {}(user_id BIGINT NOT NULL, role_id BIGINT NOT NULL)".format(
-                f"`{self._table_prefix}_role`")
-        )
+    def _accessor(self, name: str) -> Any:
+        accessor = self._accessors.get(name)
+        if accessor is None:
+            from discord_cooldown.ext import accessors
+
+            accessor = self._accessors[name] = accessors.ACCESSORS[name](self)
+        return accessor
 
     @property
-    def users(self) -> _Users:
-        return _Users(self._db)
+    def users(self) -> "_Users":
+        return self._accessor("users")
 
     @property
-    def guilds(self) -> _Guilds:
-        return _Guilds(self._db)
+    def guilds(self) -> "_Guilds":
+        return self._accessor("guilds")
 
     @property
-    def channels(self) -> _Channels:
-        return _Channels(self._db)
+    def channels(self) -> "_Channels":
+        return self._accessor("channels")
 
     @property
-    def categories(self) -> _Categories:
-        return _Categories(self._db)
+    def categories(self) -> "_Categories":
+        return self._accessor("categories")
 
     @property
-    def roles(self) -> _Roles:
-        return _Roles(self._db)
+    def roles(self) -> "_Roles":
+        return self._accessor("roles")
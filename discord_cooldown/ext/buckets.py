@@ -0,0 +1,18 @@
+from enum import IntEnum
+
+__all__ = [
+    "Bucket"
+]
+
+
+class Bucket(IntEnum):
+    """
+    The types of cooldown, with the values of :class:`discord.ext.commands.BucketType`, which is accepted
+    wherever a Bucket is
+    """
+
+    user = 1
+    guild = 2
+    channel = 3
+    category = 5
+    role = 6
@@ -0,0 +1,105 @@
+import heapq
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from discord_cooldown.ext.base import Options
+
+__all__ = [
+    "CacheKey",
+    "CooldownCache"
+]
+
+# (bucket, user_id, scope_id, command_name)
+CacheKey = Tuple[int, int, int, str]
+
+
+class CooldownCache:
+    def __init__(self, max_entries: int = 10000):
+        """
+        A bounded LRU cache of cooldowns, entries are dropped as soon as their cooldown expires
+
+        Only used by a single process, a cooldown changed by another process is seen once it expires here.
+
+        :param max_entries: maximum number of cooldowns kept in memory
+        """
+
+        if max_entries < 1:
+            raise ValueError(f"Excepted max_entries >= 1, got {max_entries} instead")
+
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Options]" = OrderedDict()
+        self._expiries: List[Tuple[datetime, CacheKey]] = []  # heap, may hold outdated expiries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def _expire(self, now: datetime) -> None:
+        while self._expiries and self._expiries[0][0] < now:
+            expires_at, key = heapq.heappop(self._expiries)
+            options = self._entries.get(key)
+            if options is not None and options.expires_at == expires_at:
+                del self._entries[key]
+                self.expirations += 1
+
+    def get(self, key: CacheKey, now: datetime) -> Optional["Options"]:
+        """
+        Returns the cached cooldown, or None if it's not cached or has expired
+
+        :param key: (bucket, user_id, scope_id, command_name)
+        :param now: the current time, in the timezone of the cooldowns
+        """
+
+        self._expire(now)
+
+        options = self._entries.get(key)
+        if options is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return options
+
+    def put(self, key: CacheKey, options: "Options") -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        self._entries[key] = options
+        heapq.heappush(self._expiries, (options.expires_at, key))
+
+        if len(self._expiries) > 2 * self.max_entries:
+            # drop the outdated expiries of updated or evicted entries
+            self._expiries = [(entry.expires_at, key) for key, entry in self._entries.items()]
+            heapq.heapify(self._expiries)
+
+    def pop(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expiries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        hits, misses, evictions (LRU), expirations and current size of the cache
+        """
+
+        return {
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "expirations": self.expirations, "size": len(self._entries),
+        }
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from typing import Optional
+
+__all__ = [
+    "Clock",
+    "FakeClock"
+]
+
+
+class Clock:
+    def __init__(self, sync_interval: Optional[float] = 60.0):
+        """
+        The time of the cooldowns, in integer UTC epoch milliseconds
+
+        It's the wall clock moved forward by the monotonic clock, so a step of the system time (e.g. by NTP) doesn't
+        shorten or lengthen the cooldowns of a running bot right away. The monotonic clock drifts from the wall clock
+        though, so the processes sharing a database would drift apart: the wall clock is read again every
+        `sync_interval` seconds. The time never goes back, after a step back of the wall clock it stands still until
+        the wall clock has caught up.
+
+        :param sync_interval: seconds between two reads of the wall clock, None to only read it once, e.g. in a
+            single process which should ignore every change of the system time
+        """
+
+        if sync_interval is not None and sync_interval <= 0:
+            raise ValueError(f"Excepted sync_interval > 0, got {sync_interval} instead")
+
+        self.sync_interval = sync_interval
+        self._interval = None if sync_interval is None else int(sync_interval * 1_000_000_000)
+        self._synced = time.monotonic_ns()
+        self._offset = time.time_ns() - self._synced
+        self._last = 0
+
+    def now(self) -> int:
+        monotonic = time.monotonic_ns()
+        if self._interval is not None and monotonic - self._synced >= self._interval:
+            self._synced = monotonic
+            self._offset = time.time_ns() - monotonic
+
+        self._last = max(self._last, (monotonic + self._offset) // 1_000_000)
+        return self._last
+
+
+class FakeClock(Clock):
+    def __init__(self, start: Optional[int] = None):
+        """
+        A clock which only moves when told to, so that tests and load simulations run through hours of cooldowns
+        without waiting for them
+
+        Redis deletes the expired keys by its own clock, so with :class:`Redis` it must not be behind the time of
+        the server.
+
+        :param start: the time to start at in UTC epoch milliseconds, by default the current time
+        """
+
+        super().__init__()
+        self.millis = time.time_ns() // 1_000_000 if start is None else start
+
+    def now(self) -> int:
+        return self.millis
+
+    def advance(self, seconds: float = 0, milliseconds: int = 0) -> int:
+        """
+        Moves the time forward
+
+        :param seconds: seconds to add, rounded to the millisecond
+        :param milliseconds: milliseconds to add
+        :return: the new time
+        """
+
+        if seconds < 0 or milliseconds < 0:
+            raise ValueError(f"Excepted seconds and milliseconds >= 0, got {seconds} and {milliseconds} instead")
+
+        self.millis += round(seconds * 1000) + milliseconds
+        return self.millis
+
+    async def sleep(self, seconds: float) -> None:
+        """
+        :meth:`advance` in place of :func:`asyncio.sleep`, which still lets the other tasks run
+        """
+
+        self.advance(seconds)
+        await asyncio.sleep(0)
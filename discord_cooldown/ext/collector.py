@@ -0,0 +1,130 @@
+from discord_cooldown.ext.buckets import Bucket
+
+import asyncio
+import logging
+import time
+
+from typing import Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from discord_cooldown.ext.base import Cooldowns
+
+__all__ = [
+    "ExpiryCollector"
+]
+
+_log = logging.getLogger(__name__)
+
+_LEGACY_TYPES = tuple(Bucket)
+
+
+class ExpiryCollector:
+    def __init__(
+        self, cooldowns: "Cooldowns", interval: float = 300.0, batch_size: int = 1000,
+        max_batches: int = 100, optimize_every: int = 12
+    ):
+        """
+        Deletes the expired cooldowns in the background
+
+        Every `interval` seconds, expired cooldowns are deleted `batch_size` at a time (at most `max_batches` batches,
+        the rest is left for the next run) and the expired cells of the legacy tables are cleared, their rows are
+        deleted once no cooldown is left. Every `optimize_every` runs, :meth:`Cooldowns.optimize` gives the space back.
+
+        :param cooldowns: the cooldowns to clean
+        :param interval: seconds between two runs
+        :param batch_size: number of cooldowns deleted per statement
+        :param max_batches: maximum number of batches per run
+        :param optimize_every: number of runs between two optimizations, 0 to never optimize
+        """
+
+        if interval <= 0:
+            raise ValueError(f"Excepted interval > 0, got {interval} instead")
+        if batch_size < 1 or max_batches < 1:
+            raise ValueError(f"Excepted batch_size >= 1 and max_batches >= 1, got {batch_size}, {max_batches} instead")
+
+        self._cd = cooldowns
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.optimize_every = optimize_every
+
+        self.runs = 0
+        self.totals: Dict[str, int] = {"deleted": 0, "cleared": 0, "rows_deleted": 0, "optimized": 0}
+        self.last_report: Optional[Dict[str, float]] = None
+
+        self._task: Optional[asyncio.Task] = None
+
+    async def collect(self) -> Dict[str, float]:
+        """
+        Runs one collection
+
+        :return: the number of expired cooldowns `deleted`, of legacy cells `cleared` and legacy rows
+            `rows_deleted`, whether the table was `optimized` and the `seconds` it took
+        """
+
+        started = time.perf_counter()
+
+        deleted = 0
+        for _ in range(self.max_batches):
+            count = await self._cd.delete_expired(self.batch_size)
+            deleted += max(count, 0)
+            if count < self.batch_size:
+                break
+            # let the checks run between two batches
+            await asyncio.sleep(0)
+
+        cleared = rows_deleted = 0
+        if self._cd.legacy.exists:
+            now = self._cd.from_millis(self._cd.clock.now())
+            for type in _LEGACY_TYPES:
+                cells, rows = await self._cd.legacy.collect(type, now, self.batch_size)
+                cleared += cells
+                rows_deleted += rows
+
+        self.runs += 1
+        optimized = self.optimize_every > 0 and self.runs % self.optimize_every == 0
+        if optimized:
+            await self._cd.optimize()
+
+        report = {
+            "deleted": deleted, "cleared": cleared, "rows_deleted": rows_deleted, "optimized": int(optimized),
+            "seconds": time.perf_counter() - started,
+        }
+        for name in self.totals:
+            self.totals[name] += report[name]
+
+        self.last_report = report
+        _log.info(
+            "deleted %d expired cooldowns, cleared %d legacy cells and %d legacy rows in %.3fs%s",
+            deleted, cleared, rows_deleted, report["seconds"], " (optimized)" if optimized else ""
+        )
+        return report
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.collect()
+            except Exception:
+                _log.exception("failed to delete the expired cooldowns, retrying later")
+
+    def start(self) -> None:
+        """
+        starts collecting every `interval` seconds
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """
+        stops the collection, a run in progress is cancelled
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
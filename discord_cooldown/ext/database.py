@@ -1,9 +1,18 @@
+from discord_cooldown.ext.statements import StatementCache
 from discord_cooldown.modules import *
 
-from typing import Tuple, Any, Union, List, TypeVar
+import asyncio
+import importlib
+import time
+
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Tuple, Any, Callable, Dict, Union, List, Optional, Iterable, AsyncIterator, Sequence, Set, TypeVar
 
 __all__ = [
-    "Database"
+    "Database",
+    "AsyncDatabase",
+    "PoolTimeout"
 ]
 
 _RowSet = Tuple[Any, ...]
@@ -16,31 +25,90 @@ ResultSet = Union[RowSet, MultiRowSet]
 
 
 class Database:
-    def __init__(self, config: _Configs):
+    def __init__(self, config: _Configs, statement_cache_size: int = 128, counters: Counter = None):
+        """
+        blocking database engine
+
+        Statements with values are prepared once per connection and reused: server-side (`PREPARE`) on PostgreSQL, a
+        prepared cursor per statement on MySQL and the statement cache of sqlite3 on SQlite, all on a reused cursor.
+
+        :param config: the database config which you want to use
+        :param statement_cache_size: maximum number of statements kept prepared
+        :param counters: statement cache counters, shared by the connections of a pool
+        """
+
         self.config: _Configs = config
         self.conn = None
 
         self.fmtr: str = self.config.fmtr
         self.table_prefix = self.config.table_prefix
 
+        self.statements = StatementCache(statement_cache_size, counters, on_evict=self._free_statement)
+        self._cursor = None
+        self._prepared = 0
+
     def connect(self) -> None:
         if isinstance(self.config, PostgreSQL):
             import psycopg2
 
             self.conn = psycopg2.connect(**self.config.kwargs)
+            self._cursor = self.conn.cursor()
         elif isinstance(self.config, MySQL):
             import mysql.connector as mysql
 
             self.conn = mysql.connect(**self.config.kwargs)
+            self._cursor = self.conn.cursor(buffered=True)
         else:
             import sqlite3
 
-            self.conn = sqlite3.connect(**self.config.kwargs)
+            self.conn = sqlite3.connect(**self.config.kwargs, cached_statements=self.statements.max_size)
+            self._cursor = self.conn.cursor()
+            for pragma in self.config.pragmas:
+                self.retry_locked(self._execute, pragma, (), "all")
+
+        # the statements prepared on a previous connection are gone
+        self.statements.clear()
 
     @property
     def is_connected(self) -> bool:
         return self.conn is not None
 
+    def _statement(self, query: str, prepare: bool) -> Tuple[Any, str]:
+        # the cursor to run a query on and the query to send to it
+        if not prepare:
+            if isinstance(self.config, PostgreSQL):
+                # quoted like the prepared statements, e.g. the legacy table statements which have no values
+                query = _postgres_query(query)
+            return self._cursor, query
+
+        cached, statement = self.statements.lookup(query)
+        if isinstance(self.config, PostgreSQL):
+            if not cached:
+                statement = f"discord_cooldown_{self._prepared}"
+                self._prepared += 1
+                self._cursor.execute(f"PREPARE {statement} AS {_asyncpg_query(query)}")
+                self.statements.add(query, statement)
+
+            return self._cursor, f"EXECUTE {statement} ({', '.join(['%s'] * query.count('%s'))})"
+
+        if isinstance(self.config, MySQL):
+            if not cached:
+                statement = self.conn.cursor(prepared=True)
+                self.statements.add(query, statement)
+
+            return statement, query
+
+        # sqlite3 compiles the query once and finds it again in its own cache
+        if not cached:
+            self.statements.add(query)
+        return self._cursor, query
+
+    def _free_statement(self, query: str, statement: Any) -> None:
+        if isinstance(self.config, PostgreSQL):
+            self._cursor.execute(f"DEALLOCATE {statement}")
+        elif isinstance(self.config, MySQL):
+            statement.close()
+
     @staticmethod
     def _fetch(cursor, mode: str) -> ResultSet:
         if mode == "one":
@@ -49,25 +117,601 @@ class Database:
             return cursor.fetchmany()
         if mode == "all":
             return cursor.fetchall()
+        if mode == "lastrowid":
+            return cursor.lastrowid
+        if mode == "rowcount":
+            return cursor.rowcount
 
         return None
 
+    def _execute(self, query: str, values: Any, fetch: Optional[str], many: bool = False) -> ResultSet:
+        """
+        runs a query (or `executemany` if `many`) without committing it
+        """
+
+        cursor, query = self._statement(query, many or bool(values))
+        if many:
+            cursor.executemany(query, values)
+            return None
+
+        cursor.execute(query, values)
+        data = self._fetch(cursor, fetch)
+        if cursor is not self._cursor and cursor.with_rows:
+            # a prepared MySQL cursor must be drained before it runs again
+            cursor.fetchall()
+
+        return data
+
+    def _commit(self, query: str, values: Any, fetch: Optional[str], many: bool = False) -> ResultSet:
+        data = self._execute(query, values, fetch, many)
+
+        self.conn.commit()
+        return data
+
+    def retry_locked(self, method: Callable[..., Any], *args: Any) -> Any:
+        """
+        calls `method` (a statement and its commit) again while another SQlite connection holds the lock, waiting
+        `lock_backoff` seconds before the first retry and twice as long before every next one
+        """
+
+        retries = self.config.lock_retries if isinstance(self.config, SQlite) else 0
+        for attempt in range(retries + 1):
+            try:
+                return method(*args)
+            except Exception as exc:
+                if attempt == retries or not _is_locked(exc):
+                    raise
+
+                self.conn.rollback()
+            time.sleep(self.config.lock_backoff * 2 ** attempt)
+
     def execute(
         self, query: str, values: Tuple[Any, ...] = (),
         *, fetch: str = "one",
     ) -> ResultSet:
-        cursor = self.conn.cursor()
+        return self.retry_locked(self._execute, query, values, fetch)
 
-        cursor.execute(query, values)
-        data = self._fetch(cursor, fetch)
+    def run(self, query: str, values: Tuple[Any, ...] = (), *, fetch: str = None) -> ResultSet:
+        return self.retry_locked(self._commit, query, values, fetch)
 
-        cursor.close()
-        return data
+    def run_many(self, query: str, values: Iterable[Tuple[Any, ...]]) -> None:
+        self.retry_locked(self._commit, query, list(values), None, True)
 
-    def run(self, query: str, values: Tuple[Any, ...] = ()) -> None:
-        cursor = self.conn.cursor()
+    def _read_modify_write(
+        self, insert_query: str, rows: List[Tuple[Any, ...]], select_query: str, keys: List[Tuple[Any, ...]],
+        update: Callable[[List[RowSet]], Tuple[List[Tuple[Any, ...]], Any]], write_query: str
+    ) -> Any:
+        """
+        runs a :meth:`AsyncDatabase.read_modify_write` without committing it
+        """
+
+        self._execute(insert_query, rows, None, True)
+        states = [self._execute(select_query, key, "one") for key in keys]
+        writes, result = update(states)
+        if writes:
+            self._execute(write_query, writes, None, True)
+
+        return result
+
+    def _commit_read_modify_write(self, *args: Any) -> Any:
+        result = self._read_modify_write(*args)
 
-        cursor.execute(query, values)
         self.conn.commit()
+        return result
+
+    def read_modify_write(
+        self, insert_query: str, rows: List[Tuple[Any, ...]], select_query: str, keys: List[Tuple[Any, ...]],
+        update: Callable[[List[RowSet]], Tuple[List[Tuple[Any, ...]], Any]], write_query: str
+    ) -> Any:
+        return self.retry_locked(self._commit_read_modify_write, insert_query, rows, select_query, keys, update,
+                                 write_query)
 
-        cursor.close()
+    def ping(self) -> bool:
+        """
+        checks whether the connection is still usable
+        """
+
+        if self.conn is None:
+            return False
+
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            self.conn.commit()
+        except Exception:
+            return False
+
+        return True
+
+    def reconnect(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            self.conn = None
+
+        self.connect()
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+            self._cursor = None
+            self.statements.clear()
+
+
+class PoolTimeout(Exception):
+    """
+    raised when no connection could be acquired within `acquire_timeout`
+    """
+
+
+_DISCONNECT_CODES = {2006, 2013, 2055}  # MySQL: server has gone away / lost connection
+
+
+def _is_disconnect(exc: BaseException) -> bool:
+    """
+    tells whether an error raised by a driver means that the connection itself is broken
+    """
+
+    if isinstance(exc, (ConnectionError, BrokenPipeError)):
+        return True
+
+    name = type(exc).__name__
+    if name in ("ConnectionDoesNotExistError", "PostgresConnectionError", "ConnectionFailureError"):
+        return True
+    if name in ("OperationalError", "InterfaceError") and exc.args:
+        return exc.args[0] in _DISCONNECT_CODES or "closed" in str(exc.args[0])
+
+    return False
+
+
+def _is_locked(exc: BaseException) -> bool:
+    """
+    tells whether an error raised by sqlite3 means that another connection holds the lock of the file
+    """
+
+    if type(exc).__name__ != "OperationalError" or not exc.args or not isinstance(exc.args[0], str):
+        return False
+
+    return "database is locked" in exc.args[0] or "database is busy" in exc.args[0]
+
+
+def _postgres_query(query: str) -> str:
+    """
+    rewrites the backtick quoted identifiers of a query into the double quotes used by PostgreSQL
+    """
+
+    return query.replace("`", '"')
+
+
+def _asyncpg_query(query: str) -> str:
+    """
+    rewrites a `%s` / backtick query into the `$n` / double-quote syntax used by asyncpg
+    """
+
+    query = _postgres_query(query)
+    parts = query.split("%s")
+
+    return "".join(
+        part if i == len(parts) - 1 else f"{part}${i + 1}" for i, part in enumerate(parts)
+    )
+
+
+class AsyncDatabase:
+    def __init__(
+        self, config: _Configs, use_native: bool = True, threaded: bool = True, statement_cache_size: int = 128
+    ):
+        """
+        asyncio database engine
+
+        The driver is chosen by the config: `aiosqlite` for SQlite, `aiomysql` for MySQL and `asyncpg` for PostgreSQL.
+        When the driver isn't installed (or `use_native` is False) the blocking drivers are run on a
+        :class:`DatabaseWorker` thread, or inline through :class:`Database` if `threaded` is False.
+
+        Statements are kept prepared by asyncpg (per connection) and sqlite3 (on one reused cursor), aiomysql has no
+        server-side prepare, see :attr:`statement_stats`.
+
+        :param config: the database config which you want to use
+        :param use_native: if False, always use the blocking drivers
+        :param threaded: if False, the blocking drivers run on the event loop itself
+        :param statement_cache_size: maximum number of statements kept prepared per connection
+        """
+
+        self.config: _Configs = config
+        self.conn = None
+        self.use_native = use_native
+        self.threaded = threaded
+
+        self.fmtr: str = self.config.fmtr
+        self.table_prefix = self.config.table_prefix
+
+        self.pool = None
+
+        self._driver: Optional[str] = None
+        self._sync: Optional[Database] = None
+        self._worker = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._cursor = None
+
+        self.statement_cache_size = statement_cache_size
+        self.statements = StatementCache(statement_cache_size)
+
+    @staticmethod
+    def _find_driver(config: _Configs) -> Optional[str]:
+        if isinstance(config, PostgreSQL):
+            name = "asyncpg"
+        elif isinstance(config, MySQL):
+            name = "aiomysql"
+        else:
+            name = "aiosqlite"
+
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            return None
+
+        return name
+
+    async def connect(self) -> None:
+        driver = self._find_driver(self.config) if self.use_native else None
+        if driver is None and self.threaded:
+            from discord_cooldown.ext.worker import DatabaseWorker
+
+            self._worker = DatabaseWorker(self.config, statement_cache_size=self.statement_cache_size)
+            await self._worker.start()
+            return
+        if driver is None:
+            self._sync = Database(self.config, self.statement_cache_size)
+            self._sync.connect()
+            return
+
+        # the driver pools close connections idle for longer than `ping_interval` and re-open them on demand,
+        # a connection dropped by the server while in use is retried once on a fresh one
+        self._driver = driver
+        if driver == "asyncpg":
+            import asyncpg
+
+            self.pool = await asyncpg.create_pool(
+                host=self.config.db_host, port=self.config.db_port, database=self.config.db_name,
+                user=self.config.db_user, password=self.config.db_passwd,
+                min_size=self.config.min_size, max_size=self.config.max_size,
+                max_inactive_connection_lifetime=self.config.ping_interval,
+                statement_cache_size=self.statement_cache_size
+            )
+        elif driver == "aiomysql":
+            import aiomysql
+
+            self.pool = await aiomysql.create_pool(
+                host=self.config.db_host, port=self.config.db_port, db=self.config.db_name,
+                user=self.config.db_user, password=self.config.db_passwd,
+                minsize=self.config.min_size, maxsize=self.config.max_size,
+                pool_recycle=int(self.config.ping_interval)
+            )
+        else:
+            import aiosqlite
+
+            # statements of concurrent tasks must not interleave with a commit on the single connection
+            self._lock = asyncio.Lock()
+            self.conn = await aiosqlite.connect(**self.config.kwargs, cached_statements=self.statement_cache_size)
+            self._cursor = await self.conn.cursor()
+            for pragma in self.config.pragmas:
+                await self._local(pragma, (), "all")
+
+    @property
+    def is_connected(self) -> bool:
+        return any(x is not None for x in (self.conn, self.pool, self._sync, self._worker))
+
+    @property
+    def is_native(self) -> bool:
+        """
+        True if a native asyncio driver is being used
+        """
+
+        return self._driver is not None
+
+    @property
+    def statement_stats(self) -> Dict[str, int]:
+        """
+        hits, misses and evictions of the prepared statement caches
+        """
+
+        if self._worker is not None:
+            return self._worker.pool.statement_stats
+        if self._sync is not None:
+            return self._sync.statements.stats
+
+        return self.statements.stats
+
+    def _count_statement(self, query: str, values: Any) -> None:
+        # asyncpg and sqlite3 prepare the statements themselves, by query text
+        if values and self._driver != "aiomysql" and not self.statements.lookup(query)[0]:
+            self.statements.add(query)
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[Any]:
+        try:
+            conn = await asyncio.wait_for(self.pool.acquire(), self.config.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(f"no connection was available within {self.config.acquire_timeout} seconds") from None
+
+        discard = False
+        try:
+            yield conn
+        except BaseException as exc:
+            discard = _is_disconnect(exc)
+            raise
+        finally:
+            if discard and self._driver == "aiomysql":
+                conn.close()
+            await self.pool.release(conn)
+
+    async def _pooled(self, query: str, values: Tuple[Any, ...], fetch: Optional[str]) -> ResultSet:
+        for attempt in range(2):
+            try:
+                async with self._acquire() as conn:
+                    if self._driver == "asyncpg":
+                        query_ = _asyncpg_query(query)
+                        self._count_statement(query_, values)
+                        if fetch == "one":
+                            return await conn.fetchrow(query_, *values)
+                        if fetch in ("many", "all"):
+                            return await conn.fetch(query_, *values)
+
+                        status = await conn.execute(query_, *values)
+                        if fetch == "rowcount":
+                            # e.g. `DELETE 42`
+                            count = status.rsplit(" ", 1)[-1]
+                            return int(count) if count.isdigit() else -1
+                        return None
+
+                    async with conn.cursor() as cursor:
+                        await cursor.execute(query, values)
+                        data = await self._fetch(cursor, fetch)
+                    await conn.commit()
+                    return data
+            except Exception as exc:
+                # retry once on a fresh connection if the server dropped this one
+                if attempt or not _is_disconnect(exc):
+                    raise
+
+    async def execute(
+        self, query: str, values: Tuple[Any, ...] = (),
+        *, fetch: str = "one",
+    ) -> ResultSet:
+        if self._worker is not None:
+            return await self._worker.execute(query, values, fetch=fetch)
+        if self._sync is not None:
+            return self._sync.execute(query, values, fetch=fetch)
+        if self.pool is not None:
+            return await self._pooled(query, values, fetch)
+
+        return await self._local(query, values, fetch)
+
+    async def _local(
+        self, query: str, values: Any, fetch: Optional[str], commit: bool = False, many: bool = False
+    ) -> ResultSet:
+        # runs a query on the single aiosqlite connection, again while another process holds the lock of the file
+        for attempt in range(self.config.lock_retries + 1):
+            async with self._lock:
+                try:
+                    self._count_statement(query, values)
+                    if many:
+                        await self._cursor.executemany(query, values)
+                        data = None
+                    else:
+                        await self._cursor.execute(query, values)
+                        data = await self._fetch(self._cursor, fetch)
+
+                    if commit:
+                        await self.conn.commit()
+                    return data
+                except Exception as exc:
+                    if attempt == self.config.lock_retries or not _is_locked(exc):
+                        raise
+
+                    await self.conn.rollback()
+            await asyncio.sleep(self.config.lock_backoff * 2 ** attempt)
+
+    @staticmethod
+    async def _fetch(cursor, mode: str) -> ResultSet:
+        if mode == "one":
+            return await cursor.fetchone()
+        if mode == "many":
+            return await cursor.fetchmany()
+        if mode == "all":
+            return await cursor.fetchall()
+        if mode == "lastrowid":
+            return cursor.lastrowid
+        if mode == "rowcount":
+            return cursor.rowcount
+
+        return None
+
+    async def run(self, query: str, values: Tuple[Any, ...] = (), *, fetch: str = None) -> ResultSet:
+        """
+        runs a query and commits it
+
+        :param fetch: one of `one`, `many`, `all`, `lastrowid` or `rowcount` to also return a result,
+            e.g. of `RETURNING`
+        """
+
+        if self._worker is not None:
+            return await self._worker.run(query, values, fetch=fetch)
+        if self._sync is not None:
+            return self._sync.run(query, values, fetch=fetch)
+        if self.pool is not None:
+            return await self._pooled(query, values, fetch)
+
+        return await self._local(query, values, fetch, commit=True)
+
+    async def run_many(self, query: str, values: Iterable[Tuple[Any, ...]]) -> None:
+        """
+        runs the query once for every set of values, in a single transaction
+        """
+
+        values = list(values)
+        if not values:
+            return
+
+        if self._worker is not None:
+            return await self._worker.run_many(query, values)
+        if self._sync is not None:
+            return self._sync.run_many(query, values)
+        if self.pool is not None:
+            async with self._acquire() as conn:
+                if self._driver == "asyncpg":
+                    query = _asyncpg_query(query)
+                    self._count_statement(query, values)
+                    await conn.executemany(query, values)
+                else:
+                    async with conn.cursor() as cursor:
+                        await cursor.executemany(query, values)
+                    await conn.commit()
+            return
+
+        await self._local(query, values, None, commit=True, many=True)
+
+    async def read_modify_write(
+        self, insert_query: str, rows: List[Tuple[Any, ...]], select_query: str, keys: List[Tuple[Any, ...]],
+        update: Callable[[List[RowSet]], Tuple[List[Tuple[Any, ...]], Any]], write_query: str
+    ) -> Any:
+        """
+        reads rows, lets `update` decide what to write and writes it, all in one transaction
+
+        `insert_query` first inserts the `rows` which don't exist yet, so that every row is locked (by the write on
+        SQLite, by `select_query`, e.g. a `SELECT ... FOR UPDATE`, on the servers) until the transaction ends,
+        which also holds when they didn't exist. The rows should come in the same order in every transaction, so
+        that two of them never wait for each other.
+
+        :param insert_query: inserts a row unless it exists, run with every values of `rows`
+        :param rows: the values of `insert_query`
+        :param select_query: reads a row, run with every values of `keys`
+        :param keys: the values of `select_query`
+        :param update: takes the rows read and returns the values of `write_query` (nothing is written if there are
+            none) and the result
+        :param write_query: writes a row
+        :return: the result of `update`
+        """
+
+        if self._worker is not None:
+            return await self._worker.read_modify_write(insert_query, rows, select_query, keys, update, write_query)
+        if self._sync is not None:
+            return self._sync.read_modify_write(insert_query, rows, select_query, keys, update, write_query)
+        if self._driver == "asyncpg":
+            insert_query, select_query, write_query = map(_asyncpg_query, (insert_query, select_query, write_query))
+            async with self._acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(insert_query, rows)
+                    states = [await conn.fetchrow(select_query, *key) for key in keys]
+                    writes, result = update(states)
+                    if writes:
+                        await conn.executemany(write_query, writes)
+            return result
+        if self.pool is not None:
+            async with self._acquire() as conn:
+                try:
+                    async with conn.cursor() as cursor:
+                        await cursor.executemany(insert_query, rows)
+                        states = []
+                        for key in keys:
+                            await cursor.execute(select_query, key)
+                            states.append(await cursor.fetchone())
+                        writes, result = update(states)
+                        if writes:
+                            await cursor.executemany(write_query, writes)
+                    await conn.commit()
+                except BaseException:
+                    await conn.rollback()
+                    raise
+            return result
+
+        # on the single aiosqlite connection, again while another process holds the lock of the file
+        for attempt in range(self.config.lock_retries + 1):
+            async with self._lock:
+                try:
+                    await self._cursor.executemany(insert_query, rows)
+                    states = []
+                    for key in keys:
+                        await self._cursor.execute(select_query, key)
+                        states.append(await self._cursor.fetchone())
+                    writes, result = update(states)
+                    if writes:
+                        await self._cursor.executemany(write_query, writes)
+
+                    await self.conn.commit()
+                    return result
+                except Exception as exc:
+                    await self.conn.rollback()
+                    if attempt == self.config.lock_retries or not _is_locked(exc):
+                        raise
+            await asyncio.sleep(self.config.lock_backoff * 2 ** attempt)
+
+    async def copy_records(
+        self, table: str, columns: Sequence[str], records: Iterable[Tuple[Any, ...]],
+        before: Sequence[str] = (), after: Sequence[str] = ()
+    ) -> None:
+        """
+        writes rows with `COPY ... FROM STDIN` (asyncpg only), in one transaction with the statements
+        `before` and `after` it
+
+        :param table: the table to copy into
+        :param columns: the columns of the records, in order
+        :param records: the rows to write
+        """
+
+        if self._driver != "asyncpg":
+            raise ValueError(f"Excepted the asyncpg driver for COPY, got {self._driver or 'a blocking driver'} instead")
+
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                for query in before:
+                    await conn.execute(_asyncpg_query(query))
+                await conn.copy_records_to_table(table, records=list(records), columns=list(columns))
+                for query in after:
+                    await conn.execute(_asyncpg_query(query))
+
+    async def table_columns(self, table: str) -> Set[str]:
+        """
+        the column names of a table, none if it doesn't exist
+
+        :param table: name of the table
+        """
+
+        if isinstance(self.config, SQlite):
+            rows = await self.execute("PRAGMA table_info(`{}`)".format(table), fetch="all")
+            return {row[1] for row in rows}
+
+        if isinstance(self.config, MySQL):
+            schema = "DATABASE()"
+        else:
+            schema = "current_schema()"
+
+        rows = await self.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = {} AND table_name = {}".format(
+                schema, self.fmtr),
+            (table,), fetch="all"
+        )
+        return {row[0] for row in rows}
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            await self._worker.close()
+            self._worker = None
+        elif self._sync is not None:
+            self._sync.close()
+            self._sync = None
+        elif self.pool is not None:
+            if self._driver == "aiomysql":
+                self.pool.close()
+                await self.pool.wait_closed()
+            else:
+                await self.pool.close()
+        elif self.conn is not None:
+            await self.conn.close()
+
+        self.conn = None
+        self.pool = None
+        self._cursor = None
+        self.statements.clear()
@@ -0,0 +1,93 @@
+import asyncio
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+__all__ = [
+    "KeyLocks",
+    "SingleFlight"
+]
+
+T = TypeVar("T")
+
+
+class KeyLocks:
+    def __init__(self):
+        """
+        asyncio locks by key, for the read-modify-write updates of one cooldown
+
+        A key only has an entry while a task holds or waits for its lock, so the table doesn't grow with the number
+        of cooldowns.
+        """
+
+        self._locks: Dict[Hashable, List[Any]] = {}  # key -> [lock, number of tasks holding or waiting for it]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def __call__(self, key: Hashable) -> AsyncIterator[None]:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Runs one call per key at a time, the tasks asking for a key which is already being loaded wait for the same
+        result instead of loading it again
+        """
+
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of `function()`, or of the call already running for `key`
+
+        The call runs in its own task, so a waiter which is cancelled doesn't cancel it for the others.
+        """
+
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(function())
+            task.add_done_callback(lambda done: self._done(key, done))
+
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # retrieved, so that an error nobody waited for anymore isn't logged
+            task.exception()
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Lets the next call for `key` run again instead of joining the running one, after the value was changed
+        """
+
+        self._calls.pop(key, None)
+
+    def clear(self) -> None:
+        self._calls.clear()
+
+    def is_current(self, key: Hashable) -> bool:
+        """
+        Whether the running call is still the one of `key`, i.e. the value wasn't changed (see :meth:`forget`) since
+        it started, so that what it read can be cached
+        """
+
+        return self._calls.get(key) is asyncio.current_task()
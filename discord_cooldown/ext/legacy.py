@@ -0,0 +1,308 @@
+from discord_cooldown.ext.buckets import Bucket
+from discord_cooldown.ext.database import AsyncDatabase
+
+import asyncio
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set, List, Tuple, AsyncIterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from discord_cooldown.ext.base import Cooldowns, Options
+
+__all__ = [
+    "LegacyTables",
+    "migrate_legacy"
+]
+
+# table suffix and scope column of the wide tables, the user table has no scope column. Looked up by `type.value`,
+# so that :class:`discord.ext.commands.BucketType` finds the same entries
+_LEGACY_TABLES: Dict[Bucket, Tuple[str, Optional[str]]] = {
+    Bucket.user: ("user", None),
+    Bucket.guild: ("guild", "guild_id"),
+    Bucket.channel: ("channel", "channel_id"),
+    Bucket.category: ("category", "category_id"),
+    Bucket.role: ("role", "role_id"),
+}
+
+_LegacyRow = Tuple[int, int, str, "Options"]
+
+
+class LegacyTables:
+    def __init__(self, db: AsyncDatabase):
+        """
+        Reads the wide `cooldowns_user`/`cooldowns_guild`/... tables used before the `cooldowns_entries` table,
+        which have one LONGTEXT column of JSON per command.
+
+        :param db: the database which holds the tables
+        """
+
+        self._db = db
+        self._table_prefix = self._db.table_prefix
+        self._fmtr = self._db.fmtr
+
+        # known command columns of every table, filled by `load_schema`, empty if the table doesn't exist
+        self._columns: Dict[Bucket, Set[str]] = {type: set() for type in _LEGACY_TABLES}
+        self._exists = False
+
+    @property
+    def exists(self) -> bool:
+        """
+        True if any of the tables still holds command columns
+        """
+
+        return self._exists
+
+    def _table(self, type: Bucket) -> str:
+        return f"{self._table_prefix}_{_LEGACY_TABLES[type.value][0]}"
+
+    async def load_schema(self) -> None:
+        """
+        Reads the command columns of every table once
+        """
+
+        for type, (_, scope) in _LEGACY_TABLES.items():
+            columns = await self._db.table_columns(self._table(type))
+            columns.difference_update(("user_id", scope))
+
+            self._columns[type.value] = columns
+
+        self._exists = any(self._columns.values())
+
+    def _where(self, type: Bucket) -> str:
+        scope = _LEGACY_TABLES[type.value][1]
+        if scope is None:
+            return "user_id = {}".format(self._fmtr)
+
+        return "user_id = {v} AND {} = {v}".format(scope, v=self._fmtr)
+
+    @staticmethod
+    def _key(type: Bucket, user_id: int, scope_id: int) -> Tuple[int, ...]:
+        return (user_id,) if _LEGACY_TABLES[type.value][1] is None else (user_id, scope_id)
+
+    def _clear_query(self, type: Bucket, command_name: str) -> str:
+        return "UPDATE `{}` SET `{}` = NULL WHERE {}".format(self._table(type), command_name, self._where(type))
+
+    async def take(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str,
+        insert_query: str, row: Callable[["Options"], Tuple[Any, ...]]
+    ) -> Optional["Options"]:
+        """
+        Moves a cooldown to the new table: inserts it and clears its cell in one transaction, so that it is never
+        lost in between
+
+        :param type: the type of cooldown
+        :param user_id: ID of the user
+        :param scope_id: ID of the guild/channel/category/role, ignored for user cooldowns
+        :param command_name: name of the command
+        :param insert_query: inserts the row of the cooldown unless it exists
+        :param row: takes the cooldown and returns the values of `insert_query`
+        """
+
+        from discord_cooldown.ext.base import Options
+
+        if command_name not in self._columns[type.value]:
+            return None
+
+        table, key = self._table(type), self._key(type, user_id, scope_id)
+        data = await self._db.execute(
+            "SELECT `{}` FROM `{}` WHERE {}".format(command_name, table, self._where(type)), key
+        )
+        if data is None or data[0] is None:
+            return None
+
+        options = Options.from_json(data[0])
+        await self._db.read_modify_write(
+            insert_query, [row(options)], "", [], lambda states: ([key], None), self._clear_query(type, command_name)
+        )
+        return options
+
+    async def clear(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        """
+        Clears the cell of a cooldown, so that it isn't moved over once it's removed from the new table
+
+        :param type: the type of cooldown
+        :param user_id: ID of the user
+        :param scope_id: ID of the guild/channel/category/role, ignored for user cooldowns
+        :param command_name: name of the command
+        """
+
+        if command_name in self._columns[type.value]:
+            await self._db.run(self._clear_query(type, command_name), self._key(type, user_id, scope_id))
+
+    async def remove_command(self, command_name: str, type: Bucket = None) -> None:
+        """
+        Clears the cells of a command in every table (or the one of `type`)
+        """
+
+        for table_type in _LEGACY_TABLES if type is None else (Bucket(type.value),):
+            if command_name in self._columns[table_type]:
+                await self._db.run("UPDATE `{}` SET `{}` = NULL".format(self._table(table_type), command_name))
+
+    async def remove_user(self, user_id: int) -> None:
+        """
+        Deletes the rows of a user from every table
+        """
+
+        for type in _LEGACY_TABLES:
+            if self._columns[type]:
+                await self._db.run(
+                    "DELETE FROM `{}` WHERE user_id = {}".format(self._table(type), self._fmtr), (user_id,)
+                )
+
+    async def remove_guild(self, guild_id: int) -> None:
+        """
+        Deletes the rows of a guild from the guild table, the channel, category and role tables don't store the
+        guild of their rows
+        """
+
+        if self._columns[Bucket.guild]:
+            await self._db.run(
+                "DELETE FROM `{}` WHERE guild_id = {}".format(self._table(Bucket.guild), self._fmtr), (guild_id,)
+            )
+
+    def delete_query(self, type: Bucket) -> str:
+        """
+        the query deleting a row of a table, run with the keys yielded by :meth:`batches`
+        """
+
+        return "DELETE FROM `{}` WHERE {}".format(self._table(type), self._where(type))
+
+    async def _pages(self, type: Bucket, batch_size: int) -> AsyncIterator[Tuple[List[str], List[Tuple]]]:
+        # the command columns and the rows of a table in pages of `batch_size` rows, ordered by the row key
+        command_names = sorted(self._columns[type.value])
+        if not command_names:
+            return
+
+        key_columns = list(self._key_columns(type))
+        select = "SELECT {}, {} FROM `{}`".format(
+            ", ".join(key_columns), ", ".join(f"`{name}`" for name in command_names), self._table(type)
+        )
+        order = " ORDER BY {} LIMIT {}".format(", ".join(key_columns), int(batch_size))
+        after = " WHERE ({}) > ({})".format(", ".join(key_columns), ", ".join([self._fmtr] * len(key_columns)))
+
+        last_key: Optional[Tuple[int, ...]] = None
+        while True:
+            if last_key is None:
+                rows = await self._db.execute(select + order, fetch="all")
+            else:
+                rows = await self._db.execute(select + after + order, last_key, fetch="all")
+            if not rows:
+                return
+
+            yield command_names, rows
+
+            last_key = tuple(rows[-1][:len(key_columns)])
+            if len(rows) < batch_size:
+                return
+
+    @staticmethod
+    def _key_columns(type: Bucket) -> Tuple[str, ...]:
+        scope = _LEGACY_TABLES[type.value][1]
+        return ("user_id",) if scope is None else ("user_id", scope)
+
+    async def batches(
+        self, type: Bucket, batch_size: int = 1000
+    ) -> AsyncIterator[Tuple[List[Tuple[int, ...]], List[_LegacyRow]]]:
+        """
+        Yields the cooldowns of a table in batches of `batch_size` rows, ordered by the row key
+
+        :param type: the type of cooldown
+        :param batch_size: number of table rows read per query
+        :return: the keys of the rows read and their cooldowns
+        """
+
+        from discord_cooldown.ext.base import Options
+
+        width = len(self._key_columns(type))
+        async for command_names, rows in self._pages(type, batch_size):
+            batch: List[_LegacyRow] = []
+            for row in rows:
+                user_id, scope_id = row[0], (0 if width == 1 else row[1])
+                for command_name, cell in zip(command_names, row[width:]):
+                    if cell is not None:
+                        batch.append((user_id, scope_id, command_name, Options.from_json(cell)))
+
+            yield [tuple(row[:width]) for row in rows], batch
+
+    async def collect(self, type: Bucket, now: datetime, batch_size: int = 1000) -> Tuple[int, int]:
+        """
+        Clears the expired cells of a table and deletes its rows which have no cooldown left, a page of
+        `batch_size` rows at a time
+
+        :param type: the type of cooldown
+        :param now: the current time, in the timezone of the cooldowns
+        :param batch_size: number of table rows read per query
+        :return: number of cells cleared and number of rows deleted
+        """
+
+        from discord_cooldown.ext.base import Options
+
+        table, width = self._table(type), len(self._key_columns(type))
+        cleared = deleted = 0
+        async for command_names, rows in self._pages(type, batch_size):
+            empty_rows = []
+            for row in rows:
+                key, cells = tuple(row[:width]), row[width:]
+                expired = [
+                    name for name, cell in zip(command_names, cells)
+                    if cell is not None and Options.from_json(cell).expires_at < now
+                ]
+                if len(expired) == sum(cell is not None for cell in cells):
+                    empty_rows.append(key)
+                elif expired:
+                    await self._db.run(
+                        "UPDATE `{}` SET {} WHERE {}".format(
+                            table, ", ".join(f"`{name}` = NULL" for name in expired), self._where(type)
+                        ),
+                        key
+                    )
+                cleared += len(expired)
+
+            await self._db.run_many("DELETE FROM `{}` WHERE {}".format(table, self._where(type)), empty_rows)
+            deleted += len(empty_rows)
+            # let the checks run between two pages
+            await asyncio.sleep(0)
+
+        return cleared, deleted
+
+    async def drop(self) -> None:
+        """
+        Drops all the tables
+        """
+
+        for type in _LEGACY_TABLES:
+            await self._db.run("DROP TABLE IF EXISTS `{}`".format(self._table(type)))
+            self._columns[type.value] = set()
+
+        self._exists = False
+
+
+async def migrate_legacy(cooldowns: "Cooldowns", batch_size: int = 1000, drop: bool = False) -> int:
+    """
+    Copies the cooldowns of the wide tables into the `cooldowns_entries` table while the bot keeps running
+
+    Every batch is written in one transaction and only adds the cooldowns which aren't in the new table yet, so
+    the newer state written by the running checks is never overwritten. The legacy rows of a batch are deleted in
+    the same transaction, so a cooldown reset after it was moved isn't moved over again. Expired cooldowns are
+    skipped, and running it again after an interruption simply continues with what is left.
+
+    :param cooldowns: the :class:`Cooldowns` to migrate into
+    :param batch_size: number of legacy rows copied per transaction
+    :param drop: if True, the legacy tables are dropped once everything has been copied
+    :return: number of unexpired cooldowns found in the legacy tables
+    """
+
+    legacy = cooldowns.legacy
+    await legacy.load_schema()
+
+    copied = 0
+    for type in _LEGACY_TABLES:
+        async for keys, batch in legacy.batches(type, batch_size):
+            copied += await cooldowns.insert_missing(type, batch, legacy_keys=keys)
+            # let the checks run between two batches
+            await asyncio.sleep(0)
+
+    if drop:
+        await legacy.drop()
+
+    return copied
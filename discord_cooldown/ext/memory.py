@@ -0,0 +1,612 @@
+from discord_cooldown.ext.base import Cooldowns, Options
+from discord_cooldown.ext.buckets import Bucket
+from discord_cooldown.ext.cache import CacheKey
+from discord_cooldown.ext.clock import Clock
+from discord_cooldown.ext.strategies import Strategy, decide, decide_all
+from discord_cooldown.modules import Memory
+
+import array
+import bisect
+import json
+import os
+import struct
+import sys
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Iterable, Tuple
+from datetime import timedelta
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [
+    "MemoryStore",
+    "MemoryCooldowns"
+]
+
+_EMPTY = -1
+_SNAPSHOT_MAGIC = b"DCMS"
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = struct.Struct("<4sII")  # magic, version, size of the json metadata
+
+# name and typecode of the columns, in snapshot order
+_COLUMNS = (
+    ("_user_ids", "q"), ("_scope_ids", "q"), ("_guild_ids", "q"), ("_tags", "i"),
+    ("_rates", "i"), ("_counts", "i"), ("_expires", "q"), ("_previous", "i"),
+)
+# the columns of each snapshot version, the later ones are zero-filled
+_SNAPSHOT_COLUMNS = {1: _COLUMNS[:7], 2: _COLUMNS}
+
+_Entry = Tuple[int, int, int, int, int]  # guild_id, rate, count, expires_at, previous
+
+
+class MemoryStore:
+    def __init__(self, config: Memory):
+        """
+        Cooldowns kept in the memory of the process
+
+        Every cooldown is one entry of a few typed arrays (user, scope and guild IDs, bucket and command, rate, count,
+        previous count and expiry in epoch milliseconds), 48 bytes per cooldown plus 8 to 16 bytes of key table
+        (about 56 MB for a million cooldowns, see :attr:`nbytes`), so millions of them fit in a few hundred MB. The key
+        table is an open-addressing (linear probing) array of entry indexes, and the entries stay packed at the start
+        of the arrays so that expiry sweeps run over them at once, with numpy if it's installed.
+
+        All the methods are synchronous and never suspend, so a check is atomic for the event loop.
+
+        :param config: the :class:`Memory` config
+        """
+
+        self.config = config
+        self.fmtr: str = config.fmtr
+        self.table_prefix = config.table_prefix
+
+        self._connected = False
+        self._command_ids: Dict[str, int] = {}
+        self._commands: List[str] = []
+        self._reset(config.capacity)
+
+    def _reset(self, capacity: int) -> None:
+        for name, typecode in _COLUMNS:
+            setattr(self, name, array.array(typecode))
+
+        self._index = array.array("i", [_EMPTY]) * self._table_size(capacity)
+
+    @staticmethod
+    def _table_size(entries: int) -> int:
+        # a power of two, at most half full
+        size = 8
+        while size < 2 * entries:
+            size *= 2
+        return size
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        memory used by the arrays, in bytes
+        """
+
+        arrays = [getattr(self, name) for name, _ in _COLUMNS] + [self._index]
+        return sum(arr.buffer_info()[1] * arr.itemsize for arr in arrays)
+
+    def _tag(self, bucket: int, command_name: str, create: bool = False) -> Optional[int]:
+        # bucket and interned command in one int, the buckets fit in 3 bits
+        command_id = self._command_ids.get(command_name)
+        if command_id is None:
+            if not create:
+                return None
+
+            command_id = self._command_ids[command_name] = len(self._commands)
+            self._commands.append(command_name)
+
+        return command_id << 3 | bucket
+
+    def _probe(self, tag: int, user_id: int, scope_id: int) -> Tuple[int, int]:
+        # returns the slot of the key in the key table and its entry, or the free slot to use and _EMPTY
+        index = self._index
+        mask = len(index) - 1
+
+        slot = hash((tag, user_id, scope_id)) & mask
+        while True:
+            entry = index[slot]
+            if entry == _EMPTY or (
+                self._user_ids[entry] == user_id and self._scope_ids[entry] == scope_id and self._tags[entry] == tag
+            ):
+                return slot, entry
+
+            slot = (slot + 1) & mask
+
+    def _rebuild(self, size: int) -> None:
+        self._index = array.array("i", [_EMPTY]) * size
+        for entry in range(len(self._expires)):
+            slot, _ = self._probe(self._tags[entry], self._user_ids[entry], self._scope_ids[entry])
+            self._index[slot] = entry
+
+    def _reserve(self) -> None:
+        # grows the key table before it gets more than half full
+        if 2 * (len(self._expires) + 1) > len(self._index):
+            self._rebuild(len(self._index) * 2)
+
+    def _append(
+        self, slot: int, tag: int, user_id: int, scope_id: int, guild_id: int, rate: int, count: int, expires_at: int,
+        previous: int = 0
+    ) -> None:
+        self._index[slot] = len(self._expires)
+
+        self._user_ids.append(user_id)
+        self._scope_ids.append(scope_id)
+        self._guild_ids.append(guild_id)
+        self._tags.append(tag)
+        self._rates.append(rate)
+        self._counts.append(count)
+        self._expires.append(expires_at)
+        self._previous.append(previous)
+
+    def _remove(self, slot: int, entry: int) -> None:
+        index = self._index
+        mask = len(index) - 1
+
+        # backward shift deletion: move the following keys of the probe run into the hole when they may go there
+        index[slot] = _EMPTY
+        following = (slot + 1) & mask
+        while index[following] != _EMPTY:
+            moved = index[following]
+            home = hash((self._tags[moved], self._user_ids[moved], self._scope_ids[moved])) & mask
+            if (following - home) & mask >= (following - slot) & mask:
+                index[slot] = moved
+                index[following] = _EMPTY
+                slot = following
+
+            following = (following + 1) & mask
+
+        # keep the entries packed: the last entry takes the place of the removed one
+        last = len(self._expires) - 1
+        if entry != last:
+            last_slot, _ = self._probe(self._tags[last], self._user_ids[last], self._scope_ids[last])
+            index[last_slot] = entry
+
+            for name, _ in _COLUMNS:
+                column = getattr(self, name)
+                column[entry] = column[last]
+
+        for name, _ in _COLUMNS:
+            getattr(self, name).pop()
+
+    def get(self, bucket: int, user_id: int, scope_id: int, command_name: str) -> Optional[_Entry]:
+        """
+        Returns (guild_id, rate, count, expires_at, previous) of a cooldown, or None if it isn't stored
+        """
+
+        tag = self._tag(bucket, command_name)
+        if tag is None:
+            return None
+
+        _, entry = self._probe(tag, user_id, scope_id)
+        if entry == _EMPTY:
+            return None
+
+        return (
+            self._guild_ids[entry], self._rates[entry], self._counts[entry], self._expires[entry], self._previous[entry]
+        )
+
+    def put(
+        self, bucket: int, user_id: int, scope_id: int, command_name: str,
+        guild_id: int, rate: int, count: int, expires_at: int, previous: int = 0
+    ) -> None:
+        self._reserve()
+
+        tag = self._tag(bucket, command_name, create=True)
+        slot, entry = self._probe(tag, user_id, scope_id)
+        if entry == _EMPTY:
+            self._append(slot, tag, user_id, scope_id, guild_id, rate, count, expires_at, previous)
+            return
+
+        self._guild_ids[entry] = guild_id
+        self._rates[entry] = rate
+        self._counts[entry] = count
+        self._expires[entry] = expires_at
+        self._previous[entry] = previous
+
+    def delete(self, bucket: int, user_id: int, scope_id: int, command_name: str) -> bool:
+        tag = self._tag(bucket, command_name)
+        if tag is None:
+            return False
+
+        slot, entry = self._probe(tag, user_id, scope_id)
+        if entry == _EMPTY:
+            return False
+
+        self._remove(slot, entry)
+        return True
+
+    def hit(
+        self, bucket: int, user_id: int, scope_id: int, command_name: str,
+        guild_id: int, now: int, rate: int, expires_at: int, strategy: Strategy = Strategy.fixed_window
+    ) -> Optional[int]:
+        """
+        Counts one use if the cooldown allows it, the same check as :meth:`Cooldowns.hit`
+
+        :return: None if the use is allowed, else when it can be retried in epoch milliseconds
+        """
+
+        self._reserve()
+
+        tag = self._tag(bucket, command_name, create=True)
+        slot, entry = self._probe(tag, user_id, scope_id)
+        if strategy is not Strategy.fixed_window:
+            state = None
+            if entry != _EMPTY:
+                state = (self._counts[entry], self._previous[entry], self._expires[entry])
+            new, retry = decide(strategy, state, now, rate, expires_at)
+            if new is None:
+                return retry
+
+            if entry == _EMPTY:
+                self._append(slot, tag, user_id, scope_id, guild_id, rate, new[0], new[2], new[1])
+            else:
+                self._guild_ids[entry] = guild_id
+                self._rates[entry] = rate
+                self._counts[entry], self._previous[entry], self._expires[entry] = new
+            return None
+
+        if entry == _EMPTY:
+            self._append(slot, tag, user_id, scope_id, guild_id, rate, 1, expires_at)
+            return None
+
+        self._guild_ids[entry] = guild_id
+        self._rates[entry] = rate
+        if self._expires[entry] < now:
+            self._counts[entry] = 1
+            self._expires[entry] = expires_at
+        elif self._counts[entry] < rate:
+            self._counts[entry] += 1
+        else:
+            return self._expires[entry]
+
+        return None
+
+    def _expired(self, now: int) -> List[int]:
+        if numpy is None:
+            return [entry for entry, expires_at in enumerate(self._expires) if expires_at < now]
+
+        # the view must be gone before the arrays are resized
+        expires = numpy.frombuffer(self._expires, dtype=numpy.int64)
+        expired = numpy.flatnonzero(expires < now).tolist()
+        del expires
+        return expired
+
+    def sweep(self, now: int) -> int:
+        """
+        Removes the cooldowns which expired before `now` (epoch milliseconds)
+
+        :return: number of cooldowns removed
+        """
+
+        if not self._expires:
+            return 0
+
+        return self._remove_entries(self._expired(now))
+
+    def _remove_entries(self, entries: List[int]) -> int:
+        # `entries` in increasing order
+        if 2 * len(entries) > len(self._expires):
+            # most of the entries are gone, copying the others is cheaper than removing them one by one
+            self._compact(entries)
+            return len(entries)
+
+        # from the end, so that the entries moved into the holes are never removed ones
+        for entry in reversed(entries):
+            slot, _ = self._probe(self._tags[entry], self._user_ids[entry], self._scope_ids[entry])
+            self._remove(slot, entry)
+
+        return len(entries)
+
+    def _matching(self, name: str, value: int, shift: int = 0) -> List[int]:
+        # the entries whose column, shifted right by `shift` bits, equals `value`
+        column = getattr(self, name)
+        if numpy is None:
+            return [entry for entry, item in enumerate(column) if item >> shift == value]
+
+        items = numpy.frombuffer(column, dtype=column.typecode)
+        found = numpy.flatnonzero(items >> shift == value).tolist()
+        del items
+        return found
+
+    def remove_user(self, user_id: int) -> int:
+        """
+        Removes the cooldowns of a user
+
+        :return: number of cooldowns removed
+        """
+
+        return self._remove_entries(self._matching("_user_ids", user_id))
+
+    def remove_guild(self, guild_id: int) -> int:
+        """
+        Removes the cooldowns stored with this guild ID
+
+        :return: number of cooldowns removed
+        """
+
+        return self._remove_entries(self._matching("_guild_ids", guild_id))
+
+    def remove_command(self, command_name: str, bucket: int = None) -> int:
+        """
+        Removes the cooldowns of a command, of every bucket if `bucket` is None
+
+        :return: number of cooldowns removed
+        """
+
+        if bucket is not None:
+            tag = self._tag(bucket, command_name)
+            return 0 if tag is None else self._remove_entries(self._matching("_tags", tag))
+
+        command_id = self._command_ids.get(command_name)
+        return 0 if command_id is None else self._remove_entries(self._matching("_tags", command_id, 3))
+
+    def entries_of(self, user_id: int, now: int) -> List[Tuple[int, int, str, int, int, int, int]]:
+        """
+        Returns (bucket, scope_id, command_name, rate, count, expires_at, previous) of the cooldowns of a user
+        which didn't expire before `now`
+        """
+
+        return [
+            (
+                self._tags[entry] & 7, self._scope_ids[entry], self._commands[self._tags[entry] >> 3],
+                self._rates[entry], self._counts[entry], self._expires[entry], self._previous[entry]
+            )
+            for entry in self._matching("_user_ids", user_id) if self._expires[entry] >= now
+        ]
+
+    def keys(self, now: int) -> List[Tuple[int, int, int, str]]:
+        """
+        Returns (bucket, user_id, scope_id, command_name) of the cooldowns which didn't expire before `now`
+        """
+
+        commands, tags = self._commands, self._tags
+        return [
+            (tags[entry] & 7, self._user_ids[entry], self._scope_ids[entry], commands[tags[entry] >> 3])
+            for entry, expires_at in enumerate(self._expires) if expires_at >= now
+        ]
+
+    def _compact(self, removed: List[int]) -> None:
+        removed_ = set(removed)
+        keep = [entry for entry in range(len(self._expires)) if entry not in removed_]
+
+        for name, typecode in _COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array.array(typecode, [column[entry] for entry in keep]))
+
+        self._rebuild(self._table_size(max(len(keep), self.config.capacity)))
+
+    def shrink(self) -> None:
+        """
+        Shrinks the key table after many cooldowns were removed
+        """
+
+        size = self._table_size(max(len(self._expires), self.config.capacity))
+        if size < len(self._index):
+            self._rebuild(size)
+
+    def save(self, filename: str) -> None:
+        """
+        Writes all the cooldowns to a file, replaced atomically
+        """
+
+        meta = json.dumps({
+            "byteorder": sys.byteorder, "count": len(self._expires), "commands": self._commands
+        }).encode()
+
+        with open(f"{filename}.tmp", "wb") as file:
+            file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(meta)))
+            file.write(meta)
+            for name, _ in _COLUMNS:
+                getattr(self, name).tofile(file)
+
+        os.replace(f"{filename}.tmp", filename)
+
+    def load(self, filename: str) -> None:
+        """
+        Replaces the cooldowns with the ones of a file written by :meth:`save`
+        """
+
+        with open(filename, "rb") as file:
+            magic, version, size = _SNAPSHOT_HEADER.unpack(file.read(_SNAPSHOT_HEADER.size))
+            if magic != _SNAPSHOT_MAGIC or version not in _SNAPSHOT_COLUMNS:
+                raise ValueError(f"Excepted a cooldown snapshot (version {_SNAPSHOT_VERSION}), got {filename} instead")
+
+            meta = json.loads(file.read(size))
+            columns = []
+            for name, typecode in _SNAPSHOT_COLUMNS[version]:
+                column = array.array(typecode)
+                column.fromfile(file, meta["count"])
+                if meta["byteorder"] != sys.byteorder:
+                    column.byteswap()
+                columns.append((name, column))
+            for name, typecode in _COLUMNS[len(columns):]:
+                columns.append((name, array.array(typecode, [0]) * meta["count"]))
+
+        for name, column in columns:
+            setattr(self, name, column)
+
+        self._commands = list(meta["commands"])
+        self._command_ids = {name: i for i, name in enumerate(self._commands)}
+        self._rebuild(self._table_size(max(meta["count"], self.config.capacity)))
+
+    async def connect(self) -> None:
+        if self.config.snapshot is not None and os.path.exists(self.config.snapshot):
+            self.load(self.config.snapshot)
+
+        self._connected = True
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def close(self) -> None:
+        if self._connected and self.config.snapshot is not None:
+            self.save(self.config.snapshot)
+
+        self._connected = False
+
+
+class MemoryCooldowns(Cooldowns):
+    def __init__(self, store: MemoryStore, timezone: timedelta = None, clock: Clock = None):
+        """
+        :class:`Cooldowns` kept in a :class:`MemoryStore` instead of a database
+
+        :param store: the store to use
+        :param timezone: the timedelta used for :attr:`Options.expires_at`, by default UTC
+        :param clock: the time of the cooldowns, see :class:`Clock`
+        """
+
+        super().__init__(store, timezone, clock=clock)
+        self._store = store
+
+    def enable_write_behind(self, flush_interval: float = 1.0, max_pending: int = 1000):
+        raise ValueError("Excepted a database config for write-behind mode, got Memory instead")
+
+    async def create_tables(self) -> None:
+        """
+        Drops the cooldowns of the snapshot which expired while the bot was offline
+        """
+
+        self._store.sweep(self.clock.now())
+
+    async def load_schema(self) -> None:
+        pass
+
+    async def get(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> Optional[Options]:
+        data = self._store.get(type.value, user_id, scope_id, command_name)
+        if data is None:
+            return None
+
+        return Options.from_millis(data[1], data[2], type, data[3], self.timezone, data[4])
+
+    async def set(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str, options: Options, guild_id: int = 0
+    ) -> None:
+        self._store.put(
+            type.value, user_id, scope_id, command_name,
+            guild_id, options.rate, options.count, options.to_millis(self.timezone), options.previous
+        )
+
+    async def remove(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        self._store.delete(type.value, user_id, scope_id, command_name)
+
+    async def reset(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        data = self._store.get(type.value, user_id, scope_id, command_name)
+        if data is None:
+            return
+
+        guild_id, rate, count, expires_at, previous = data
+        if count > 1:
+            self._store.put(
+                type.value, user_id, scope_id, command_name, guild_id, rate, count - 1, expires_at, previous
+            )
+        else:
+            self._store.delete(type.value, user_id, scope_id, command_name)
+
+    async def _hit(
+        self, key: Tuple[int, int, int, str], now: int, rate: int, expires_at: int, guild_id: int,
+        strategy: Strategy = Strategy.fixed_window
+    ) -> Optional[int]:
+        return self._store.hit(*key, guild_id, now, rate, expires_at, strategy)
+
+    async def _hit_many(
+        self, entries: List[Tuple[CacheKey, int, int, int]], now: int, strategy: Strategy
+    ) -> Optional[int]:
+        # nothing suspends between the reads and the writes
+        states = []
+        for key, *_ in entries:
+            data = self._store.get(*key)
+            states.append(None if data is None else (data[2], data[4], data[3]))
+
+        new, retry = decide_all(strategy, states, now, [(rate, expires_at) for _, rate, expires_at, _ in entries])
+        if new is None:
+            return retry
+
+        for (key, rate, _, guild_id), (count, previous, expires_at) in zip(entries, new):
+            self._store.put(*key, guild_id, rate, count, expires_at, previous)
+        return None
+
+    async def insert_missing(
+        self, type: Bucket, cooldowns: Iterable[Tuple[int, int, str, Options]]
+    ) -> int:
+        now = self.from_millis(self.clock.now())
+
+        inserted = 0
+        for user_id, scope_id, command_name, options in cooldowns:
+            if options.expires_at <= now:
+                continue
+
+            inserted += 1
+            if self._store.get(type.value, user_id, scope_id, command_name) is None:
+                await self.set(
+                    type, user_id, scope_id, command_name, options, scope_id if type.value == Bucket.guild else 0
+                )
+
+        return inserted
+
+    async def remove_command(self, command_name: str, type: Bucket = None) -> int:
+        return self._store.remove_command(command_name, None if type is None else type.value)
+
+    async def remove_guild(self, guild_id: int) -> int:
+        return self._store.remove_guild(guild_id)
+
+    async def remove_user(self, user_id: int) -> int:
+        return self._store.remove_user(user_id)
+
+    async def user_cooldowns(self, user_id: int) -> List[Tuple[Bucket, int, str, Options]]:
+        entries = self._store.entries_of(user_id, self.clock.now())
+        entries.sort(key=lambda entry: entry[5])
+
+        cooldowns = []
+        for bucket, scope_id, command_name, rate, count, expires_at, previous in entries:
+            type = Bucket(bucket)
+            options = Options.from_millis(rate, count, type, expires_at, self.timezone, previous)
+            cooldowns.append((type, scope_id, command_name, options))
+        return cooldowns
+
+    async def rows(
+        self, batch_size: int = 1000, after: CacheKey = None
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        # ordered by key so that `after` can continue an interrupted read, the keys are taken at once
+        now = self.clock.now()
+        keys = sorted(self._store.keys(now))
+        if after is not None:
+            keys = keys[bisect.bisect_right(keys, tuple(after)):]
+
+        for start in range(0, len(keys), batch_size):
+            batch = []
+            for key in keys[start:start + batch_size]:
+                data = self._store.get(*key)
+                if data is not None and data[3] >= now:
+                    batch.append(key + data)
+            yield batch
+
+    async def insert_rows(self, rows: List[Tuple[Any, ...]]) -> int:
+        for row in rows:
+            if self._store.get(*row[:4]) is None:
+                self._store.put(*row)
+
+        return len(rows)
+
+    def sweep(self) -> int:
+        """
+        Removes the expired cooldowns
+
+        :return: number of cooldowns removed
+        """
+
+        return self._store.sweep(self.clock.now())
+
+    async def delete_expired(self, batch_size: int = 1000) -> int:
+        # a sweep goes over all the cooldowns at once
+        return self.sweep()
+
+    async def optimize(self) -> None:
+        self._store.shrink()
@@ -0,0 +1,228 @@
+from discord_cooldown.ext.buckets import Bucket
+
+import bisect
+import logging
+import time
+
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+__all__ = [
+    "Observer",
+    "Histogram",
+    "Metrics",
+    "instrument"
+]
+
+_log = logging.getLogger(__name__)
+
+# (name, attributes, start in epoch nanoseconds, duration in nanoseconds, error)
+SpanCallback = Callable[[str, Dict[str, Any], int, int, Optional[BaseException]], None]
+
+
+class Observer:
+    """
+    Receives the timings of the storage operations, statements and checks. Every method does nothing, override the
+    ones you need. Without an observer (the default), nothing is timed at all.
+    """
+
+    def on_operation(self, name: str, start_ns: int, duration_ns: int, error: Optional[BaseException]) -> None:
+        """
+        a :class:`Cooldowns` operation (`hit`, `get`, `set`, `remove`, `reset`, ...) finished
+        """
+
+    def on_statement(self, query: str, start_ns: int, duration_ns: int, error: Optional[BaseException]) -> None:
+        """
+        a statement sent to the database finished
+        """
+
+    def on_check(
+        self, command_name: str, type: Bucket, allowed: bool, start_ns: int, duration_ns: int
+    ) -> None:
+        """
+        a cooldown check of a command finished
+        """
+
+
+class Histogram:
+    # upper bounds of the buckets, in seconds
+    BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        """
+        Latency histogram with fixed exponential buckets
+        """
+
+        self.counts: List[int] = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Returns the upper bound of the bucket which holds the percentile, None if it's above the last bound
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count, "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50), "p99": self.percentile(99),
+            "buckets": dict(zip([*map(str, self.BOUNDS), "+inf"], self.counts)),
+        }
+
+
+class Metrics(Observer):
+    def __init__(
+        self, slow_query_seconds: float = 0.1, slow_query_log_size: int = 100, span_callback: SpanCallback = None
+    ):
+        """
+        Collects the timings in memory
+
+        Latency histograms per operation and per statement kind (SELECT, INSERT, ...), statement counters per query,
+        allowed/denied uses per command and bucket type, and a log of the statements slower than
+        `slow_query_seconds` with their SQL. Every timing can also be forwarded to `span_callback`, e.g. to create
+        OpenTelemetry spans with explicit start and end times.
+
+        :param slow_query_seconds: statements taking longer are logged, with their SQL
+        :param slow_query_log_size: number of slow statements kept in :attr:`slow_queries`
+        :param span_callback: called with (name, attributes, start_ns, duration_ns, error) of every timing
+        """
+
+        self.slow_query_seconds = slow_query_seconds
+        self.span_callback = span_callback
+
+        self.operations: Dict[str, Histogram] = {}
+        self.statements: Dict[str, Histogram] = {}
+        self.queries: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.checks: Counter = Counter()  # (command_name, bucket, "allowed"/"denied")
+        self.check_latency: Dict[str, Histogram] = {}
+        self.slow_queries: Deque[Tuple[str, float]] = deque(maxlen=slow_query_log_size)
+
+    @staticmethod
+    def _histogram(histograms: Dict[str, Histogram], name: str) -> Histogram:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        return histogram
+
+    def on_operation(self, name: str, start_ns: int, duration_ns: int, error: Optional[BaseException]) -> None:
+        self._histogram(self.operations, name).observe(duration_ns / 1e9)
+        if error is not None:
+            self.errors[name] += 1
+
+        if self.span_callback is not None:
+            self.span_callback(f"cooldown.{name}", {}, start_ns, duration_ns, error)
+
+    def on_statement(self, query: str, start_ns: int, duration_ns: int, error: Optional[BaseException]) -> None:
+        kind = query.lstrip().split(" ", 1)[0].upper()
+        seconds = duration_ns / 1e9
+
+        self._histogram(self.statements, kind).observe(seconds)
+        self.queries[query] += 1
+        if error is not None:
+            self.errors[kind] += 1
+
+        if seconds >= self.slow_query_seconds:
+            self.slow_queries.append((query, seconds))
+            _log.warning("slow cooldown query (%.3fs): %s", seconds, query)
+
+        if self.span_callback is not None:
+            self.span_callback(
+                f"cooldown.db.{kind.lower()}", {"db.statement": query}, start_ns, duration_ns, error
+            )
+
+    def on_check(
+        self, command_name: str, type: Bucket, allowed: bool, start_ns: int, duration_ns: int
+    ) -> None:
+        self.checks[command_name, type.name, "allowed" if allowed else "denied"] += 1
+        self._histogram(self.check_latency, type.name).observe(duration_ns / 1e9)
+
+        if self.span_callback is not None:
+            self.span_callback(
+                "cooldown.check", {"command": command_name, "bucket": type.name, "allowed": allowed},
+                start_ns, duration_ns, None
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        everything collected so far, as plain data
+        """
+
+        return {
+            "operations": {name: histogram.snapshot() for name, histogram in self.operations.items()},
+            "statements": {name: histogram.snapshot() for name, histogram in self.statements.items()},
+            "checks": {"/".join(key): count for key, count in self.checks.items()},
+            "check_latency": {name: histogram.snapshot() for name, histogram in self.check_latency.items()},
+            "queries": dict(self.queries),
+            "errors": dict(self.errors),
+            "slow_queries": list(self.slow_queries),
+        }
+
+
+def _timed(method: Callable, report: Callable[[Any, int, int, Optional[BaseException]], None], name: Any) -> Callable:
+    # `name` is the name reported, or a function building it from the arguments
+    label = name if callable(name) else (lambda args: args[0] if name is None else name)
+
+    async def timed(*args, **kwargs):
+        start, started = time.time_ns(), time.perf_counter_ns()
+        try:
+            result = await method(*args, **kwargs)
+        except BaseException as exc:
+            report(label(args), start, time.perf_counter_ns() - started, exc)
+            raise
+
+        report(label(args), start, time.perf_counter_ns() - started, None)
+        return result
+
+    return timed
+
+
+# the statements which don't start with their query, reported as a `TRANSACTION` and a `COPY`
+_STATEMENTS: Dict[str, Any] = {
+    "execute": None,
+    "run": None,
+    "run_many": None,
+    "read_modify_write": lambda args: f"TRANSACTION {args[0]}; {args[2]}; {args[5]}",
+    "copy_records": lambda args: f"COPY {args[0]}",
+}
+
+_OPERATIONS = ("get", "set", "remove", "reset", "hit", "hit_many", "insert_missing", "delete_expired", "optimize")
+
+
+def instrument(db: Any, cooldowns: Any, observer: Observer) -> None:
+    """
+    Times the statements of `db` and the operations of `cooldowns` by wrapping their methods, so nothing is added
+    to the calls of an uninstrumented instance
+
+    The transactions of :meth:`AsyncDatabase.read_modify_write` are reported as one `TRANSACTION` statement and the
+    bulk loads of :meth:`AsyncDatabase.copy_records` as a `COPY` of their table.
+
+    :param db: the :class:`AsyncDatabase` (or :class:`MemoryStore`, which has no statements)
+    :param cooldowns: the :class:`Cooldowns`
+    :param observer: receives the timings
+    """
+
+    for name, label in _STATEMENTS.items():
+        method = getattr(db, name, None)
+        if method is not None:
+            setattr(db, name, _timed(method, observer.on_statement, label))
+
+    for name in _OPERATIONS:
+        setattr(cooldowns, name, _timed(getattr(cooldowns, name), observer.on_operation, name))
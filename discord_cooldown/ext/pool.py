@@ -0,0 +1,161 @@
+from discord_cooldown.ext.database import Database, PoolTimeout, _Configs
+from discord_cooldown.modules import *
+
+import threading
+import time
+
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Tuple
+
+__all__ = [
+    "ConnectionPool"
+]
+
+
+class ConnectionPool:
+    def __init__(self, config: _Configs, statement_cache_size: int = 128):
+        """
+        A thread-safe pool of blocking connections
+
+        The size, acquire timeout and ping interval are taken from the MySQL/PostgreSQL config, SQlite always
+        uses a single connection. Connections idle for longer than `ping_interval` are pinged when acquired and
+        reconnected if the server has dropped them.
+
+        :param config: the database config which you want to use
+        :param statement_cache_size: maximum number of statements kept prepared per connection
+        """
+
+        self.config: _Configs = config
+        if isinstance(config, SQlite):
+            self.min_size, self.max_size = 1, 1
+            self.acquire_timeout, self.ping_interval = None, None
+        else:
+            self.min_size, self.max_size = config.min_size, config.max_size
+            self.acquire_timeout, self.ping_interval = config.acquire_timeout, config.ping_interval
+
+        self.statement_cache_size = statement_cache_size
+        self.statement_counters: Counter = Counter()  # shared by the statement caches of the connections
+        self._idle: Deque[Tuple[Database, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def open(self) -> None:
+        """
+        opens `min_size` connections
+        """
+
+        for _ in range(self.min_size):
+            db = self._new_connection()
+            with self._cond:
+                self._size += 1
+                self._idle.append((db, time.monotonic()))
+
+    def _new_connection(self) -> Database:
+        db = Database(self.config, self.statement_cache_size, self.statement_counters)
+        db.connect()
+
+        return db
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def statement_stats(self) -> Dict[str, int]:
+        """
+        hits, misses and evictions of the statement caches of all the connections
+        """
+
+        return {name: self.statement_counters[name] for name in ("hits", "misses", "evictions")}
+
+    def acquire(self, timeout: float = None) -> Database:
+        """
+        takes a connection from the pool, opening a new one if the pool is not full
+
+        :param timeout: seconds to wait for a free connection, by default `acquire_timeout`
+        :raises PoolTimeout: when no connection was freed in time
+        """
+
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("the connection pool is closed")
+                if self._idle:
+                    db, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    db, last_used = None, None
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"no connection was available within {timeout} seconds")
+                self._cond.wait(remaining)
+
+        try:
+            if db is None:
+                db = self._new_connection()
+            elif self.ping_interval is not None and time.monotonic() - last_used >= self.ping_interval:
+                if not db.ping():
+                    db.reconnect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return db
+
+    def release(self, db: Database, discard: bool = False) -> None:
+        """
+        puts a connection back into the pool
+
+        :param db: the connection returned by :meth:`acquire`
+        :param discard: if True, the connection is closed instead of being reused
+        """
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((db, time.monotonic()))
+                db = None
+            self._cond.notify()
+
+        if db is not None:
+            try:
+                db.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self, timeout: float = None) -> Iterator[Database]:
+        db = self.acquire(timeout)
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for db, _ in idle:
+            try:
+                db.close()
+            except Exception:
+                pass
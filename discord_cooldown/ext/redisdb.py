@@ -0,0 +1,482 @@
+from discord_cooldown.ext.base import Cooldowns, Options
+from discord_cooldown.ext.buckets import Bucket
+from discord_cooldown.ext.cache import CacheKey, CooldownCache
+from discord_cooldown.ext.clock import Clock
+from discord_cooldown.ext.strategies import Strategy, decide_all
+from discord_cooldown.modules import Redis
+
+import functools
+import re
+
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from datetime import timedelta
+
+__all__ = [
+    "RedisDatabase",
+    "RedisCooldowns"
+]
+
+# the scripts of `Strategy`, the same checks as `decide`
+# KEYS[1]: the cooldown, ARGV: now, rate, expires_at, guild_id
+# returns 0 if the use is allowed, else when it can be retried in epoch milliseconds
+_HIT_SCRIPT = """
+local data = redis.call('HMGET', KEYS[1], 'count', 'expires_at')
+local count, expires_at = tonumber(data[1]), tonumber(data[2])
+if count == nil or expires_at < tonumber(ARGV[1]) then
+    redis.call('HSET', KEYS[1], 'guild_id', ARGV[4], 'rate', ARGV[2], 'count', 1, 'previous', 0, 'expires_at', ARGV[3])
+    redis.call('PEXPIREAT', KEYS[1], ARGV[3])
+    return 0
+end
+if count < tonumber(ARGV[2]) then
+    redis.call('HSET', KEYS[1], 'guild_id', ARGV[4], 'rate', ARGV[2], 'count', count + 1)
+    return 0
+end
+return expires_at
+"""
+
+# the expiry is the theoretical arrival time of the next use
+_GCRA_SCRIPT = """
+local now, rate, expires_at = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local window = expires_at - now
+local interval = math.max(math.floor(window / rate), 1)
+local arrival = math.max(tonumber(redis.call('HGET', KEYS[1], 'expires_at')) or now, now)
+if arrival + interval - now > window then
+    return arrival + interval - window
+end
+redis.call('HSET', KEYS[1], 'guild_id', ARGV[4], 'rate', rate, 'count', 0, 'previous', 0,
+           'expires_at', arrival + interval)
+redis.call('PEXPIREAT', KEYS[1], arrival + interval)
+return 0
+"""
+
+# the windows are aligned on multiples of their size, the key expires once its window is no longer the previous one
+_SLIDING_WINDOW_SCRIPT = """
+local now, rate, expires_at = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local window = expires_at - now
+local finish = now - now % window + window
+local data = redis.call('HMGET', KEYS[1], 'count', 'previous', 'expires_at')
+local count, previous, expiry = 0, 0, tonumber(data[3])
+if expiry ~= nil and expiry - window > now then
+    count, previous = tonumber(data[1]), tonumber(data[2])
+elseif expiry ~= nil and expiry > now then
+    previous = tonumber(data[1])
+end
+if previous * (finish - now) + (count + 1) * window <= rate * window then
+    redis.call('HSET', KEYS[1], 'guild_id', ARGV[4], 'rate', rate, 'count', count + 1, 'previous', previous,
+               'expires_at', finish + window)
+    redis.call('PEXPIREAT', KEYS[1], finish + window)
+    return 0
+end
+if count < rate then
+    return finish - math.floor((rate - count - 1) * window / previous)
+end
+return finish + window - math.floor((rate - 1) * window / count)
+"""
+
+_HIT_SCRIPTS = {
+    Strategy.fixed_window: _HIT_SCRIPT,
+    Strategy.gcra: _GCRA_SCRIPT,
+    Strategy.sliding_window: _SLIDING_WINDOW_SCRIPT,
+}
+
+# KEYS[1]: the cooldown, returns the count left
+_RESET_SCRIPT = """
+local count = tonumber(redis.call('HGET', KEYS[1], 'count'))
+if count == nil then
+    return 0
+end
+if count > 1 then
+    redis.call('HSET', KEYS[1], 'count', count - 1)
+    return count - 1
+end
+redis.call('DEL', KEYS[1])
+return 0
+"""
+
+# KEYS[1]: the cooldown, ARGV: guild_id, rate, count, expires_at, previous. Returns 1 if it was inserted
+_INSERT_MISSING_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'guild_id', ARGV[1], 'rate', ARGV[2], 'count', ARGV[3], 'expires_at', ARGV[4],
+           'previous', ARGV[5])
+redis.call('PEXPIREAT', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def _escape(text: str) -> str:
+    # a literal in a SCAN glob
+    return re.sub(r"([*?\[\]\\])", r"\\\1", text)
+
+
+class RedisDatabase:
+    def __init__(self, config: Redis):
+        """
+        asyncio connection to a Redis server, with the scripts used by :class:`RedisCooldowns` registered
+
+        :param config: the :class:`Redis` config
+        """
+
+        self.config = config
+        self.fmtr: str = config.fmtr
+        self.table_prefix: str = config.table_prefix
+
+        self.client: Any = None
+        self._owned = False
+
+        self.hit_scripts: Dict[Strategy, Any] = {}
+        self.reset_script: Any = None
+        self.insert_missing_script: Any = None
+
+    async def connect(self) -> None:
+        if self.config.client is not None:
+            self.client = self.config.client
+        else:
+            from redis import asyncio as redis
+
+            self.client = redis.Redis(**self.config.kwargs)
+            self._owned = True
+
+        # run with EVALSHA, the script is sent again only if the server doesn't know it
+        self.hit_scripts = {strategy: self.client.register_script(script) for strategy, script in _HIT_SCRIPTS.items()}
+        self.reset_script = self.client.register_script(_RESET_SCRIPT)
+        self.insert_missing_script = self.client.register_script(_INSERT_MISSING_SCRIPT)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None
+
+    def pipeline(self, transaction: bool = False) -> Any:
+        """
+        Returns a pipeline, which sends the commands queued on it in one round trip
+        """
+
+        return self.client.pipeline(transaction=transaction)
+
+    async def close(self) -> None:
+        # a client given through the config belongs to the caller
+        if self._owned:
+            close = getattr(self.client, "aclose", None) or self.client.close
+            await close()
+
+        self.client = None
+        self._owned = False
+
+
+class RedisCooldowns(Cooldowns):
+    def __init__(
+        self, db: RedisDatabase, timezone: timedelta = None, cache: CooldownCache = None, clock: Clock = None
+    ):
+        """
+        :class:`Cooldowns` kept in Redis instead of a table
+
+        Every cooldown is a hash `<prefix>:<bucket>:<user_id>:<scope_id>:<command>` holding its guild ID, rate, count
+        and expiry in UTC epoch milliseconds, which Redis deletes by itself once it expires (`PEXPIREAT`), so there
+        is nothing to clean up. A use is checked and counted by one script, atomic for every process sharing the
+        server.
+
+        :param db: the connection to use
+        :param timezone: the timedelta used for :attr:`Options.expires_at`, by default UTC
+        :param cache: an optional in-process cache, written through by every update
+        :param clock: the time of the cooldowns, see :class:`Clock`
+        """
+
+        super().__init__(db, timezone, cache, clock)
+        self._redis = db
+
+    def _key(self, type: int, user_id: int, scope_id: int, command_name: str) -> str:
+        return f"{self._table_prefix}:{type}:{user_id}:{scope_id}:{command_name}"
+
+    def enable_write_behind(self, flush_interval: float = 1.0, max_pending: int = 1000):
+        raise ValueError("Excepted a database config for write-behind mode, got Redis instead")
+
+    async def create_tables(self) -> None:
+        pass
+
+    async def load_schema(self) -> None:
+        pass
+
+    async def get(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> Optional[Options]:
+        key = (type.value, user_id, scope_id, command_name)
+        if self.cache is not None:
+            options = self.cache.get(key, self.from_millis(self.clock.now()))
+            if options is not None:
+                return options
+
+        return await self._reads.do(key, functools.partial(self._load, type, user_id, scope_id, command_name))
+
+    async def _load(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> Optional[Options]:
+        key = (type.value, user_id, scope_id, command_name)
+        rate, count, expires_at, previous = await self._redis.client.hmget(
+            self._key(*key), "rate", "count", "expires_at", "previous"
+        )
+        if rate is None:
+            return None
+
+        options = Options.from_millis(int(rate), int(count), type, int(expires_at), self.timezone, int(previous or 0))
+        # a cooldown removed or reset while it was read isn't cached with its old state
+        if self.cache is not None and self._reads.is_current(key):
+            self.cache.put(key, options)
+        return options
+
+    async def set(
+        self, type: Bucket, user_id: int, scope_id: int, command_name: str, options: Options, guild_id: int = 0
+    ) -> None:
+        key = (type.value, user_id, scope_id, command_name)
+        expires_at = options.to_millis(self.timezone)
+
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(self._key(*key), mapping={
+            "guild_id": guild_id, "rate": options.rate, "count": options.count, "expires_at": expires_at,
+            "previous": options.previous
+        })
+        pipe.pexpireat(self._key(*key), expires_at)
+        await pipe.execute()
+
+        self._reads.forget(key)
+        if self.cache is not None:
+            self.cache.put(key, options)
+
+    async def remove(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        key = (type.value, user_id, scope_id, command_name)
+        await self._redis.client.delete(self._key(*key))
+
+        self._reads.forget(key)
+        if self.cache is not None:
+            self.cache.pop(key)
+
+    async def reset(self, type: Bucket, user_id: int, scope_id: int, command_name: str) -> None:
+        key = (type.value, user_id, scope_id, command_name)
+        await self._redis.reset_script(keys=[self._key(*key)])
+
+        self._reads.forget(key)
+        if self.cache is not None:
+            self.cache.pop(key)
+
+    async def _hit(
+        self, key: Tuple[int, int, int, str], now: int, rate: int, expires_at: int, guild_id: int,
+        strategy: Strategy = Strategy.fixed_window
+    ) -> Optional[int]:
+        retry = await self._redis.hit_scripts[strategy](keys=[self._key(*key)], args=[now, rate, expires_at, guild_id])
+        return int(retry) or None
+
+    async def _hit_many(
+        self, entries: List[Tuple[CacheKey, int, int, int]], now: int, strategy: Strategy
+    ) -> Optional[int]:
+        # checked in python like the scripts, the writes only apply if none of the watched keys changed in between
+        from redis.exceptions import WatchError
+
+        names = [self._key(*key) for key, *_ in entries]
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(*names)
+                    states = []
+                    for name in names:
+                        count, previous, expires_at = await pipe.hmget(name, "count", "previous", "expires_at")
+                        states.append(
+                            None if expires_at is None else (int(count), int(previous or 0), int(expires_at))
+                        )
+
+                    new, retry = decide_all(
+                        strategy, states, now, [(rate, expires_at) for _, rate, expires_at, _ in entries]
+                    )
+                    if new is None:
+                        return retry
+
+                    pipe.multi()
+                    for name, (key, rate, _, guild_id), (count, previous, expires_at) in zip(names, entries, new):
+                        pipe.hset(name, mapping={
+                            "guild_id": guild_id, "rate": rate, "count": count, "expires_at": expires_at,
+                            "previous": previous
+                        })
+                        pipe.pexpireat(name, expires_at)
+                    await pipe.execute()
+                    return None
+                except WatchError:
+                    # another process changed one of them, check again
+                    continue
+
+    async def insert_missing(
+        self, type: Bucket, cooldowns: Iterable[Tuple[int, int, str, Options]]
+    ) -> int:
+        now = self.from_millis(self.clock.now())
+
+        # sent in one round trip
+        pipe = self._redis.pipeline()
+        inserted = 0
+        for user_id, scope_id, command_name, options in cooldowns:
+            if options.expires_at <= now:
+                continue
+
+            inserted += 1
+            guild_id = scope_id if type.value == Bucket.guild else 0
+            await self._redis.insert_missing_script(
+                keys=[self._key(type.value, user_id, scope_id, command_name)],
+                args=[guild_id, options.rate, options.count, options.to_millis(self.timezone), options.previous],
+                client=pipe
+            )
+
+        if inserted:
+            await pipe.execute()
+        return inserted
+
+    async def delete_expired(self, batch_size: int = 1000) -> int:
+        # the keys expire by themselves
+        return 0
+
+    async def optimize(self) -> None:
+        pass
+
+    def _pattern(self, type: str = "[0-9]", user_id: str = "*", command_name: str = "*") -> str:
+        # the key glob, `*` may span several fields so the matches are parsed again with `_fields`
+        return f"{_escape(self._table_prefix)}:{type}:{user_id}:*:{command_name}"
+
+    def _fields(self, key: Any) -> Tuple[int, int, int, str]:
+        key = key.decode() if isinstance(key, bytes) else key
+        bucket, user_id, scope_id, command_name = key[len(self._table_prefix) + 1:].split(":", 3)
+        return int(bucket), int(user_id), int(scope_id), command_name
+
+    async def _scan(self, match: str, batch_size: int) -> AsyncIterator[List[Any]]:
+        # the keys matching a glob, in batches of about `batch_size` keys
+        batch: List[Any] = []
+        async for key in self._redis.client.scan_iter(match=match, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    async def _unlink_where(
+        self, match: str, batch_size: int, where: Callable[[Tuple[int, int, int, str]], bool] = None
+    ) -> int:
+        deleted = 0
+        async for batch in self._scan(match, batch_size):
+            if where is not None:
+                batch = [key for key in batch if where(self._fields(key))]
+            if batch:
+                deleted += await self._redis.client.unlink(*batch)
+
+        self._reads.clear()
+        if self.cache is not None:
+            self.cache.clear()
+        return deleted
+
+    async def remove_command(self, command_name: str, type: Bucket = None, batch_size: int = 1000) -> int:
+        """
+        Removes the cooldowns of a command for every user, the keys are scanned and unlinked `batch_size` at a time
+
+        :return: number of cooldowns removed
+        """
+
+        match = self._pattern(type="[0-9]" if type is None else str(type.value), command_name=_escape(command_name))
+        return await self._unlink_where(match, batch_size, lambda fields: fields[3] == command_name)
+
+    async def remove_guild(self, guild_id: int, batch_size: int = 1000) -> int:
+        """
+        Removes the cooldowns stored with this guild ID, their `guild_id` is read `batch_size` keys per round trip
+
+        :return: number of cooldowns removed
+        """
+
+        deleted = 0
+        async for batch in self._scan(self._pattern(), batch_size):
+            pipe = self._redis.pipeline()
+            for key in batch:
+                pipe.hget(key, "guild_id")
+            guild_ids = await pipe.execute()
+
+            batch = [
+                key for key, guild_id_ in zip(batch, guild_ids) if guild_id_ is not None and int(guild_id_) == guild_id
+            ]
+            if batch:
+                deleted += await self._redis.client.unlink(*batch)
+
+        self._reads.clear()
+        if self.cache is not None:
+            self.cache.clear()
+        return deleted
+
+    async def remove_user(self, user_id: int, batch_size: int = 1000) -> int:
+        """
+        Removes the cooldowns of a user for every command and type
+
+        :return: number of cooldowns removed
+        """
+
+        return await self._unlink_where(
+            self._pattern(user_id=str(user_id)), batch_size, lambda fields: fields[1] == user_id
+        )
+
+    async def user_cooldowns(self, user_id: int, batch_size: int = 1000) -> List[Tuple[Bucket, int, str, Options]]:
+        now = self.clock.now()
+
+        cooldowns = []
+        async for batch in self._scan(self._pattern(user_id=str(user_id)), batch_size):
+            keys = [self._fields(key) for key in batch]
+            pipe = self._redis.pipeline()
+            for key in batch:
+                pipe.hmget(key, "rate", "count", "expires_at", "previous")
+
+            for (bucket, user_id_, scope_id, command_name), data in zip(keys, await pipe.execute()):
+                rate, count, expires_at, previous = data
+                if user_id_ != user_id or rate is None or int(expires_at) < now:
+                    continue
+
+                type = Bucket(bucket)
+                cooldowns.append((type, scope_id, command_name, Options.from_millis(
+                    int(rate), int(count), type, int(expires_at), self.timezone, int(previous or 0)
+                )))
+
+        cooldowns.sort(key=lambda cooldown: cooldown[3].expires_at)
+        return cooldowns
+
+    async def rows(
+        self, batch_size: int = 1000, after: CacheKey = None
+    ) -> AsyncIterator[List[Tuple[Any, ...]]]:
+        if after is not None:
+            raise ValueError("Excepted after=None, the keys of Redis are scanned in no particular order")
+
+        now = self.clock.now()
+        async for keys in self._scan(self._pattern(), batch_size):
+            pipe = self._redis.pipeline()
+            for key in keys:
+                pipe.hmget(key, "guild_id", "rate", "count", "expires_at", "previous")
+
+            batch = []
+            for key, (guild_id, rate, count, expires_at, previous) in zip(keys, await pipe.execute()):
+                if rate is None or int(expires_at) < now:
+                    continue
+
+                batch.append(self._fields(key) + (
+                    int(guild_id or 0), int(rate), int(count), int(expires_at), int(previous or 0)
+                ))
+            yield batch
+
+    async def insert_rows(self, rows: List[Tuple[Any, ...]]) -> int:
+        # sent in one round trip
+        pipe = self._redis.pipeline()
+        for bucket, user_id, scope_id, command_name, guild_id, rate, count, expires_at, previous in rows:
+            await self._redis.insert_missing_script(
+                keys=[self._key(bucket, user_id, scope_id, command_name)],
+                args=[guild_id, rate, count, expires_at, previous], client=pipe
+            )
+
+        if rows:
+            await pipe.execute()
+            self._reads.clear()
+            if self.cache is not None:
+                self.cache.clear()
+        return len(rows)
+
+    async def clear(self, batch_size: int = 1000) -> int:
+        """
+        Deletes every cooldown under the key prefix, `batch_size` keys per round trip
+
+        :return: number of cooldowns deleted
+        """
+
+        return await self._unlink_where(f"{_escape(self._table_prefix)}:*", batch_size)
@@ -0,0 +1,72 @@
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+__all__ = [
+    "StatementCache"
+]
+
+
+class StatementCache:
+    def __init__(self, max_size: int = 128, counters: Counter = None, on_evict: Callable[[str, Any], None] = None):
+        """
+        A bounded LRU of the statements prepared on one connection, keyed by query
+
+        The queries are rendered once per table and operation (the command is a bound value), so the key is the query
+        text. What is stored depends on the driver: a prepared cursor for mysql-connector, the name of a `PREPARE`d
+        statement for psycopg2, nothing for the drivers which cache statements themselves (sqlite3, asyncpg).
+
+        :param max_size: maximum number of statements kept prepared
+        :param counters: hits/misses/evictions counters, may be shared by the connections of a pool
+        :param on_evict: called with the query and the statement dropped from the cache, to free it
+        """
+
+        if max_size < 1:
+            raise ValueError(f"Excepted max_size >= 1, got {max_size} instead")
+
+        self.max_size = max_size
+        self.counters: Counter = Counter() if counters is None else counters
+        self._on_evict = on_evict
+        self._statements: "OrderedDict[str, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def lookup(self, query: str) -> Tuple[bool, Optional[Any]]:
+        """
+        Returns whether the query is already prepared, and its statement
+        """
+
+        statement = self._statements.get(query, self)
+        if statement is self:
+            self.counters["misses"] += 1
+            return False, None
+
+        self._statements.move_to_end(query)
+        self.counters["hits"] += 1
+        return True, statement
+
+    def add(self, query: str, statement: Any = None) -> None:
+        self._statements[query] = statement
+        if len(self._statements) > self.max_size:
+            query, statement = self._statements.popitem(last=False)
+            self.counters["evictions"] += 1
+            if self._on_evict is not None:
+                self._on_evict(query, statement)
+
+    def clear(self) -> None:
+        """
+        Forgets the statements, e.g. after a reconnect
+        """
+
+        self._statements.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        hits, misses and evictions (of all the connections sharing the counters) and size of this cache
+        """
+
+        return {
+            "hits": self.counters["hits"], "misses": self.counters["misses"],
+            "evictions": self.counters["evictions"], "size": len(self._statements),
+        }
@@ -0,0 +1,124 @@
+from enum import Enum
+from typing import List, Optional, Sequence, Tuple
+
+__all__ = [
+    "Strategy",
+    "decide",
+    "decide_all"
+]
+
+# count, previous, expires_at (epoch milliseconds) of a stored cooldown
+State = Tuple[int, int, int]
+
+
+class Strategy(Enum):
+    """
+    The algorithms a cooldown can limit the uses with, every one keeps at most two integers and an expiry per key
+
+    - `fixed_window`: `rate` uses until the window ends. Allows bursts of 2 * `rate` around the end of a window.
+    - `sliding_window`: the uses of the current window plus those of the previous one, weighted by how much of it
+      still overlaps the last `per` seconds.
+    - `gcra`: the generic cell rate algorithm, one use every `per / rate` seconds with bursts of up to `rate` uses.
+      Only keeps the "theoretical arrival time" of the next use, in `expires_at`.
+    """
+
+    fixed_window = "fixed_window"
+    sliding_window = "sliding_window"
+    gcra = "gcra"
+
+
+def _fixed_window(state: Optional[State], now: int, rate: int, expires_at: int) -> Tuple[Optional[State], int]:
+    if state is None or state[2] < now:
+        return (1, 0, expires_at), 0
+
+    count, previous, expiry = state
+    if count < rate:
+        return (count + 1, previous, expiry), 0
+
+    return None, expiry
+
+
+def _sliding_window(state: Optional[State], now: int, rate: int, expires_at: int) -> Tuple[Optional[State], int]:
+    # the windows are aligned on multiples of their size, a key expires once its window is no longer the previous one
+    window = expires_at - now
+    start = now - now % window
+    end = start + window
+
+    count = previous = 0
+    if state is not None:
+        if state[2] - window > now:
+            count, previous = state[0], state[1]
+        elif state[2] > now:
+            previous = state[0]
+
+    if previous * (end - now) + (count + 1) * window <= rate * window:
+        return (count + 1, previous, end + window), 0
+
+    if count < rate:
+        # once enough of the previous window slid out
+        return None, end - (rate - count - 1) * window // previous
+
+    # in the next window, where this one is the previous
+    return None, end + window - (rate - 1) * window // count
+
+
+def _gcra(state: Optional[State], now: int, rate: int, expires_at: int) -> Tuple[Optional[State], int]:
+    window = expires_at - now
+    interval = max(window // rate, 1)
+
+    arrival = now if state is None else max(state[2], now)
+    if arrival + interval - now > window:
+        return None, arrival + interval - window
+
+    return (0, 0, arrival + interval), 0
+
+
+_DECIDE = {
+    Strategy.fixed_window: _fixed_window,
+    Strategy.sliding_window: _sliding_window,
+    Strategy.gcra: _gcra,
+}
+
+
+def decide(
+    strategy: Strategy, state: Optional[State], now: int, rate: int, expires_at: int
+) -> Tuple[Optional[State], int]:
+    """
+    Checks one use against a stored cooldown, what the database statements and scripts do in one write
+
+    :param strategy: the algorithm
+    :param state: (count, previous, expires_at) of the stored cooldown, None if there is none
+    :param now: the current time in epoch milliseconds
+    :param rate: The number of times a command can be used before triggering a cooldown.
+    :param expires_at: the expiry of a new fixed window, `expires_at - now` is the window of the other algorithms
+    :return: the state to store if the use is allowed (else None) and the time it can be retried if it's not
+    """
+
+    return _DECIDE[strategy](state, now, rate, expires_at)
+
+
+def decide_all(
+    strategy: Strategy, states: Sequence[Optional[State]], now: int, limits: Sequence[Tuple[int, int]]
+) -> Tuple[Optional[List[State]], int]:
+    """
+    Checks one use against several cooldowns at once, it only counts if every one of them allows it
+
+    :param strategy: the algorithm
+    :param states: (count, previous, expires_at) of every stored cooldown, None for those there are none of
+    :param now: the current time in epoch milliseconds
+    :param limits: (rate, expires_at) of every cooldown, in the order of `states`, see :func:`decide`
+    :return: the states to store if the use is allowed (else None) and the latest time it can be retried if it's not
+    """
+
+    new: List[State] = []
+    retry = 0
+    for state, (rate, expires_at) in zip(states, limits):
+        state, retry_at = decide(strategy, state, now, rate, expires_at)
+        if state is None:
+            retry = max(retry, retry_at or now)
+        else:
+            new.append(state)
+
+    if retry:
+        return None, retry
+    return new, 0
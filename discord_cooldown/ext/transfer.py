@@ -0,0 +1,184 @@
+from discord_cooldown.ext.base import Cooldowns
+
+import asyncio
+import csv
+import io
+import json
+import os
+
+from typing import Any, Dict, List, Optional, Tuple
+
+__all__ = [
+    "FIELDS",
+    "export_cooldowns",
+    "import_cooldowns"
+]
+
+# the columns of the entries table, in the order of :meth:`Cooldowns.rows`
+FIELDS = ("bucket", "user_id", "scope_id", "command", "guild_id", "rate", "count", "expires_at", "previous")
+_FORMATS = ("ndjson", "csv")
+
+
+def _format(filename: str, format: Optional[str]) -> str:
+    if format is None:
+        format = "csv" if filename.endswith(".csv") else "ndjson"
+    if format not in _FORMATS:
+        raise ValueError(f"Excepted one of {', '.join(_FORMATS)} for format, got {format} instead")
+    return format
+
+
+def _load_checkpoint(checkpoint: Optional[str]) -> Optional[Dict[str, Any]]:
+    if checkpoint is None or not os.path.exists(checkpoint):
+        return None
+
+    with open(checkpoint) as file:
+        return json.load(file)
+
+
+def _save_checkpoint(checkpoint: Optional[str], state: Dict[str, Any]) -> None:
+    # replaced atomically, so that it always matches data which is on disk
+    if checkpoint is None:
+        return
+
+    with open(f"{checkpoint}.tmp", "w") as file:
+        json.dump(state, file)
+    os.replace(f"{checkpoint}.tmp", checkpoint)
+
+
+def _encode(rows: List[Tuple[Any, ...]], format: str, header: bool = False) -> bytes:
+    if format == "ndjson":
+        return b"".join(json.dumps(dict(zip(FIELDS, row))).encode() + b"\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _decode(line: bytes, format: str) -> Optional[Tuple[Any, ...]]:
+    text = line.decode().rstrip("\r\n")
+    if not text:
+        return None
+
+    if format == "ndjson":
+        data = json.loads(text)
+        values = [data[field] for field in FIELDS]
+    else:
+        values = next(csv.reader([text]))
+        if values == list(FIELDS):
+            return None
+
+    return tuple(value if field == "command" else int(value) for field, value in zip(FIELDS, values))
+
+
+def _read_record(file: Any, format: str) -> bytes:
+    # a quoted CSV field (a command name) may hold newlines, its record then goes on over the next lines until
+    # its quotes are balanced, so that the position kept in the checkpoint is always the start of a record
+    record = file.readline()
+    if format == "csv":
+        while record.count(b'"') % 2:
+            line = file.readline()
+            if not line:
+                break
+            record += line
+
+    return record
+
+
+async def export_cooldowns(
+    cooldowns: Cooldowns, filename: str, format: str = None, batch_size: int = 1000, checkpoint: str = None
+) -> int:
+    """
+    Writes the unexpired cooldowns to a NDJSON or CSV file, `batch_size` rows at a time
+
+    The rows are read in pages ordered by their key (see :meth:`Cooldowns.rows`), so any number of them is exported
+    in bounded memory while the bot keeps running. With a `checkpoint` file, the last exported key and the size of
+    the file are saved after every batch, and an interrupted export continues from there when run again (except
+    from Redis, whose keys are scanned in no particular order). The checkpoint is removed once the export is complete.
+
+    :param cooldowns: the :class:`Cooldowns` to read
+    :param filename: the file to write, replaced unless an export is continued
+    :param format: `ndjson` or `csv`, by default from the extension of the file
+    :param batch_size: number of rows read per query
+    :param checkpoint: the file keeping the progress, if the export has to be restartable
+    :return: number of cooldowns in the file
+    """
+
+    format = _format(filename, format)
+    state = _load_checkpoint(checkpoint) or {"offset": 0, "after": None, "rows": 0}
+
+    with open(filename, "r+b" if state["offset"] else "wb") as file:
+        # drop whatever was written after the checkpoint
+        file.truncate(state["offset"])
+        file.seek(state["offset"])
+        if not state["offset"] and format == "csv":
+            file.write(_encode([], format, header=True))
+
+        after = None if state["after"] is None else tuple(state["after"])
+        async for rows in cooldowns.rows(batch_size, after=after):
+            if not rows:
+                continue
+
+            file.write(_encode(rows, format))
+            file.flush()
+            os.fsync(file.fileno())
+
+            state = {"offset": file.tell(), "after": list(rows[-1][:4]), "rows": state["rows"] + len(rows)}
+            _save_checkpoint(checkpoint, state)
+            # let the checks run between two batches
+            await asyncio.sleep(0)
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return state["rows"]
+
+
+async def import_cooldowns(
+    cooldowns: Cooldowns, filename: str, format: str = None, batch_size: int = 1000, checkpoint: str = None
+) -> int:
+    """
+    Adds the cooldowns of a file written by :func:`export_cooldowns`, `batch_size` rows per transaction
+
+    The file is streamed, and every batch is written with the fastest bulk path of the backend (see
+    :meth:`Cooldowns.insert_rows`). Cooldowns which are already stored are kept, as they are newer, and the expired
+    ones are skipped. With a `checkpoint` file, the position in the file is saved after every batch, and an
+    interrupted import continues from there when run again. The checkpoint is removed once the import is complete.
+
+    :param cooldowns: the :class:`Cooldowns` to write to
+    :param filename: the file to read
+    :param format: `ndjson` or `csv`, by default from the extension of the file
+    :param batch_size: number of rows written per transaction
+    :param checkpoint: the file keeping the progress, if the import has to be restartable
+    :return: number of unexpired cooldowns read
+    """
+
+    format = _format(filename, format)
+    state = _load_checkpoint(checkpoint) or {"offset": 0, "rows": 0}
+    now = cooldowns.clock.now()
+
+    with open(filename, "rb") as file:
+        file.seek(state["offset"])
+        batch: List[Tuple[Any, ...]] = []
+        while True:
+            line = _read_record(file, format)
+            if line:
+                row = _decode(line, format)
+                if row is not None and row[7] >= now:
+                    batch.append(row)
+                if len(batch) < batch_size:
+                    continue
+
+            if batch:
+                await cooldowns.insert_rows(batch)
+                state = {"offset": file.tell(), "rows": state["rows"] + len(batch)}
+                _save_checkpoint(checkpoint, state)
+                batch = []
+                await asyncio.sleep(0)
+            if not line:
+                break
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return state["rows"]
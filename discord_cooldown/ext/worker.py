@@ -0,0 +1,239 @@
+from discord_cooldown.ext.database import Database, _Configs, ResultSet
+from discord_cooldown.ext.pool import ConnectionPool
+
+import asyncio
+import queue
+import threading
+
+from typing import Tuple, Any, List, Optional
+
+__all__ = [
+    "DatabaseWorker"
+]
+
+
+# statements which can't run in the transaction of a batch: SQLite refuses a VACUUM in a transaction and MySQL commits
+# it before an OPTIMIZE TABLE. They are run in a batch of their own.
+_STANDALONE = ("VACUUM", "OPTIMIZE")
+
+
+class _Request:
+    __slots__ = ("query", "values", "fetch", "many", "future", "loop")
+
+    def __init__(
+        self, query: str, values: Any, fetch: Optional[str], loop: asyncio.AbstractEventLoop, many: bool = False
+    ):
+        self.query = query
+        self.values = values
+        self.fetch = fetch
+        self.many = many
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+
+    @property
+    def standalone(self) -> bool:
+        return self.query.lstrip().upper().startswith(_STANDALONE)
+
+    def execute(self, db: Database) -> ResultSet:
+        return db._execute(self.query, self.values, self.fetch, self.many)
+
+    def commit(self, db: Database) -> ResultSet:
+        return db._commit(self.query, self.values, self.fetch, self.many)
+
+
+class _ReadModifyWrite(_Request):
+    # `values` holds the arguments of :meth:`Database.read_modify_write`
+    __slots__ = ()
+
+    def execute(self, db: Database) -> Any:
+        return db._read_modify_write(*self.values)
+
+    def commit(self, db: Database) -> Any:
+        return db._commit_read_modify_write(*self.values)
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
+
+
+_STOP = object()
+
+
+class DatabaseWorker:
+    def __init__(self, config: _Configs, workers: int = None, max_batch: int = 64, statement_cache_size: int = 128):
+        """
+        Runs the blocking database drivers on dedicated worker threads fed by a queue
+
+        Every worker takes a connection from a :class:`ConnectionPool`, drains whatever is queued (up to `max_batch`
+        requests) and runs it in a single pass with one commit at the end, so several SELECTs are answered together
+        and the writes are grouped into one transaction. SQlite always uses a single worker, so only one connection
+        ever writes to the file. `VACUUM` and `OPTIMIZE TABLE`, which can't run in a transaction, are run alone.
+
+        :param config: the database config which you want to use
+        :param workers: number of worker threads, by default the `max_size` of the pool
+        :param max_batch: maximum number of requests executed in one transaction
+        :param statement_cache_size: maximum number of statements kept prepared per connection
+        """
+
+        self.config: _Configs = config
+        self.pool = ConnectionPool(config, statement_cache_size)
+        self.workers = self.pool.max_size if workers is None else max(1, min(workers, self.pool.max_size))
+        self.max_batch = max_batch
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    async def start(self) -> None:
+        """
+        opens the connection pool and starts the workers
+        """
+
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.open)
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"discord-cooldown-db-{i}", daemon=True)
+            thread.start()
+
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        stop = False
+        # a standalone request taken while draining, run once the batch before it is committed
+        next_request: Optional[_Request] = None
+        while not stop:
+            request = self._queue.get() if next_request is None else next_request
+            next_request = None
+            if request is _STOP:
+                break
+
+            batch = [request]
+            while not request.standalone and len(batch) < self.max_batch:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if request is _STOP:
+                    stop = True
+                    break
+                if request.standalone:
+                    next_request = request
+                    break
+                batch.append(request)
+
+            try:
+                db = self.pool.acquire()
+            except Exception as exc:
+                for request in batch:
+                    request.loop.call_soon_threadsafe(_set_exception, request.future, exc)
+                continue
+
+            try:
+                self._run_batch(db, batch)
+            finally:
+                self.pool.release(db)
+
+    @staticmethod
+    def _run_batch(db: Database, batch: List[_Request]) -> None:
+        results: List[ResultSet] = []
+        try:
+            for request in batch:
+                results.append(request.execute(db))
+
+            db.conn.commit()
+        except Exception:
+            try:
+                db.conn.rollback()
+            except Exception:
+                pass
+
+            if not db.ping():
+                # the server dropped the connection, reconnect before replaying the requests
+                try:
+                    db.reconnect()
+                except Exception as exc:
+                    for request in batch:
+                        request.loop.call_soon_threadsafe(_set_exception, request.future, exc)
+                    return
+
+            # one of the statements failed, run them one by one so that only that request gets the error, waiting
+            # for the lock of a SQlite file shared with other processes
+            for request in batch:
+                try:
+                    data = db.retry_locked(request.commit, db)
+                except Exception as exc:
+                    try:
+                        db.conn.rollback()
+                    except Exception:
+                        pass
+                    request.loop.call_soon_threadsafe(_set_exception, request.future, exc)
+                else:
+                    request.loop.call_soon_threadsafe(_set_result, request.future, data)
+            return
+
+        for request, data in zip(batch, results):
+            request.loop.call_soon_threadsafe(_set_result, request.future, data)
+
+    def submit(self, query: str, values: Tuple[Any, ...] = (), fetch: Optional[str] = None) -> asyncio.Future:
+        """
+        queues a query and returns the future which will hold its result
+
+        :param query: the sql query
+        :param values: the values for the query placeholders
+        :param fetch: one of `one`, `many`, `all`, `lastrowid`, `rowcount` or None if nothing has to be fetched
+        """
+
+        request = _Request(query, values, fetch, asyncio.get_running_loop())
+        self._queue.put(request)
+
+        return request.future
+
+    async def execute(
+        self, query: str, values: Tuple[Any, ...] = (),
+        *, fetch: str = "one",
+    ) -> ResultSet:
+        return await self.submit(query, values, fetch)
+
+    async def run(self, query: str, values: Tuple[Any, ...] = (), *, fetch: str = None) -> ResultSet:
+        return await self.submit(query, values, fetch)
+
+    async def run_many(self, query: str, values: List[Tuple[Any, ...]]) -> None:
+        request = _Request(query, values, None, asyncio.get_running_loop(), many=True)
+        self._queue.put(request)
+
+        await request.future
+
+    async def read_modify_write(self, *args: Any) -> Any:
+        """
+        queues a :meth:`AsyncDatabase.read_modify_write`, run in the transaction of the batch it's taken with
+        """
+
+        request = _ReadModifyWrite("", args, None, asyncio.get_running_loop())
+        self._queue.put(request)
+
+        return await request.future
+
+    async def close(self) -> None:
+        """
+        lets the workers finish the queued requests and stops them
+        """
+
+        for _ in self._threads:
+            self._queue.put(_STOP)
+
+        loop = asyncio.get_running_loop()
+        for thread in self._threads:
+            await loop.run_in_executor(None, thread.join)
+
+        self._threads.clear()
+        self.pool.close()
@@ -0,0 +1,185 @@
+from discord_cooldown.ext.database import AsyncDatabase
+
+import asyncio
+import logging
+
+from typing import Any, Dict, Optional, Set, Tuple
+
+__all__ = [
+    "WriteBehind"
+]
+
+_log = logging.getLogger(__name__)
+
+# (bucket, user_id, scope_id, command_name)
+_Key = Tuple[int, int, int, str]
+# the values of the upsert query: key + (guild_id, rate, count, expires_at)
+_Row = Tuple[Any, ...]
+
+
+class WriteBehind:
+    def __init__(
+        self, db: AsyncDatabase, upsert_query: str, delete_query: str,
+        flush_interval: float = 1.0, max_pending: int = 1000
+    ):
+        """
+        Keeps the cooldown updates in memory and writes them to the database in batches
+
+        Repeated updates of a cooldown are merged, only its last state is written. The pending updates are flushed
+        every `flush_interval` seconds or as soon as `max_pending` cooldowns are waiting, the deletes and upserts of a
+        flush in one transaction. If the process dies, at most the updates of the last `flush_interval` seconds (and
+        never more than `max_pending` cooldowns) are lost, call :meth:`close` on shutdown to write them. While the
+        database fails, the updates of a failed flush are kept for the next one as long as fewer than `max_pending`
+        cooldowns are waiting, the others are dropped and logged.
+
+        :param db: the database to write to
+        :param upsert_query: query which inserts or replaces one cooldown row
+        :param delete_query: query which deletes one cooldown by its key
+        :param flush_interval: seconds between two flushes
+        :param max_pending: number of pending cooldowns which triggers a flush
+        """
+
+        if flush_interval <= 0:
+            raise ValueError(f"Excepted flush_interval > 0, got {flush_interval} instead")
+        if max_pending < 1:
+            raise ValueError(f"Excepted max_pending >= 1, got {max_pending} instead")
+
+        self._db = db
+        self._upsert_query = upsert_query
+        self._delete_query = delete_query
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._upserts: Dict[_Key, _Row] = {}
+        self._deletes: Set[_Key] = set()
+        # updates being written by the current flush, still visible to `lookup` until they are committed
+        self._flushing: Dict[_Key, Optional[_Row]] = {}
+
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        number of cooldowns waiting to be written
+        """
+
+        return len(self._upserts) + len(self._deletes)
+
+    def lookup(self, key: _Key) -> Tuple[bool, Optional[_Row]]:
+        """
+        Returns whether the cooldown has an unwritten update, and its row (None if it was removed)
+        """
+
+        if key in self._upserts:
+            return True, self._upserts[key]
+        if key in self._deletes:
+            return True, None
+        if key in self._flushing:
+            return True, self._flushing[key]
+
+        return False, None
+
+    def upsert(self, key: _Key, row: _Row) -> None:
+        self._deletes.discard(key)
+        self._upserts[key] = row
+        self._check_size()
+
+    def delete(self, key: _Key) -> None:
+        self._upserts.pop(key, None)
+        self._deletes.add(key)
+        self._check_size()
+
+    def _check_size(self) -> None:
+        if self.pending >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.ensure_future(self.flush())
+            self._flush_task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: "asyncio.Future[int]") -> None:
+        # nobody awaits the flushes started by `_check_size`, their error is logged here
+        if not task.cancelled() and task.exception() is not None:
+            _log.error(
+                "failed to write %d pending cooldowns, retrying later", self.pending, exc_info=task.exception()
+            )
+
+    async def flush(self) -> int:
+        """
+        Writes the pending updates
+
+        :return: number of cooldowns written
+        """
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            upserts, deletes = self._upserts, self._deletes
+            if not upserts and not deletes:
+                return 0
+
+            self._upserts, self._deletes = {}, set()
+            self._flushing = dict(upserts)
+            self._flushing.update((key, None) for key in deletes)
+
+            try:
+                # the deletes and the upserts in one transaction, a failed flush writes none of them
+                await self._db.read_modify_write(
+                    self._delete_query, list(deletes), "", [], lambda states: (list(upserts.values()), None),
+                    self._upsert_query
+                )
+            except BaseException:
+                # put back what wasn't written, unless it was updated again in the meantime, up to `max_pending`
+                dropped = 0
+                for key, row in [*upserts.items(), *((key, None) for key in deletes)]:
+                    if key in self._upserts or key in self._deletes:
+                        continue
+                    if self.pending >= self.max_pending:
+                        dropped += 1
+                    elif row is None:
+                        self._deletes.add(key)
+                    else:
+                        self._upserts[key] = row
+                if dropped:
+                    _log.warning("dropped %d unwritten cooldown updates, max_pending is %d", dropped, self.max_pending)
+                raise
+            finally:
+                self._flushing = {}
+
+            return len(upserts) + len(deletes)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                _log.exception("failed to write %d pending cooldowns, retrying later", self.pending)
+
+    def start(self) -> None:
+        """
+        starts flushing every `flush_interval` seconds
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """
+        stops the periodic flush and writes the pending updates
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._flush_task is not None:
+            # its error was logged already
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+
+        await self.flush()
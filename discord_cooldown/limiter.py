@@ -0,0 +1,422 @@
+from discord_cooldown import ext
+from discord_cooldown.modules import *
+from discord_cooldown.ext import AsyncDatabase, Bucket, Options, Strategy
+
+import asyncio
+import time
+
+from typing import Union, Any, Callable, Dict, List, Optional, Sequence, Tuple
+from datetime import timedelta
+
+__all__ = [
+    "Limiter"
+]
+
+_ONE_DAY = 86_400_000  # milliseconds
+
+
+class Limiter:
+    def __init__(
+        self, db_config: Union[SQlite, MySQL, PostgreSQL, Memory, Redis], timezone: timedelta = None,
+        use_native: bool = True, threaded: bool = True, cache_size: int = 0,
+        write_behind: bool = False, flush_interval: float = 1.0, max_pending: int = 1000,
+        gc_interval: float = None, gc_batch_size: int = 1000, observer: ext.Observer = None,
+        clock: ext.Clock = None
+    ):
+        """
+        Cooldowns of plain integer IDs, without discord
+
+        The database is connected lazily on the first use (or :meth:`setup`), since the asyncio drivers
+        need a running event loop.
+
+        :param db_config: provide the database config which you want to use
+        :param timezone: the timedelta to use for cooldown, by default it uses UTC time
+        :param use_native: if False, the blocking database drivers are used instead of the asyncio ones
+        :param threaded: if False, the blocking database drivers run on the event loop instead of a worker thread
+        :param cache_size: if > 0, up to this many cooldowns are cached in memory, so that uses of a command which
+            is on cooldown are denied without a query. The cache isn't shared, don't enable it when several
+            processes reset the same cooldowns.
+        :param write_behind: if True, the cooldowns are updated in memory and written in batches every
+            `flush_interval` seconds or once `max_pending` cooldowns changed. Up to that many updates are lost if the
+            process dies without :meth:`close`, and the cooldowns must not be shared with other processes.
+        :param flush_interval: seconds between two writes in write-behind mode
+        :param max_pending: number of changed cooldowns which triggers a write in write-behind mode
+        :param gc_interval: if given, the expired cooldowns are deleted in the background every `gc_interval` seconds
+        :param gc_batch_size: number of expired cooldowns deleted per statement by the background task
+        :param observer: receives the timings of the checks, storage operations and statements, e.g.
+            :class:`ext.Metrics`. Nothing is timed without one.
+        :param clock: the time of the cooldowns in integer UTC epoch milliseconds, read once per check. By default
+            the system time, :class:`ext.FakeClock` lets tests and simulations move it forward instantly.
+        """
+
+        cache = ext.CooldownCache(cache_size) if cache_size > 0 else None
+        self.clock = ext.Clock() if clock is None else clock
+
+        self.db: Union[AsyncDatabase, ext.MemoryStore, ext.RedisDatabase]
+        if isinstance(db_config, Memory):
+            self.db = ext.MemoryStore(db_config)
+            self.cd = ext.MemoryCooldowns(self.db, timezone, clock=self.clock)
+        elif isinstance(db_config, Redis):
+            self.db = ext.RedisDatabase(db_config)
+            self.cd = ext.RedisCooldowns(self.db, timezone, cache=cache, clock=self.clock)
+        else:
+            self.db = AsyncDatabase(db_config, use_native=use_native, threaded=threaded)
+            self.cd = ext.Cooldowns(self.db, timezone, cache=cache, clock=self.clock)
+        self.timezone = timezone
+        self._offset = 0 if timezone is None else timezone // timedelta(milliseconds=1)
+        if write_behind:
+            self.cd.enable_write_behind(flush_interval, max_pending)
+
+        self.observer = observer
+        if observer is not None:
+            ext.instrument(self.db, self.cd, observer)
+
+        self.collector = ext.ExpiryCollector(self.cd, gc_interval or 300.0, gc_batch_size)
+        self._gc = gc_interval is not None
+
+        self._ready = False
+        self._setup_lock: Optional[asyncio.Lock] = None
+        self.preloaded: Dict[str, float] = {}
+
+    async def setup(self) -> None:
+        """
+        connects to the database and creates the required tables, called automatically on the first use
+        """
+
+        if self._ready:
+            return
+
+        if self._setup_lock is None:
+            self._setup_lock = asyncio.Lock()
+
+        async with self._setup_lock:
+            if self._ready:
+                return
+
+            if not self.db.is_connected:
+                await self.db.connect()
+
+            await self.cd.create_tables()
+            await self.cd.load_schema()
+            if self.cd.write_behind is not None:
+                self.cd.write_behind.start()
+            if self._gc:
+                self.collector.start()
+            self._ready = True
+
+    async def migrate(self, batch_size: int = 1000, drop: bool = False) -> int:
+        """
+        moves the cooldowns stored by older versions (one column per command) into the current table,
+        it can be run while the bot is online
+
+        :param batch_size: number of legacy rows copied per transaction
+        :param drop: if True, the legacy tables are dropped once everything has been copied
+        :return: number of unexpired cooldowns found in the legacy tables
+        """
+
+        await self.setup()
+        if isinstance(self.cd, (ext.MemoryCooldowns, ext.RedisCooldowns)):
+            return 0
+
+        return await ext.migrate_legacy(self.cd, batch_size, drop)
+
+    async def preload(
+        self, batch_size: int = 1000, progress: Callable[[int], Any] = None
+    ) -> Dict[str, float]:
+        """
+        Fills the cache (`cache_size`) with the unexpired cooldowns, so that after a restart the uses of commands
+        which are still on cooldown are denied without a query
+
+        The cooldowns are read `batch_size` at a time and the loop yields to the checks between two batches, it can
+        run while the bot is already online, e.g. as a task started in `setup_hook`. It stops once the cache is
+        full, cooldowns already cached by the checks in the meantime are kept.
+
+        :param batch_size: number of cooldowns read per query
+        :param progress: called with the number of cooldowns loaded so far after every batch
+        :return: the number of cooldowns loaded and read, and how long it took in seconds, also in :meth:`stats`
+        """
+
+        await self.setup()
+        cache = self.cd.cache
+        started = time.perf_counter()
+        loaded = read = 0
+
+        if cache is not None:
+            async for batch in self.cd.active(batch_size):
+                read += len(batch)
+                for key, options in batch:
+                    if len(cache) >= cache.max_entries:
+                        break
+                    if key not in cache:
+                        cache.put(key, options)
+                        loaded += 1
+
+                if progress is not None:
+                    progress(loaded)
+                if len(cache) >= cache.max_entries:
+                    break
+                await asyncio.sleep(0)
+
+        self.preloaded = {"loaded": loaded, "read": read, "seconds": time.perf_counter() - started}
+        return self.preloaded
+
+    async def export_cooldowns(
+        self, filename: str, format: str = None, batch_size: int = 1000, checkpoint: str = None
+    ) -> int:
+        """
+        Writes the unexpired cooldowns to a NDJSON or CSV file, to be imported into another backend,
+        see :func:`ext.export_cooldowns`
+
+        :param filename: the file to write
+        :param format: `ndjson` or `csv`, by default from the extension of the file
+        :param batch_size: number of cooldowns read per query
+        :param checkpoint: a file keeping the progress, so that an interrupted export continues where it stopped
+        :return: number of cooldowns exported
+        """
+
+        await self.setup()
+        return await ext.export_cooldowns(self.cd, filename, format, batch_size, checkpoint)
+
+    async def import_cooldowns(
+        self, filename: str, format: str = None, batch_size: int = 1000, checkpoint: str = None
+    ) -> int:
+        """
+        Adds the cooldowns of a file written by :meth:`export_cooldowns`, the ones already stored are kept,
+        see :func:`ext.import_cooldowns`
+
+        :param filename: the file to read
+        :param format: `ndjson` or `csv`, by default from the extension of the file
+        :param batch_size: number of cooldowns written per transaction
+        :param checkpoint: a file keeping the progress, so that an interrupted import continues where it stopped
+        :return: number of unexpired cooldowns imported
+        """
+
+        await self.setup()
+        return await ext.import_cooldowns(self.cd, filename, format, batch_size, checkpoint)
+
+    async def collect(self) -> Dict[str, float]:
+        """
+        deletes the expired cooldowns now, see :meth:`ExpiryCollector.collect`
+
+        :return: what was deleted and how long it took
+        """
+
+        await self.setup()
+        return await self.collector.collect()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        statistics of the cache, preload, prepared statements, write-behind buffer, expiry collector and observer
+        """
+
+        stats: Dict[str, Any] = {"collector": self.collector.totals}
+        if self.cd.cache is not None:
+            stats["cache"] = self.cd.cache.stats
+        if isinstance(self.db, AsyncDatabase):
+            stats["statements"] = self.db.statement_stats
+        if self.cd.write_behind is not None:
+            stats["write_behind"] = {"pending": self.cd.write_behind.pending}
+        if self.preloaded:
+            stats["preload"] = self.preloaded
+        if isinstance(self.observer, ext.Metrics):
+            stats["metrics"] = self.observer.snapshot()
+
+        return stats
+
+    async def flush(self) -> int:
+        """
+        writes the pending updates of the write-behind mode right away
+
+        :return: number of cooldowns written
+        """
+
+        if self.cd.write_behind is None or not self._ready:
+            return 0
+
+        return await self.cd.write_behind.flush()
+
+    async def close(self) -> None:
+        """
+        writes the pending updates and closes the database connection
+        """
+
+        await self.collector.close()
+        if self.cd.write_behind is not None and self._ready:
+            await self.cd.write_behind.close()
+        await self.db.close()
+        self._ready = False
+
+    def _now(self) -> int:
+        return self.clock.now()
+
+    def _expires_at(
+        self, now: int, per: Union[int, float], reset_per_day: bool, strategy: Strategy = Strategy.fixed_window
+    ) -> int:
+        # the expiry of a cooldown started at `now`, in epoch milliseconds. `expires_at - now` is the window of the
+        # other algorithms
+        if reset_per_day:
+            # the next midnight in the timezone of the cooldowns
+            return (now + self._offset) // _ONE_DAY * _ONE_DAY + _ONE_DAY - self._offset
+
+        return now + round(per * 1000)
+
+    @staticmethod
+    def _strategy(strategy: Union[Strategy, str], rate: int, per: Union[int, float], reset_per_day: bool) -> Strategy:
+        strategy = Strategy(strategy)
+        if strategy is Strategy.fixed_window:
+            return strategy
+
+        if reset_per_day:
+            raise ValueError(f"Excepted reset_per_day=False for the strategy {strategy.name}, got True instead")
+        if rate is None or rate < 1 or per is None or round(per * 1000) < 1:
+            raise ValueError(f"Excepted a positive rate and per for the strategy {strategy.name}, got {rate}/{per}")
+        return strategy
+
+    async def hit(
+        self, bucket: Bucket, user_id: int, command_name: str, rate: int, per: Union[int, float] = 0, *,
+        scope_id: int = 0, guild_id: int = 0, reset_per_day: bool = False,
+        strategy: Union[Strategy, str] = Strategy.fixed_window
+    ) -> Tuple[bool, float]:
+        """
+        Counts one use of a command if its cooldown allows it
+
+        :param bucket: the type of cooldown, :class:`Bucket` or :class:`commands.BucketType`
+        :param user_id: ID of the user
+        :param command_name: name of the command, or any other name the limit is kept under
+        :param rate: The number of times a command can be used before triggering a cooldown.
+        :param per: The amount of seconds to wait for a cooldown when it's been triggered.
+        :param scope_id: ID of the guild/channel/category/role, 0 for user cooldowns
+        :param guild_id: ID of the guild the scope belongs to
+        :param reset_per_day: If True is given, then the cooldown will be reset at `0:00` UTC(or provided timezone).
+        :param strategy: the algorithm which limits the uses, see :class:`Strategy`
+        :return: whether the use is allowed and the seconds left on the cooldown if it's not, to the millisecond
+        """
+
+        strategy = self._strategy(strategy, rate, per, reset_per_day)
+        if not self._ready:
+            await self.setup()
+
+        now = self._now()
+        return await self.cd.hit(
+            bucket, user_id, scope_id, command_name, rate, self._expires_at(now, per, reset_per_day, strategy),
+            guild_id, now=now, strategy=strategy
+        )
+
+    async def hit_many(
+        self, user_id: int, command_name: str, limits: Sequence[Tuple[int, Union[int, float], Bucket, int, int]], *,
+        strategy: Union[Strategy, str] = Strategy.fixed_window
+    ) -> Tuple[bool, float]:
+        """
+        Counts one use of a command against several limits at once, only if every one of them allows it,
+        e.g. `[(3, 60, Bucket.user, 0, 0), (50, 60, Bucket.guild, guild_id, guild_id)]`
+
+        :param user_id: ID of the user
+        :param command_name: name of the command, or any other name the limits are kept under
+        :param limits: (rate, per, bucket, scope_id, guild_id) of every limit, one per bucket type and scope
+        :param strategy: the algorithm which limits the uses, see :class:`Strategy`
+        :return: whether the use is allowed and the longest seconds left on the limits denying it if it's not
+        """
+
+        for rate, per, *_ in limits:
+            strategy = self._strategy(strategy, rate, per, False)
+        if not self._ready:
+            await self.setup()
+
+        now = self._now()
+        return await self.cd.hit_many(
+            [
+                (bucket, user_id, scope_id, command_name, rate, self._expires_at(now, per, False, strategy), guild_id)
+                for rate, per, bucket, scope_id, guild_id in limits
+            ],
+            now=now, strategy=strategy
+        )
+
+    async def get(self, bucket: Bucket, user_id: int, command_name: str, *, scope_id: int = 0) -> Optional[Options]:
+        """
+        Returns the cooldown of a command, None if there is none
+
+        :param bucket: the type of cooldown
+        :param user_id: ID of the user
+        :param command_name: name of the command
+        :param scope_id: ID of the guild/channel/category/role, 0 for user cooldowns
+        """
+
+        await self.setup()
+        return await self.cd.get(bucket, user_id, scope_id, command_name)
+
+    async def reset(
+        self, bucket: Bucket, user_id: int, command_name: str, *, scope_id: int = 0, force: bool = False
+    ) -> None:
+        """
+        reset a command cooldown
+
+        if the cooldown rate is > 1 then it will be reduced by 1 on every call, else it will get reset completely when
+        force is False
+
+        :param bucket: the type of cooldown
+        :param user_id: ID of the user
+        :param command_name: name of the command
+        :param scope_id: ID of the guild/channel/category/role, 0 for user cooldowns
+        :param force: if True, the command cooldown will be removed completely
+        """
+
+        await self.setup()
+        if force:
+            return await self.cd.remove(bucket, user_id, scope_id, command_name)
+
+        await self.cd.reset(bucket, user_id, scope_id, command_name)
+
+    async def reset_command(self, command_name: str, bucket: Bucket = None) -> int:
+        """
+        Removes the cooldowns of a command for every user, e.g. at the start of an event
+
+        Like the other bulk operations, it runs as one statement (a scan of the keys on Redis), plus one per table
+        of older versions still holding cooldowns, see :meth:`migrate`.
+
+        :param command_name: name of the command
+        :param bucket: if given, only the cooldowns of this type are removed
+        :return: number of cooldowns removed
+        """
+
+        await self.setup()
+        return await self.cd.remove_command(command_name, bucket)
+
+    async def clear_guild(self, guild_id: int) -> int:
+        """
+        Removes the guild, channel, category and role cooldowns of a guild, e.g. when the bot leaves it
+
+        The channel, category and role cooldowns of the tables of older versions have no guild, those which weren't
+        checked since they were moved over (or still aren't) are left, see :meth:`Cooldowns.remove_guild`.
+
+        :param guild_id: ID of the guild
+        :return: number of cooldowns removed
+        """
+
+        await self.setup()
+        return await self.cd.remove_guild(guild_id)
+
+    async def clear_user(self, user_id: int) -> int:
+        """
+        Removes the cooldowns of a user for every command and type
+
+        :param user_id: ID of the user
+        :return: number of cooldowns removed
+        """
+
+        await self.setup()
+        return await self.cd.remove_user(user_id)
+
+    async def user_cooldowns(self, user_id: int) -> List[Tuple[Bucket, int, str, Options, float]]:
+        """
+        Lists the active cooldowns of a user, the first to expire first
+
+        :param user_id: ID of the user
+        :return: (bucket, scope_id, command_name, options, seconds left) of every cooldown
+        """
+
+        await self.setup()
+        now = self._now()
+        return [
+            (bucket, scope_id, command_name, options, max((options.to_millis(self.timezone) - now) / 1000, 0))
+            for bucket, scope_id, command_name, options in await self.cd.user_cooldowns(user_id)
+        ]
@@ -1,31 +1,94 @@
-from typing import Mapping, Any
+from typing import Mapping, Any, List
 
 __all__ = [
     "SQlite",
     "MySQL",
-    "PostgreSQL"
+    "PostgreSQL",
+    "Memory",
+    "Redis"
 ]
 
 
+def _check_pool_size(min_size: int, max_size: int) -> None:
+    if max_size < 1:
+        raise ValueError(f"Excepted max_size >= 1, got {max_size} instead")
+    if not 0 <= min_size <= max_size:
+        raise ValueError(f"Excepted 0 <= min_size <= max_size, got min_size={min_size} instead")
+
+
 class SQlite:
-    def __init__(self, filename: str = None):
+    def __init__(
+        self, filename: str = None,
+        *, wal: bool = False, synchronous: str = None, busy_timeout: float = 5.0, mmap_size: int = 0,
+        cache_size: int = None, lock_retries: int = 5, lock_backoff: float = 0.05
+    ):
         """
         Use this to store the cooldown commands data in database files with `.db` extension
 
+        Several processes (e.g. one per shard) on the same host can share the file: every check is one atomic
+        statement (SQLite >= 3.35, older versions read and write separately), so the counts stay exact. With `wal`,
+        any number of processes read while one of them writes, writers still take turns. A writer waits up to
+        `busy_timeout` for the lock, then the statement is retried `lock_retries` times with an exponential backoff
+        starting at `lock_backoff` before "database is locked" is raised. The file must be on a local disk, and
+        neither the cache nor the write-behind mode of :class:`Cooldown` may be used by several processes.
+
         :param filename: takes the filename or path of the file
+        :param wal: if True, the file is switched to write-ahead logging, recommended for several processes
+        :param synchronous: `PRAGMA synchronous`, e.g. "NORMAL" which with `wal` survives a crash of the process but
+            may lose the last commits on a power loss, by default "FULL"
+        :param busy_timeout: seconds a statement waits for the lock held by another connection
+        :param mmap_size: bytes of the file read through memory mapping, 0 to disable it
+        :param cache_size: `PRAGMA cache_size`, pages if positive or KiB if negative, by default SQLite's (-2000)
+        :param lock_retries: times a statement is retried when the database is still locked after `busy_timeout`
+        :param lock_backoff: seconds waited before the first retry, doubled on every retry
         """
 
+        if synchronous is not None and synchronous.upper() not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Excepted synchronous OFF, NORMAL, FULL or EXTRA, got {synchronous} instead")
+        if busy_timeout < 0 or mmap_size < 0 or lock_retries < 0 or lock_backoff < 0:
+            raise ValueError("Excepted busy_timeout, mmap_size, lock_retries and lock_backoff >= 0")
+
         self.filename = "CustomCooldowns.db" if filename is None else filename
+        self.wal = wal
+        self.synchronous = None if synchronous is None else synchronous.upper()
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.lock_retries = lock_retries
+        self.lock_backoff = lock_backoff
+
         self.fmtr: str = "?"
         self.table_prefix: str = "cooldowns"  # the table name starts with this prefix
 
     @property
-    def kwargs(self) -> Mapping[str, str]:
-        return {"database": self.filename}
+    def kwargs(self) -> Mapping[str, Any]:
+        # `timeout` is the busy timeout of sqlite3
+        return {"database": self.filename, "timeout": self.busy_timeout}
+
+    @property
+    def pragmas(self) -> List[str]:
+        """
+        the statements run on every new connection
+        """
+
+        pragmas = []
+        if self.wal:
+            pragmas.append("PRAGMA journal_mode=WAL")
+        if self.synchronous is not None:
+            pragmas.append(f"PRAGMA synchronous={self.synchronous}")
+        if self.mmap_size:
+            pragmas.append(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        if self.cache_size is not None:
+            pragmas.append(f"PRAGMA cache_size={int(self.cache_size)}")
+
+        return pragmas
 
 
 class MySQL:
-    def __init__(self, host: str, db_name: str, user: str, passwd: str, port: int = 3306):
+    def __init__(
+        self, host: str, db_name: str, user: str, passwd: str, port: int = 3306,
+        *, min_size: int = 1, max_size: int = 10, acquire_timeout: float = 10.0, ping_interval: float = 30.0
+    ):
         """
         Use this to store the cooldown commands data in MySQL database
 
@@ -33,6 +96,10 @@ class MySQL:
         :param db_name: Name of the database/ schema
         :param user: Name of the user/ root who has access to the database/ schema
         :param passwd: Password of the given user
+        :param min_size: Number of connections opened when the pool starts
+        :param max_size: Maximum number of connections in the pool
+        :param acquire_timeout: Seconds to wait for a free connection before raising an error
+        :param ping_interval: Connections idle for longer than this (in seconds) are checked before being used
         """
 
         self.db_host = host
@@ -41,6 +108,12 @@ class MySQL:
         self.db_user = user
         self.db_passwd = passwd
 
+        _check_pool_size(min_size, max_size)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.ping_interval = ping_interval
+
         self.fmtr: str = "%s"
         self.table_prefix: str = "cooldowns"  # the table name starts with this prefix
 
@@ -53,7 +126,10 @@ class MySQL:
 
 
 class PostgreSQL:
-    def __init__(self, host: str, db_name: str, user: str, passwd: str, port: int = 5432):
+    def __init__(
+        self, host: str, db_name: str, user: str, passwd: str, port: int = 5432,
+        *, min_size: int = 1, max_size: int = 10, acquire_timeout: float = 10.0, ping_interval: float = 30.0
+    ):
         """
         Use this to store the cooldown commands data in PostgreSQL database
 
@@ -62,6 +138,10 @@ class PostgreSQL:
         :param user: Name of the user/ root who has access to the database/ schema
         :param passwd: Password of the given user
         :param port: Port of the PostgreSQL server
+        :param min_size: Number of connections opened when the pool starts
+        :param max_size: Maximum number of connections in the pool
+        :param acquire_timeout: Seconds to wait for a free connection before raising an error
+        :param ping_interval: Connections idle for longer than this (in seconds) are checked before being used
         """
 
         self.db_host = host
@@ -70,6 +150,12 @@ class PostgreSQL:
         self.db_user = user
         self.db_passwd = passwd
 
+        _check_pool_size(min_size, max_size)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.ping_interval = ping_interval
+
         self.fmtr: str = "%s"
         self.table_prefix: str = "cooldowns"  # the table name starts with this prefix
 
@@ -79,3 +165,65 @@ class PostgreSQL:
             "host": self.db_host, "port": self.db_port, "database": self.db_name,
             "user": self.db_user, "passwd": self.db_passwd,
         }
+
+
+class Memory:
+    def __init__(self, snapshot: str = None, capacity: int = 1024):
+        """
+        Use this to keep the cooldown commands data in the memory of the process, e.g. for shards or tests which
+        don't need a database
+
+        :param snapshot: if given, the cooldowns are loaded from this file on start and written to it on close
+        :param capacity: number of cooldowns to reserve room for, the storage grows as needed
+        """
+
+        if capacity < 1:
+            raise ValueError(f"Excepted capacity >= 1, got {capacity} instead")
+
+        self.snapshot = snapshot
+        self.capacity = capacity
+        self.fmtr: str = "?"
+        self.table_prefix: str = "cooldowns"  # the table name starts with this prefix
+
+    @property
+    def kwargs(self) -> Mapping[str, Any]:
+        return {"snapshot": self.snapshot, "capacity": self.capacity}
+
+
+class Redis:
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, passwd: str = None,
+        *, max_size: int = 10, key_prefix: str = "cooldowns", client: Any = None
+    ):
+        """
+        Use this to store the cooldown commands data in Redis (or a server speaking its protocol), shared by every
+        process connected to it. Requires the `redis` package.
+
+        :param host: Where the Redis server is being hosted
+        :param port: Port of the Redis server
+        :param db: Number of the database to use
+        :param passwd: Password of the server, if any
+        :param max_size: Maximum number of connections in the pool
+        :param key_prefix: the keys of the cooldowns start with this prefix
+        :param client: an already created `redis.asyncio` client (e.g. `fakeredis.FakeAsyncRedis()` in tests),
+            used instead of connecting to `host`
+        """
+
+        _check_pool_size(0, max_size)
+
+        self.db_host = host
+        self.db_port = port
+        self.db_index = db
+        self.db_passwd = passwd
+        self.max_size = max_size
+        self.client = client
+
+        self.fmtr: str = "?"
+        self.table_prefix: str = key_prefix
+
+    @property
+    def kwargs(self) -> Mapping[str, Any]:
+        return {
+            "host": self.db_host, "port": self.db_port, "db": self.db_index, "password": self.db_passwd,
+            "max_connections": self.max_size,
+        }
@@ -21,6 +21,18 @@ packages = [
     "discord_cooldown.ext"
 ]
 
+# the optional backends and asyncio drivers, e.g. `pip install discord-cooldown[redis]`
+extras_require = {
+    "redis": ["redis>=4.2.0"],
+    "asyncpg": ["asyncpg>=0.27.0"],
+    "aiomysql": ["aiomysql>=0.1.1"],
+    "aiosqlite": ["aiosqlite>=0.17.0"],
+    "numpy": ["numpy>=1.20.0"],
+}
+extras_require["all"] = sorted({requirement for extra in extras_require.values() for requirement in extra})
+# the test suite, not part of `all`
+extras_require["test"] = ["pytest>=7.0", "fakeredis>=2.10.0"]
+
 setuptools.setup(
     name="discord-cooldown",
     version=version,
@@ -56,5 +68,6 @@ setuptools.setup(
     packages=packages,
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras_require,
     python_requires=">=3.8"
 )
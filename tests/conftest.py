@@ -0,0 +1,44 @@
+from discord_cooldown import SQlite, Memory, Redis
+from discord_cooldown.ext import FakeClock
+
+import time
+
+import pytest
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    """
+    Returns a factory of the config of every backend which runs without a server, Redis through fakeredis
+    """
+
+    if request.param == "memory":
+        return Memory
+    if request.param == "sqlite":
+        return lambda: SQlite(str(tmp_path / "cooldowns.db"))
+
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    return lambda: Redis(client=fakeredis.FakeAsyncRedis(server=server))
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """
+    A clock at the start of a 10 seconds window, ahead of the real time which Redis expires the keys by
+    """
+
+    return FakeClock((time.time_ns() // 10 ** 10 + 1) * 10 ** 4)
+
+
+@pytest.fixture
+def stored():
+    """
+    Returns a function listing every stored cooldown of a limiter, as
+    (bucket, user_id, scope_id, command, guild_id, rate, count, expires_at, previous)
+    """
+
+    async def rows(limiter):
+        return sorted([row async for rows in limiter.cd.rows(2) for row in rows])
+
+    return rows
@@ -0,0 +1,88 @@
+from discord_cooldown import Limiter, Bucket
+from discord_cooldown.ext import RedisCooldowns
+
+import asyncio
+
+import pytest
+
+
+async def _hit_all(limiter: Limiter) -> None:
+    # user 1 and 11 in guild 5, user 1 in guild 6 and a command name with glob and separator characters
+    await limiter.hit(Bucket.user, 1, "spin", 1, 60)
+    await limiter.hit(Bucket.user, 11, "spin", 1, 30)
+    await limiter.hit(Bucket.user, 1, "sp*n", 1, 10)
+    await limiter.hit(Bucket.user, 1, "shop:buy", 1, 20)
+    await limiter.hit(Bucket.guild, 1, "spin", 1, 40, scope_id=5, guild_id=5)
+    await limiter.hit(Bucket.channel, 11, "spin", 1, 50, scope_id=50, guild_id=5)
+    await limiter.hit(Bucket.guild, 1, "spin", 1, 40, scope_id=6, guild_id=6)
+
+
+def _keys(rows) -> list:
+    return [(bucket, user_id, scope_id, command) for bucket, user_id, scope_id, command, *_ in rows]
+
+
+def test_reset_command(backend, clock, stored):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            await _hit_all(limiter)
+            assert await limiter.reset_command("sp*n") == 1
+            assert await limiter.reset_command("spin", Bucket.guild) == 2
+            assert _keys(await stored(limiter)) == [
+                (1, 1, 0, "shop:buy"), (1, 1, 0, "spin"), (1, 11, 0, "spin"), (3, 11, 50, "spin")
+            ]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_clear_guild(backend, clock, stored):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            await _hit_all(limiter)
+            assert await limiter.clear_guild(5) == 2
+            assert (2, 1, 6, "spin") in _keys(await stored(limiter))
+            assert await limiter.hit(Bucket.guild, 1, "spin", 1, 40, scope_id=5, guild_id=5) == (True, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_clear_user_and_user_cooldowns(backend, clock, stored):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            await _hit_all(limiter)
+            cooldowns = await limiter.user_cooldowns(1)
+            assert [(bucket, command, left) for bucket, _, command, _, left in cooldowns] == [
+                (Bucket.user, "sp*n", 10.0), (Bucket.user, "shop:buy", 20.0),
+                (Bucket.guild, "spin", 40.0), (Bucket.guild, "spin", 40.0), (Bucket.user, "spin", 60.0),
+            ]
+
+            assert await limiter.clear_user(1) == 5
+            assert {user_id for _, user_id, *_ in await stored(limiter)} == {11}
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_redis_keys_are_scanned_in_batches(backend, clock, stored):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            if not isinstance(limiter.cd, RedisCooldowns):
+                pytest.skip("only Redis scans its keys")
+            await _hit_all(limiter)
+
+            assert await limiter.cd.remove_command("spin", batch_size=1) == 5
+            assert await limiter.cd.remove_user(1, batch_size=1) == 2
+            assert await limiter.cd.remove_guild(6, batch_size=1) == 0
+            assert await stored(limiter) == []
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+from discord_cooldown import Limiter, Bucket
+from discord_cooldown.ext import CooldownCache, MemoryStore, Options
+
+import asyncio
+
+from datetime import datetime, timedelta
+
+import pytest
+
+NOW = datetime(2024, 1, 1)
+
+
+def _options(seconds: float) -> Options:
+    return Options(1, 1, Bucket.user, NOW + timedelta(seconds=seconds))
+
+
+def test_least_recently_used_is_evicted():
+    cache = CooldownCache(2)
+    cache.put((0, 1, 0, "spin"), _options(60))
+    cache.put((0, 2, 0, "spin"), _options(60))
+    assert cache.get((0, 1, 0, "spin"), NOW) is not None
+
+    cache.put((0, 3, 0, "spin"), _options(60))
+    assert (0, 2, 0, "spin") not in cache
+    assert (0, 1, 0, "spin") in cache and (0, 3, 0, "spin") in cache
+    assert cache.stats["evictions"] == 1
+
+
+def test_expired_entry_is_dropped():
+    cache = CooldownCache(10)
+    cache.put((0, 1, 0, "spin"), _options(1))
+    cache.put((0, 2, 0, "spin"), _options(60))
+
+    assert cache.get((0, 1, 0, "spin"), NOW + timedelta(seconds=2)) is None
+    assert len(cache) == 1 and cache.stats["expirations"] == 1
+
+
+def test_updated_entry_keeps_its_new_expiry():
+    cache = CooldownCache(10)
+    cache.put((0, 1, 0, "spin"), _options(1))
+    cache.put((0, 1, 0, "spin"), _options(60))
+
+    assert cache.get((0, 1, 0, "spin"), NOW + timedelta(seconds=2)) is not None
+
+
+def test_denied_uses_are_answered_by_the_cache(backend, clock):
+    async def main():
+        limiter = Limiter(backend(), cache_size=10, clock=clock)
+        try:
+            if isinstance(limiter.db, MemoryStore):
+                pytest.skip("the memory backend has no cache")
+
+            await limiter.hit(Bucket.user, 1, "spin", 1, 10)
+            assert not (await limiter.hit(Bucket.user, 1, "spin", 1, 10))[0]
+            hits = limiter.cd.cache.hits
+            assert await limiter.hit(Bucket.user, 1, "spin", 1, 10) == (False, 10.0)
+            assert limiter.cd.cache.hits == hits + 1
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_reset_after_a_denied_use_counts_from_the_stored_uses(backend, clock):
+    async def main():
+        limiter = Limiter(backend(), cache_size=10, clock=clock)
+        try:
+            if isinstance(limiter.db, MemoryStore):
+                pytest.skip("the memory backend has no cache")
+
+            for _ in range(3):
+                await limiter.hit(Bucket.user, 1, "spin", 3, 10)
+            # a lower rate denies the 3 uses made
+            assert not (await limiter.hit(Bucket.user, 1, "spin", 2, 10))[0]
+            assert (await limiter.get(Bucket.user, 1, "spin")).count == 3
+
+            await limiter.reset(Bucket.user, 1, "spin")
+            assert (await limiter.get(Bucket.user, 1, "spin")).count == 2
+            assert (await limiter.hit(Bucket.user, 1, "spin", 3, 10))[0]
+            assert not (await limiter.hit(Bucket.user, 1, "spin", 3, 10))[0]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
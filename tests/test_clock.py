@@ -0,0 +1,65 @@
+from discord_cooldown.ext import Clock, FakeClock
+
+import time
+
+import pytest
+
+
+class _Time:
+    # the wall and monotonic clocks of `time`, in nanoseconds, moved by the test
+    def __init__(self, monkeypatch):
+        self.wall = 1_700_000_000_000 * 1_000_000
+        self.monotonic = 0
+        monkeypatch.setattr(time, "time_ns", lambda: self.wall)
+        monkeypatch.setattr(time, "monotonic_ns", lambda: self.monotonic)
+
+    def advance(self, millis: int, wall_millis: int = None) -> None:
+        self.monotonic += millis * 1_000_000
+        self.wall += (millis if wall_millis is None else wall_millis) * 1_000_000
+
+
+def test_step_of_the_wall_clock_is_followed_after_sync_interval(monkeypatch):
+    now = _Time(monkeypatch)
+    clock = Clock(sync_interval=60)
+    start = clock.now()
+
+    # NTP moves the wall clock 5 seconds forward
+    now.advance(1000, wall_millis=6000)
+    assert clock.now() == start + 1000
+    now.advance(59_000)
+    assert clock.now() == start + 65_000
+
+
+def test_time_never_goes_back(monkeypatch):
+    now = _Time(monkeypatch)
+    clock = Clock(sync_interval=1)
+    start = clock.now()
+
+    now.advance(1000)
+    assert clock.now() == start + 1000
+    # the wall clock is set 5 seconds back
+    now.advance(1000, wall_millis=-4000)
+    assert clock.now() == start + 1000
+    now.advance(4000)
+    assert clock.now() == start + 1000
+    now.advance(1000)
+    assert clock.now() == start + 2000
+
+
+def test_clock_without_sync_interval_ignores_the_wall_clock(monkeypatch):
+    now = _Time(monkeypatch)
+    clock = Clock(sync_interval=None)
+    start = clock.now()
+
+    now.advance(3_600_000, wall_millis=3_700_000)
+    assert clock.now() == start + 3_600_000
+
+
+def test_fake_clock_moves_only_when_told_to():
+    clock = FakeClock(1000)
+    assert clock.now() == 1000
+    assert clock.advance(1.5, milliseconds=1) == 2501
+    assert clock.now() == 2501
+
+    with pytest.raises(ValueError):
+        clock.advance(-1)
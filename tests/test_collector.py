@@ -0,0 +1,70 @@
+from discord_cooldown import Limiter, Bucket, Memory, SQlite
+from discord_cooldown.ext import ExpiryCollector
+
+import asyncio
+
+import pytest
+
+
+async def _expire(limiter: Limiter, clock, users: int) -> None:
+    # `users` cooldowns of 1 second which have expired and one of a minute which hasn't
+    for user_id in range(users):
+        await limiter.hit(Bucket.user, user_id, "spin", 1, 1)
+    await limiter.hit(Bucket.user, 100, "spin", 1, 60)
+    clock.advance(2)
+
+
+def test_expired_cooldowns_are_deleted_in_batches(tmp_path, clock, stored):
+    async def main():
+        limiter = Limiter(SQlite(str(tmp_path / "cd.db")), clock=clock)
+        try:
+            await _expire(limiter, clock, 5)
+            collector = ExpiryCollector(limiter.cd, batch_size=2, max_batches=2, optimize_every=2)
+
+            report = await collector.collect()
+            assert (report["deleted"], report["optimized"]) == (4, 0)
+            report = await collector.collect()
+            assert (report["deleted"], report["optimized"]) == (1, 1)
+
+            assert collector.totals["deleted"] == 5 and collector.runs == 2
+            assert [row[1] for row in await stored(limiter)] == [100]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_memory_cooldowns_are_swept(clock, stored):
+    async def main():
+        limiter = Limiter(Memory(), clock=clock)
+        try:
+            await _expire(limiter, clock, 3)
+            assert (await limiter.collect())["deleted"] == 3
+            assert [row[1] for row in await stored(limiter)] == [100]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_background_collection(tmp_path, clock, stored):
+    async def main():
+        limiter = Limiter(SQlite(str(tmp_path / "cd.db")), clock=clock, gc_interval=0.01)
+        try:
+            await _expire(limiter, clock, 3)
+            for _ in range(100):
+                if limiter.collector.totals["deleted"] == 3:
+                    break
+                await asyncio.sleep(0.01)
+            assert [row[1] for row in await stored(limiter)] == [100]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        ExpiryCollector(None, interval=0)
+    with pytest.raises(ValueError):
+        ExpiryCollector(None, batch_size=0)
@@ -0,0 +1,107 @@
+from discord_cooldown import Cooldown, Memory
+from discord_cooldown.ext import Metrics
+
+from benchmarks.contexts import FakeMember, make_contexts
+
+import asyncio
+
+import pytest
+from discord.ext import commands
+from discord.ext.commands import BucketType
+
+ROLE_ID = 77
+
+
+def _check(cd: Cooldown, *args, **kwargs):
+    # the predicate added to a command by the decorator
+    return cd.cooldown(*args, role_id=ROLE_ID, **kwargs)(lambda ctx: None).__commands_checks__[0]
+
+
+@pytest.mark.parametrize(
+    "type", [BucketType.user, BucketType.guild, BucketType.channel, BucketType.category, BucketType.role]
+)
+def test_cooldown_of_every_type(clock, type):
+    async def main():
+        cd = Cooldown(Memory(), clock=clock)
+        try:
+            check = _check(cd, 1, 10, type=type)
+            first, second = make_contexts(f"cmd_{type.name}", 2, ROLE_ID, guilds=1)
+
+            assert await check(first)
+            with pytest.raises(commands.CommandOnCooldown) as info:
+                await check(first)
+            assert info.value.retry_after == 10.0 and info.value.type == type
+            assert await check(second)
+
+            await cd.reset_cooldown(first, force=True)
+            assert await check(first)
+        finally:
+            await cd.close()
+
+    asyncio.run(main())
+
+
+def test_role_cooldown_only_applies_to_the_members_of_the_role(clock):
+    async def main():
+        cd = Cooldown(Memory(), clock=clock)
+        try:
+            check = _check(cd, 1, 10, type=BucketType.role)
+            context, = make_contexts("cmd", 1, ROLE_ID)
+            context.author = FakeMember(context.author.id, [])
+
+            assert await check(context) and await check(context)
+        finally:
+            await cd.close()
+
+    asyncio.run(main())
+
+
+def test_limits_are_counted_together(clock):
+    async def main():
+        cd = Cooldown(Memory(), clock=clock)
+        try:
+            check = _check(cd, limits=[(2, 10, BucketType.user), (1, 60, BucketType.guild)])
+            context, = make_contexts("cmd", 1, ROLE_ID)
+
+            assert await check(context)
+            with pytest.raises(commands.CommandOnCooldown) as info:
+                await check(context)
+            assert info.value.retry_after == 60.0 and info.value.type == BucketType.user
+            assert cd.cooldowns["cmd"]["limits"][1] == (1, 60, BucketType.guild)
+
+            # every limit of the command is removed
+            await cd.reset_cooldown(context, force=True)
+            assert await cd.get(BucketType.user, context.author.id, "cmd") is None
+            assert await check(context)
+        finally:
+            await cd.close()
+
+    asyncio.run(main())
+
+
+def test_checks_are_observed(clock):
+    async def main():
+        metrics = Metrics()
+        cd = Cooldown(Memory(), clock=clock, observer=metrics)
+        try:
+            check = _check(cd, 1, 10)
+            context, = make_contexts("cmd", 1, ROLE_ID)
+            await check(context)
+            with pytest.raises(commands.CommandOnCooldown):
+                await check(context)
+        finally:
+            await cd.close()
+
+        assert metrics.checks == {("cmd", "user", "allowed"): 1, ("cmd", "user", "denied"): 1}
+
+    asyncio.run(main())
+
+
+def test_invalid_arguments():
+    cd = Cooldown(Memory())
+    with pytest.raises(ValueError):
+        cd.cooldown(1, 10, type=BucketType.role)
+    with pytest.raises(ValueError):
+        cd.cooldown(limits=[(1, 10, BucketType.user), (2, 10, BucketType.user)])
+    with pytest.raises(ValueError):
+        cd.cooldown(1, 10, limits=[(1, 10, BucketType.user)])
@@ -0,0 +1,43 @@
+from discord_cooldown import Limiter, Bucket, Strategy
+
+import asyncio
+
+import pytest
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_hit_many_counts_every_limit_or_none(backend, clock, strategy):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            for command_name, denying, other in (
+                ("spin", (2, 60, Bucket.user, 0, 0), (3, 60, Bucket.guild, 7, 7)),
+                ("roll", (2, 60, Bucket.guild, 7, 7), (3, 60, Bucket.channel, 8, 7)),
+            ):
+                results = [
+                    await limiter.hit_many(1, command_name, [denying, other], strategy=strategy) for _ in range(3)
+                ]
+                assert [allowed for allowed, _ in results] == [True, True, False]
+                assert results[2][1] > 0
+
+                # the use denied by one limit wasn't counted by the other, which has one use left
+                assert (await limiter.hit_many(1, command_name, [other], strategy=strategy))[0]
+                assert not (await limiter.hit_many(1, command_name, [other], strategy=strategy))[0]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_concurrent_hit_many_is_atomic(backend, clock, stored):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        limits = [(5, 60, Bucket.user, 0, 0), (5, 60, Bucket.guild, 7, 7)]
+        try:
+            results = await asyncio.gather(*(limiter.hit_many(1, "spin", limits) for _ in range(12)))
+            assert sum(allowed for allowed, _ in results) == 5
+            assert [row[6] for row in await stored(limiter)] == [5, 5]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+from discord_cooldown import Limiter, Bucket, SQlite, PostgreSQL
+from discord_cooldown.ext import Database, FakeClock, get_datetime
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+
+def _cell(type: Bucket) -> str:
+    return json.dumps({"rate": 1, "count": 1, "expires_at": str(get_datetime(3600)), "type": int(type)})
+
+
+def _legacy_db(path: str) -> str:
+    # the wide tables of the 0.1.x versions: a cooldown of `vote` for users 1 and 2, for user 1 in guild 10 and in
+    # channel 20
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE cooldowns_user(user_id BIGINT NOT NULL, vote LONGTEXT, daily LONGTEXT)")
+    conn.executemany(
+        "INSERT INTO cooldowns_user VALUES(?, ?, NULL)", [(user_id, _cell(Bucket.user)) for user_id in (1, 2)]
+    )
+    conn.execute("CREATE TABLE cooldowns_guild(user_id BIGINT NOT NULL, guild_id BIGINT NOT NULL, vote LONGTEXT)")
+    conn.execute("INSERT INTO cooldowns_guild VALUES(1, 10, ?)", (_cell(Bucket.guild),))
+    conn.execute("CREATE TABLE cooldowns_channel(user_id BIGINT NOT NULL, channel_id BIGINT NOT NULL, vote LONGTEXT)")
+    conn.execute("INSERT INTO cooldowns_channel VALUES(1, 20, ?)", (_cell(Bucket.channel),))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_legacy_cooldown_is_moved_on_first_check(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            allowed, retry_after = await limiter.hit(Bucket.user, 1, "vote", 1, 60)
+            assert not allowed and 3500 < retry_after <= 3600
+            assert (await limiter.hit(Bucket.user, 3, "vote", 1, 60))[0]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_migrate_moves_every_cooldown(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            assert await limiter.migrate(batch_size=1) == 4
+            assert await limiter.db.execute("SELECT COUNT(*) FROM cooldowns_user") == (0,)
+            assert not (await limiter.hit(Bucket.user, 2, "vote", 1, 60))[0]
+            assert not (await limiter.hit(Bucket.guild, 1, "vote", 1, 60, scope_id=10, guild_id=10))[0]
+
+            assert await limiter.migrate(drop=True) == 0
+            assert not limiter.cd.legacy.exists
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_reset_after_migrate_is_not_undone(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            await limiter.migrate()
+            await limiter.reset(Bucket.user, 1, "vote", force=True)
+            assert await limiter.hit(Bucket.user, 1, "vote", 1, 60) == (True, 0)
+
+            await limiter.clear_user(2)
+            assert await limiter.hit(Bucket.user, 2, "vote", 1, 60) == (True, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_reset_of_a_cooldown_never_read_is_not_undone(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            await limiter.reset(Bucket.user, 2, "vote", force=True)
+            assert await limiter.hit(Bucket.user, 2, "vote", 1, 60) == (True, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_bulk_operations_remove_the_legacy_cooldowns(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            await limiter.clear_user(2)
+            assert await limiter.hit(Bucket.user, 2, "vote", 1, 60) == (True, 0)
+
+            await limiter.reset_command("vote", Bucket.user)
+            assert await limiter.hit(Bucket.user, 1, "vote", 1, 60) == (True, 0)
+
+            await limiter.clear_guild(10)
+            assert await limiter.hit(Bucket.guild, 1, "vote", 1, 60, scope_id=10, guild_id=10) == (True, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_checked_cooldown_moved_over_keeps_its_guild(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            assert not (await limiter.hit(Bucket.channel, 1, "vote", 1, 60, scope_id=20, guild_id=10))[0]
+            assert await limiter.clear_guild(10) == 1
+            assert await limiter.hit(Bucket.channel, 1, "vote", 1, 60, scope_id=20, guild_id=10) == (True, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_cooldown_is_kept_in_the_legacy_table_if_moving_it_fails(tmp_path):
+    async def main():
+        limiter = Limiter(SQlite(_legacy_db(str(tmp_path / "cd.db"))), clock=FakeClock())
+        try:
+            assert (await limiter.hit(Bucket.user, 3, "vote", 1, 60))[0]
+            insert_query, limiter.cd._insert_missing_query = limiter.cd._insert_missing_query, "INSERT INTO nowhere"
+            with pytest.raises(Exception):
+                await limiter.hit(Bucket.user, 1, "vote", 1, 60)
+
+            assert await limiter.db.execute("SELECT vote FROM cooldowns_user WHERE user_id = 1") != (None,)
+            limiter.cd._insert_missing_query = insert_query
+            assert not (await limiter.hit(Bucket.user, 1, "vote", 1, 60))[0]
+            assert await limiter.db.execute("SELECT vote FROM cooldowns_user WHERE user_id = 1") == (None,)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+class _Recorder:
+    # a psycopg2 connection and cursor which only record the statements sent to them
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query, values=None):
+        self.queries.append(query)
+
+    def fetchone(self):
+        return None
+
+    def commit(self):
+        pass
+
+
+def test_legacy_statements_are_quoted_for_postgresql():
+    db = Database(PostgreSQL("localhost", "bot", "bot", "secret"))
+    db.conn = db._cursor = recorder = _Recorder()
+
+    db.run("DROP TABLE IF EXISTS `cooldowns_user`")
+    db.run("UPDATE `cooldowns_user` SET `vote` = NULL WHERE user_id = %s", (1,))
+    assert recorder.queries == [
+        'DROP TABLE IF EXISTS "cooldowns_user"',
+        'PREPARE discord_cooldown_0 AS UPDATE "cooldowns_user" SET "vote" = NULL WHERE user_id = $1',
+        "EXECUTE discord_cooldown_0 (%s)",
+    ]
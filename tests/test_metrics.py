@@ -0,0 +1,48 @@
+from discord_cooldown import Limiter, Bucket, SQlite
+from discord_cooldown.ext import AsyncDatabase, Histogram, Metrics
+
+import asyncio
+
+import pytest
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for seconds in (0.0002, 0.0002, 0.003, 20.0):
+        histogram.observe(seconds)
+
+    assert histogram.percentile(50) == 0.00025
+    assert histogram.percentile(75) == 0.005
+    assert histogram.percentile(100) is None
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4 and snapshot["buckets"]["+inf"] == 1
+
+
+def test_operations_and_statements_are_timed(tmp_path, clock):
+    spans = []
+    metrics = Metrics(slow_query_seconds=0, span_callback=lambda name, *args: spans.append(name))
+
+    async def main():
+        limiter = Limiter(SQlite(str(tmp_path / "cd.db")), observer=metrics, clock=clock)
+        try:
+            await limiter.hit(Bucket.user, 1, "spin", 1, 10)
+            await limiter.hit(Bucket.user, 1, "spin", 1, 10)
+            with pytest.raises(Exception):
+                await limiter.db.run("SELEC 1")
+            return limiter.stats()["metrics"]
+        finally:
+            await limiter.close()
+
+    snapshot = asyncio.run(main())
+    assert snapshot["operations"]["hit"]["count"] == 2
+    assert sum(histogram["count"] for histogram in snapshot["statements"].values()) >= 3
+    assert snapshot["errors"] == {"SELEC": 1}
+    assert len(snapshot["slow_queries"]) == sum(snapshot["queries"].values())
+    assert spans.count("cooldown.hit") == 2 and "cooldown.db.selec" in spans
+
+
+def test_nothing_is_wrapped_without_an_observer(tmp_path):
+    limiter = Limiter(SQlite(str(tmp_path / "cd.db")))
+    assert limiter.db.run.__func__ is AsyncDatabase.run
+    assert "hit" not in vars(limiter.cd)
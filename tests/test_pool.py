@@ -0,0 +1,59 @@
+from discord_cooldown import SQlite
+from discord_cooldown.ext import ConnectionPool, PoolTimeout
+
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(SQlite(str(tmp_path / "pool.db")))
+    pool.open()
+    yield pool
+    pool.close()
+
+
+def test_acquire_times_out_while_every_connection_is_used(pool):
+    db = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.01)
+
+    pool.release(db)
+    assert pool.acquire(timeout=0.01) is db
+
+
+def test_released_connection_wakes_a_waiter(pool):
+    db = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    waiter.start()
+
+    pool.release(db)
+    waiter.join()
+    assert acquired == [db]
+
+
+def test_dropped_connection_is_reconnected_when_acquired(pool):
+    # SQlite has no ping interval, every idle connection is pinged here
+    pool.ping_interval = 0
+    with pool.connection() as db:
+        db.conn.close()
+
+    with pool.connection() as db:
+        assert db.execute("SELECT 1") == (1,)
+
+
+def test_discarded_connection_is_replaced(pool):
+    db = pool.acquire()
+    pool.release(db, discard=True)
+    assert (pool.size, pool.idle) == (0, 0)
+
+    with pool.connection() as new_db:
+        assert new_db is not db and pool.size == 1
+
+
+def test_closed_pool_refuses_to_acquire(pool):
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
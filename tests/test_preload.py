@@ -0,0 +1,54 @@
+from discord_cooldown import Limiter, Bucket
+from discord_cooldown.ext import MemoryStore
+
+import asyncio
+
+import pytest
+
+
+async def _write(backend, clock) -> None:
+    # the cooldowns of users 1 to 3 left by a previous run of the bot
+    limiter = Limiter(backend(), clock=clock)
+    try:
+        if isinstance(limiter.db, MemoryStore):
+            pytest.skip("the memory backend doesn't outlive its limiter")
+        for user_id in (1, 2, 3):
+            await limiter.hit(Bucket.user, user_id, "spin", 1, 60)
+    finally:
+        await limiter.close()
+
+
+def test_preload_fills_the_cache_until_it_is_full(backend, clock):
+    async def main():
+        await _write(backend, clock)
+
+        limiter = Limiter(backend(), cache_size=2, clock=clock)
+        progress = []
+        try:
+            report = await limiter.preload(batch_size=1, progress=progress.append)
+            assert (report["loaded"], len(limiter.cd.cache)) == (2, 2)
+            assert progress == [1, 2]
+
+            cached = [user_id for user_id in (1, 2, 3) if (Bucket.user, user_id, 0, "spin") in limiter.cd.cache]
+            hits = limiter.cd.cache.hits
+            assert not (await limiter.hit(Bucket.user, cached[0], "spin", 1, 60))[0]
+            assert limiter.cd.cache.hits == hits + 1
+            assert limiter.stats()["preload"] == report
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_preload_without_a_cache_reads_nothing(backend, clock):
+    async def main():
+        await _write(backend, clock)
+
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            report = await limiter.preload()
+            assert (report["loaded"], report["read"]) == (0, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+from discord_cooldown import Limiter, Bucket, Strategy
+import asyncio
+
+import pytest
+
+# (seconds to move the clock forward, expected (allowed, retry_after)) of uses of a limit of 2 per 10 seconds,
+# starting at the beginning of a 10 seconds window
+STEPS = {
+    Strategy.fixed_window: [
+        (0, (True, 0)), (0, (True, 0)), (0, (False, 10.0)), (4, (False, 6.0)), (6, (False, 0.0)),
+        (0.001, (True, 0)), (0, (True, 0)), (0, (False, 10.0)), (5, (False, 5.0)), (5, (False, 0.0)), (10, (True, 0)),
+    ],
+    Strategy.sliding_window: [
+        (0, (True, 0)), (0, (True, 0)), (0, (False, 15.0)), (4, (False, 11.0)), (6, (False, 5.0)),
+        (0.001, (False, 4.999)), (5, (True, 0)), (5, (True, 0)), (0, (False, 9.999)), (10, (True, 0)),
+    ],
+    Strategy.gcra: [
+        (0, (True, 0)), (0, (True, 0)), (0, (False, 5.0)), (4, (False, 1.0)), (1, (True, 0)),
+        (0.001, (False, 4.999)), (5, (True, 0)), (10, (True, 0)), (0, (True, 0)), (0, (False, 5.0)),
+    ],
+}
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_allow_and_deny(backend, clock, strategy):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            for seconds, expected in STEPS[strategy]:
+                clock.advance(seconds)
+                assert await limiter.hit(Bucket.user, 1, "spin", 2, 10, strategy=strategy) == expected, seconds
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_limits_are_kept_apart(backend, clock, strategy):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            assert (await limiter.hit(Bucket.user, 1, "spin", 1, 10, strategy=strategy))[0]
+            assert not (await limiter.hit(Bucket.user, 1, "spin", 1, 10, strategy=strategy))[0]
+
+            assert (await limiter.hit(Bucket.user, 2, "spin", 1, 10, strategy=strategy))[0]
+            assert (await limiter.hit(Bucket.user, 1, "roll", 1, 10, strategy=strategy))[0]
+            assert (await limiter.hit(Bucket.guild, 1, "spin", 1, 10, scope_id=5, strategy=strategy))[0]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+def test_fraction_of_a_second(backend, clock):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            assert await limiter.hit(Bucket.user, 1, "spin", 1, 0.25) == (True, 0)
+            assert await limiter.hit(Bucket.user, 1, "spin", 1, 0.25) == (False, 0.25)
+            clock.advance(milliseconds=251)
+            assert await limiter.hit(Bucket.user, 1, "spin", 1, 0.25) == (True, 0)
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("strategy", list(Strategy))
+def test_reset(backend, clock, strategy):
+    async def main():
+        limiter = Limiter(backend(), clock=clock)
+        try:
+            for _ in range(2):
+                await limiter.hit(Bucket.user, 1, "spin", 2, 10, strategy=strategy)
+            assert not (await limiter.hit(Bucket.user, 1, "spin", 2, 10, strategy=strategy))[0]
+
+            await limiter.reset(Bucket.user, 1, "spin", force=True)
+            assert (await limiter.hit(Bucket.user, 1, "spin", 2, 10, strategy=strategy))[0]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
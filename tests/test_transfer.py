@@ -0,0 +1,71 @@
+from discord_cooldown import Limiter, Bucket, Memory, Strategy
+
+import asyncio
+import os
+
+import pytest
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_export_import_round_trip(backend, tmp_path, clock, stored, format):
+    async def main():
+        source = Limiter(Memory(), clock=clock)
+        target = Limiter(backend(), clock=clock)
+        filename = str(tmp_path / f"cooldowns.{format}")
+        try:
+            names = ["spin", "with, comma", 'with "quotes"', "multi\nline"]
+            for user_id, name in enumerate(names, 1):
+                await source.hit(Bucket.user, user_id, name, 1, 60)
+                await source.hit(Bucket.guild, user_id, name, 2, 600, scope_id=9, guild_id=9)
+            await source.hit(Bucket.user, 99, "expired", 1, 0.5, strategy=Strategy.gcra)
+            clock.advance(seconds=1)
+
+            assert await source.export_cooldowns(filename) == 8
+            checkpoint = str(tmp_path / "import.ckpt")
+            assert await target.import_cooldowns(filename, batch_size=3, checkpoint=checkpoint) == 8
+            assert not os.path.exists(checkpoint)
+            assert await stored(target) == await stored(source)
+
+            # importing again keeps the stored cooldowns
+            await target.hit(Bucket.guild, 1, "spin", 2, 600, scope_id=9, guild_id=9)
+            await target.import_cooldowns(filename)
+            assert not (await target.hit(Bucket.guild, 1, "spin", 2, 600, scope_id=9, guild_id=9))[0]
+        finally:
+            await source.close()
+            await target.close()
+
+    asyncio.run(main())
+
+
+def test_import_continues_from_checkpoint(tmp_path, clock, stored):
+    async def main():
+        source = Limiter(Memory(), clock=clock)
+        target = Limiter(Memory(), clock=clock)
+        filename, checkpoint = str(tmp_path / "cooldowns.csv"), str(tmp_path / "import.ckpt")
+        try:
+            for user_id in range(10):
+                await source.hit(Bucket.user, user_id, "spin", 1, 60)
+            await source.export_cooldowns(filename)
+
+            calls = []
+            insert_rows = target.cd.insert_rows
+
+            async def failing(rows):
+                calls.append(len(rows))
+                if len(calls) == 2:
+                    raise ConnectionError
+                await insert_rows(rows)
+
+            await target.setup()
+            target.cd.insert_rows = failing
+            with pytest.raises(ConnectionError):
+                await target.import_cooldowns(filename, batch_size=4, checkpoint=checkpoint)
+            target.cd.insert_rows = insert_rows
+
+            assert await target.import_cooldowns(filename, batch_size=4, checkpoint=checkpoint) == 10
+            assert await stored(target) == await stored(source)
+        finally:
+            await source.close()
+            await target.close()
+
+    asyncio.run(main())
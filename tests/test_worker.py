@@ -0,0 +1,99 @@
+from discord_cooldown import SQlite
+from discord_cooldown.ext import DatabaseWorker
+
+import asyncio
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """
+    Records the queries of every batch run by the workers
+    """
+
+    recorded = []
+    run_batch = DatabaseWorker._run_batch
+
+    def record(db, batch):
+        recorded.append([request.query for request in batch])
+        run_batch(db, batch)
+
+    monkeypatch.setattr(DatabaseWorker, "_run_batch", staticmethod(record))
+    return recorded
+
+
+def _numbers_db(path: str) -> SQlite:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE numbers(n INTEGER NOT NULL)")
+    conn.close()
+    return SQlite(path)
+
+
+def _queue_inserts(worker: DatabaseWorker, *numbers) -> list:
+    # queued before the workers start, so that they are taken together
+    return [worker.submit("INSERT INTO numbers VALUES(?)", (n,)) for n in numbers]
+
+
+def test_queued_requests_run_in_batches_of_max_batch(tmp_path, batches):
+    async def main():
+        worker = DatabaseWorker(_numbers_db(str(tmp_path / "worker.db")), max_batch=2)
+        futures = _queue_inserts(worker, 1, 2, 3, 4, 5)
+        await worker.start()
+        try:
+            await asyncio.gather(*futures)
+            assert await worker.execute("SELECT COUNT(*) FROM numbers") == (5,)
+        finally:
+            await worker.close()
+
+    asyncio.run(main())
+    assert [len(batch) for batch in batches[:3]] == [2, 2, 1]
+
+
+def test_failed_request_gets_its_error_and_the_others_are_replayed(tmp_path, batches):
+    async def main():
+        worker = DatabaseWorker(_numbers_db(str(tmp_path / "worker.db")))
+        futures = _queue_inserts(worker, 1, None, 3)
+        await worker.start()
+        try:
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            assert results[0] is None and results[2] is None
+            assert isinstance(results[1], sqlite3.IntegrityError)
+            assert await worker.execute("SELECT n FROM numbers ORDER BY n", fetch="all") == [(1,), (3,)]
+        finally:
+            await worker.close()
+
+    asyncio.run(main())
+    assert len(batches[0]) == 3
+
+
+def test_close_runs_the_queued_requests(tmp_path):
+    async def main():
+        worker = DatabaseWorker(_numbers_db(str(tmp_path / "worker.db")))
+        await worker.start()
+        futures = _queue_inserts(worker, 1, 2)
+        await worker.close()
+
+        assert await asyncio.gather(*futures) == [None, None]
+        assert not worker.is_running
+
+    asyncio.run(main())
+
+
+def test_vacuum_runs_outside_the_batch_transaction(tmp_path, batches):
+    async def main():
+        worker = DatabaseWorker(SQlite(str(tmp_path / "worker.db")))
+        await worker.start()
+        try:
+            await worker.run("CREATE TABLE numbers(n INTEGER)")
+            insert = "INSERT INTO numbers VALUES(?)"
+            await asyncio.gather(
+                worker.run(insert, (1,)), worker.run("VACUUM"), worker.run(insert, (2,)), worker.run(insert, (3,))
+            )
+            assert await worker.execute("SELECT COUNT(*) FROM numbers") == (3,)
+        finally:
+            await worker.close()
+
+    asyncio.run(main())
+    assert ["VACUUM"] in batches
@@ -0,0 +1,89 @@
+from discord_cooldown import Limiter, Bucket, SQlite
+from discord_cooldown.ext import WriteBehind
+
+import asyncio
+
+import pytest
+
+
+def test_flush_writes_deletes_and_upserts(tmp_path, clock):
+    async def main():
+        path = str(tmp_path / "cooldowns.db")
+        limiter = Limiter(SQlite(path), clock=clock, write_behind=True, flush_interval=3600)
+        try:
+            for user_id in range(1, 4):
+                await limiter.hit(Bucket.user, user_id, "spin", 1, 60)
+            assert await limiter.flush() == 3
+
+            await limiter.reset(Bucket.user, 1, "spin", force=True)
+            await limiter.hit(Bucket.user, 2, "spin", 5, 60)
+            await limiter.hit(Bucket.user, 4, "spin", 1, 60)
+            assert not await limiter.db.execute("SELECT 1 FROM cooldowns_entries WHERE user_id = 4")
+            # the delete of user 1 and the upserts of users 2 and 4
+            assert await limiter.flush() == 3
+            assert await limiter.flush() == 0
+
+            rows = await limiter.db.execute(
+                "SELECT user_id, count FROM cooldowns_entries ORDER BY user_id", fetch="all"
+            )
+            assert [tuple(row) for row in rows] == [(2, 2), (3, 1), (4, 1)]
+        finally:
+            await limiter.close()
+
+    asyncio.run(main())
+
+
+class _FailingDatabase:
+    # fails every write, after `during` ran as if it was waiting for the database
+    def __init__(self, during=None):
+        self.during = during
+        self.calls = 0
+
+    async def read_modify_write(self, *args):
+        self.calls += 1
+        if self.during is not None:
+            self.during()
+        await asyncio.sleep(0)
+        raise ConnectionError
+
+
+def _row(user_id: int):
+    return (Bucket.user.value, user_id, 0, "spin", 0, 1, 1, 0, 0)
+
+
+def test_failed_flush_keeps_at_most_max_pending(caplog):
+    async def main():
+        write_behind = None
+
+        def more_updates():
+            for user_id in range(10, 13):
+                write_behind.upsert(_row(user_id)[:4], _row(user_id))
+
+        write_behind = WriteBehind(_FailingDatabase(more_updates), "UPSERT", "DELETE", max_pending=5)
+        for user_id in range(4):
+            write_behind.upsert(_row(user_id)[:4], _row(user_id))
+        write_behind.delete(_row(4)[:4])
+
+        with pytest.raises(ConnectionError):
+            await write_behind.flush()
+        # the 3 updates made during the flush, then 2 of the 5 which failed
+        assert write_behind.pending == 5
+        assert "dropped 3 unwritten cooldown updates" in caplog.text
+
+    asyncio.run(main())
+
+
+def test_error_of_a_flush_triggered_by_size_is_logged(caplog):
+    async def main():
+        db = _FailingDatabase()
+        write_behind = WriteBehind(db, "UPSERT", "DELETE", max_pending=2)
+        for user_id in range(2):
+            write_behind.upsert(_row(user_id)[:4], _row(user_id))
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        assert db.calls == 1
+        assert "failed to write 2 pending cooldowns" in caplog.text
+        assert write_behind.pending == 2
+
+    asyncio.run(main())